@@ -0,0 +1,319 @@
+"""
+bench_chat.py
+- server.py 채팅 서버 부하 테스트 / 지연 시간 측정 도구
+- client.py 와 똑같은 줄 단위 프로토콜로 가짜 손님 수천 명을 띄워서
+    닉네임 등록 → 채팅/귓속말 보내기 → 받은 메시지로 지연 시간을 계산해요.
+- 결과는 JSON 으로 출력하므로 버전끼리 비교하기 쉬워요.
+- 서버의 도배 제한(기본 1초에 5개)보다 빠르게 보내려면 --spawn 에 "--chat-rate 0 --whisper-rate 0" 을 넣어요.
+
+예)
+    python bench_chat.py --spawn "--mode event" --clients 2000 --senders 20 --duration 10 --out event.json
+    python bench_chat.py --port 5000 --server-pid 12345 --clients 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+
+try:
+    import resource  # 열 수 있는 소켓 수 제한 올리기 (리눅스/맥 전용)
+except ImportError:
+    resource = None
+
+ENC = "utf-8"
+MARK = "#B"             # 측정용 메시지 표시: "#B <보낸 시각 ns> <번호>"
+READY_LINE = "채팅을 시작해 보세요!"  # 서버 환영 인사의 마지막 줄 → 등록 완료
+SERVER_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+
+# 지연 시간 목록(ns)을 p50/p99/최대값(ms) 요약으로 바꾸는 함수
+def summarize(samples):
+    if not samples:
+        return {"count": 0, "p50": None, "p99": None, "max": None, "mean": None}
+    s = sorted(samples)
+
+    def pct(p):
+        return round(s[min(len(s) - 1, int(len(s) * p))] / 1e6, 3)
+
+    return {
+        "count": len(s),
+        "p50": pct(0.50),
+        "p99": pct(0.99),
+        "max": round(s[-1] / 1e6, 3),
+        "mean": round(sum(s) / len(s) / 1e6, 3),
+    }
+
+
+# 서버 프로세스의 메모리(RSS, KB)와 스레드 수를 읽는 함수 (리눅스 /proc 사용)
+def read_proc(pid):
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            info = {}
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    info["rss_kb"] = int(line.split()[1])
+                elif line.startswith("Threads:"):
+                    info["threads"] = int(line.split()[1])
+            return info
+    except OSError:
+        return None
+
+
+# 가짜 손님 1명
+class BenchClient:
+    def __init__(self, idx, observe):
+        self.idx = idx
+        self.name = f"bench{idx}"
+        self.observe = observe      # True 면 받은 줄을 하나하나 읽어 지연 시간을 잼
+        self.reader = None
+        self.writer = None
+        self.received_bytes = 0
+
+    async def connect(self, host, port, room):
+        self.reader, self.writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        await self.reader.readline()  # "닉네임을 입력하세요:"
+        self.writer.write((self.name + "\n").encode(ENC))
+        while True:  # 환영 인사가 끝날 때까지 읽기
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("서버가 연결을 끊었습니다")
+            if line.decode(ENC, errors="replace").strip() == READY_LINE:
+                break
+        if room:
+            self.writer.write(f"/join {room}\n".encode(ENC))
+            await self.writer.drain()
+
+    def send(self, text):
+        self.writer.write((text + "\n").encode(ENC))
+
+    # 받은 메시지를 계속 읽는 일 (관찰 손님만 내용을 해석함)
+    async def read_loop(self, stats):
+        try:
+            if not self.observe:
+                while True:  # 나머지 손님은 내용은 안 보고 빨리 비우기만 함
+                    data = await self.reader.read(1 << 16)
+                    if not data:
+                        return
+                    self.received_bytes += len(data)
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    return
+                now = time.perf_counter_ns()
+                self.received_bytes += len(line)
+                text = line.decode(ENC, errors="replace")
+                at = text.find(MARK + " ")
+                if at < 0:
+                    continue
+                try:
+                    sent_ns = int(text[at + len(MARK) + 1:].split()[0])
+                except (ValueError, IndexError):
+                    continue
+                if not stats["measuring"]:
+                    continue
+                if text.startswith("(귓)"):
+                    stats["whisper_lat"].append(now - sent_ns)
+                else:
+                    stats["chat_lat"].append(now - sent_ns)
+        except (ConnectionError, asyncio.CancelledError):
+            return
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# 정해진 속도로 채팅/귓속말을 보내는 일
+async def send_loop(client, observers, args, stats, stop_at):
+    interval = 1.0 / args.rate
+    rnd = random.Random(client.idx)
+    seq = 0
+    next_at = time.perf_counter()
+    while time.perf_counter() < stop_at:
+        seq += 1
+        stamp = f"{MARK} {time.perf_counter_ns()} {client.idx}-{seq}"
+        if observers and rnd.random() < args.whisper_ratio:
+            target = rnd.choice(observers)  # 관찰 손님에게 보내야 지연 시간을 잴 수 있음
+            client.send(f"/w {target.name} {stamp}")
+            stats["sent_whisper"] += 1
+        else:
+            client.send(f"{stamp} {'x' * args.payload}")
+            stats["sent_chat"] += 1
+        try:
+            await client.writer.drain()
+        except ConnectionError:
+            stats["send_errors"] += 1
+            return
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            next_at = time.perf_counter()  # 밀렸으면 따라잡으려 몰아 보내지 않음
+
+
+# 포트가 열릴 때까지 기다리는 함수 (--spawn 으로 서버를 띄웠을 때)
+async def wait_port(host, port, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            r, w = await asyncio.open_connection(host, port)
+            w.close()
+            return True
+        except OSError:
+            await asyncio.sleep(0.1)
+    return False
+
+
+async def run(args):
+    server = None
+    pid = args.server_pid
+    if args.spawn is not None:
+        cmd = [sys.executable, SERVER_PY, "--port", str(args.port)] + shlex.split(args.spawn)
+        server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        pid = server.pid
+        if not await wait_port(args.host, args.port):
+            server.kill()
+            raise SystemExit("서버가 시작되지 않았습니다: " + " ".join(cmd))
+    # 위 wait_port 가 '닉네임 없이 끊은 손님'을 한 명 만들었으니 정리될 시간을 조금 줌
+    await asyncio.sleep(0.2)
+
+    stats = {"measuring": False, "chat_lat": [], "whisper_lat": [],
+             "sent_chat": 0, "sent_whisper": 0, "send_errors": 0}
+    proc_start = read_proc(pid)
+
+    # 1) 손님 N명 접속 + 닉네임 등록
+    n_obs = min(args.observers, args.clients)
+    clients = [BenchClient(i, observe=i < n_obs) for i in range(args.clients)]
+    gate = asyncio.Semaphore(args.connect_concurrency)
+    failed = 0
+
+    async def connect_one(c):
+        nonlocal failed
+        room = f"room{c.idx % args.rooms}" if args.rooms > 1 else None
+        async with gate:
+            try:
+                await c.connect(args.host, args.port, room)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                failed += 1
+                c.writer = None
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(connect_one(c) for c in clients))
+    connect_secs = time.perf_counter() - t0
+    alive = [c for c in clients if c.writer is not None]
+    observers = [c for c in alive if c.observe]
+    readers = [asyncio.ensure_future(c.read_loop(stats)) for c in alive]
+    proc_connected = read_proc(pid)
+
+    # 2) 보내는 손님 K명이 정해진 시간 동안 메시지를 보냄 (처음 warmup 초는 측정 안 함)
+    senders = alive[-args.senders:] if args.senders else []
+    stop_at = time.perf_counter() + args.warmup + args.duration
+    tasks = [asyncio.ensure_future(send_loop(c, observers, args, stats, stop_at))
+             for c in senders]
+    peak = dict(proc_connected or {})
+
+    async def sample_proc():
+        while True:
+            info = read_proc(pid)
+            if info and info.get("rss_kb", 0) > peak.get("rss_kb", 0):
+                peak.update(info)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.ensure_future(sample_proc())
+    await asyncio.sleep(args.warmup)
+    stats["measuring"] = True
+    sent_before = stats["sent_chat"] + stats["sent_whisper"]
+    t1 = time.perf_counter()
+    await asyncio.gather(*tasks)
+    sent_secs = time.perf_counter() - t1
+    sent_measured = stats["sent_chat"] + stats["sent_whisper"] - sent_before
+    await asyncio.sleep(args.drain)  # 마지막 메시지가 도착할 시간
+    stats["measuring"] = False
+    sampler.cancel()
+    proc_end = read_proc(pid)
+
+    for t in readers:
+        t.cancel()
+    for c in alive:
+        c.close()
+    if server is not None:
+        server.terminate()
+        server.wait(timeout=5)
+
+    chat = summarize(stats["chat_lat"])
+    return {
+        "label": args.label,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "host": args.host, "port": args.port, "spawn": args.spawn,
+            "clients": args.clients, "senders": len(senders), "observers": len(observers),
+            "rooms": args.rooms, "rate_per_sender": args.rate, "whisper_ratio": args.whisper_ratio,
+            "payload": args.payload, "duration": args.duration, "warmup": args.warmup,
+        },
+        "connect": {"ok": len(alive), "failed": failed, "seconds": round(connect_secs, 3)},
+        "sent": {"chat": stats["sent_chat"], "whisper": stats["sent_whisper"],
+                 "errors": stats["send_errors"]},
+        "throughput": {
+            "sent_msgs_per_sec": round(sent_measured / sent_secs, 1) if sent_secs else None,
+            # 관찰 손님이 받은 채팅 수를 전체 인원 비율로 늘린 값 (서버가 실제로 내보낸 양의 추정치)
+            "est_deliveries_per_sec": (round(chat["count"] / sent_secs * len(alive) / len(observers), 1)
+                                       if sent_secs and observers else None),
+            "received_mb": round(sum(c.received_bytes for c in alive) / 1e6, 3),
+        },
+        "latency_ms": chat,
+        "whisper_latency_ms": summarize(stats["whisper_lat"]),
+        "server": {"pid": pid, "start": proc_start, "connected": proc_connected,
+                   "peak": peak or None, "end": proc_end},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="채팅 서버 부하 테스트")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--spawn", default=None, metavar="ARGS",
+                        help='server.py 를 직접 띄울 때 넘길 옵션 (예: "--mode event")')
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="이미 떠 있는 서버의 프로세스 번호 (메모리 측정용)")
+    parser.add_argument("--clients", type=int, default=1000, help="접속할 가짜 손님 수")
+    parser.add_argument("--senders", type=int, default=10, help="그중 메시지를 보내는 손님 수")
+    parser.add_argument("--observers", type=int, default=50,
+                        help="받은 메시지를 해석해 지연 시간을 재는 손님 수 (나머지는 비우기만 함)")
+    parser.add_argument("--rooms", type=int, default=1, help="손님을 나눠 넣을 방 개수 (1이면 모두 로비)")
+    parser.add_argument("--rate", type=float, default=5.0, help="보내는 손님 1명당 초당 메시지 수")
+    parser.add_argument("--whisper-ratio", type=float, default=0.1, help="보내는 메시지 중 귓속말 비율")
+    parser.add_argument("--payload", type=int, default=32, help="채팅 메시지 뒤에 붙일 글자 수")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="측정 전에 보내기만 하는 시간(초)")
+    parser.add_argument("--drain", type=float, default=1.0, help="보내기가 끝난 뒤 도착을 기다리는 시간(초)")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="동시에 접속을 시도하는 수")
+    parser.add_argument("--label", default="", help="결과에 붙일 이름 (버전 비교용)")
+    parser.add_argument("--out", default=None, help="결과 JSON 을 저장할 파일 (없으면 화면에 출력)")
+    args = parser.parse_args()
+
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+    result = asyncio.run(run(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding=ENC) as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+chat_history.py
+- 채팅방마다 최근 대화 N개를 기억하는 '고리 버퍼(ring buffer)'
+- 디스크에는 '이어 쓰기만 하는 기록장(append-only log)'으로 남겨서 서버를 껐다 켜도 유지
+    * 기록장은 일정 크기의 조각(세그먼트) 파일로 나뉘고, mmap 으로 메모리처럼 바로 씀
+    * 조각마다 '목차(.idx)' 파일이 있어서 N번째 기록이 어디 있는지 바로 찾음
+    * 서버가 켜질 때는 파일 전체를 읽지 않고 목차를 뒤에서부터 읽어 최근 것만 불러옴
+"""
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+
+RECORD_HEADER = struct.Struct(">IIH")  # 기록 머리: 몸통 길이, CRC32(깨짐 검사), 방 이름 길이
+INDEX_ENTRY = struct.Struct(">I")      # 목차 한 칸: 조각 파일 안에서 기록이 시작하는 위치
+INDEX_CHUNK = 4096                     # 목차를 뒤에서부터 한 번에 읽어 오는 칸 수
+ENC = "utf-8"
+
+
+class MessageHistory:
+    """
+    방 이름 -> 최근 메시지(이미 UTF-8 bytes 로 바뀐 한 줄) 목록.
+    path 가 있으면 디스크 기록장에서 최근 것을 불러오고, writable 이면 새 메시지를 이어 씀.
+    """
+
+    def __init__(self, size, path=None, writable=True,
+                 segment_bytes=4 * 1024 * 1024, max_segments=8, scan_limit=None):
+        self.size = size
+        self.rings = {}  # 방 이름 -> deque(maxlen=size)
+        self.lock = threading.Lock()
+        self.path = path
+        self.writable = bool(path) and writable
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        # 불러올 때 뒤에서부터 최대 몇 개까지 살펴볼지 (조용한 방 때문에 끝까지 읽지 않게)
+        self.scan_limit = scan_limit if scan_limit is not None else max(size, 1) * 50
+        self.seq = 0        # 지금 쓰고 있는 조각 번호
+        self.mm = None      # 지금 쓰고 있는 조각의 mmap
+        self.seg_file = None
+        self.idx_file = None
+        self.pos = 0        # 조각 안에서 다음 기록을 쓸 위치
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if size > 0:
+                self._load_tail()
+            if self.writable:
+                self._open_active()
+
+    # ---------- 메모리 ----------
+
+    def recent(self, room):
+        ring = self.rings.get(room)
+        return list(ring) if ring else []
+
+    def append(self, room, data: bytes):
+        """메시지 1개를 기억함 (writable 이면 디스크 기록장에도 이어 씀)"""
+        room = room or ""
+        if self.size > 0:
+            ring = self.rings.get(room)
+            if ring is None:
+                ring = self.rings.setdefault(room, deque(maxlen=self.size))
+            ring.append(data)
+        if self.writable:
+            with self.lock:
+                self._write(room, data)
+
+    # ---------- 디스크 ----------
+
+    def _segments(self):
+        seqs = []
+        for fn in os.listdir(self.path):
+            if fn.endswith(".log") and fn[:-4].isdigit():
+                seqs.append(int(fn[:-4]))
+        return sorted(seqs)
+
+    def _seg_path(self, seq, ext):
+        return os.path.join(self.path, f"{seq:010d}.{ext}")
+
+    # 조각 파일을 열고, 목차를 보고 다음에 쓸 위치를 찾음
+    def _open_active(self):
+        seqs = self._segments()
+        self.seq = seqs[-1] if seqs else 0
+        log_path = self._seg_path(self.seq, "log")
+        if not os.path.exists(log_path):
+            with open(log_path, "wb") as f:
+                f.truncate(self.segment_bytes)  # 미리 크기를 잡아 둬야 mmap 으로 쓸 수 있음
+        self.seg_file = open(log_path, "r+b")
+        if os.fstat(self.seg_file.fileno()).st_size < self.segment_bytes:
+            self.seg_file.truncate(self.segment_bytes)
+        self.mm = mmap.mmap(self.seg_file.fileno(), self.segment_bytes)
+        idx_path = self._seg_path(self.seq, "idx")
+        self.pos = 0
+        count = os.path.getsize(idx_path) // INDEX_ENTRY.size if os.path.exists(idx_path) else 0
+        if count:
+            # 마지막 목차 칸이 가리키는 기록 바로 뒤가 다음에 쓸 위치
+            with open(idx_path, "rb") as f:
+                f.seek((count - 1) * INDEX_ENTRY.size)
+                (last,) = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+            length, _, _ = RECORD_HEADER.unpack_from(self.mm, last)
+            self.pos = last + RECORD_HEADER.size + length
+            # 목차 끝에 반쯤 쓰다 만 칸이 있으면 잘라냄
+            os.truncate(idx_path, count * INDEX_ENTRY.size)
+        # 버퍼 없이 바로 써야 서버가 갑자기 죽어도 목차가 기록과 어긋나지 않음
+        self.idx_file = open(idx_path, "ab", buffering=0)
+
+    # 새 조각으로 넘어가고, 오래된 조각은 지움
+    def _roll(self):
+        self._close_active()
+        with open(self._seg_path(self.seq + 1, "log"), "wb") as f:
+            f.truncate(self.segment_bytes)
+        seqs = self._segments()
+        for old in seqs[:max(0, len(seqs) - self.max_segments)]:
+            for ext in ("log", "idx"):
+                try:
+                    os.remove(self._seg_path(old, ext))
+                except OSError:
+                    pass
+        self._open_active()
+
+    def _write(self, room, data):
+        room_b = room.encode(ENC)
+        body = room_b + data
+        need = RECORD_HEADER.size + len(body)
+        if need > self.segment_bytes:
+            return  # 조각보다 큰 메시지는 디스크에 남기지 않음 (메모리에는 있음)
+        if self.pos + need > self.segment_bytes:
+            self._roll()
+        start = self.pos
+        self.mm[start:start + need] = RECORD_HEADER.pack(len(body), zlib.crc32(body), len(room_b)) + body
+        self.pos += need
+        self.idx_file.write(INDEX_ENTRY.pack(start))  # 기록을 먼저 쓰고 목차를 나중에 씀
+
+    # 목차를 뒤에서부터 읽으며 방마다 최근 size 개를 채움 (전체를 읽지 않음)
+    def _load_tail(self):
+        scanned = 0
+        loaded = {}  # 방 이름 -> 뒤에서부터 모은 메시지
+        for seq in reversed(self._segments()):
+            idx_path = self._seg_path(seq, "idx")
+            log_path = self._seg_path(seq, "log")
+            if not os.path.exists(idx_path) or os.path.getsize(log_path) == 0:
+                continue
+            with open(log_path, "rb") as lf, open(idx_path, "rb") as xf:
+                mm = mmap.mmap(lf.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    end = os.fstat(xf.fileno()).st_size // INDEX_ENTRY.size
+                    while end > 0 and scanned < self.scan_limit:
+                        begin = max(0, end - INDEX_CHUNK)
+                        xf.seek(begin * INDEX_ENTRY.size)
+                        chunk = xf.read((end - begin) * INDEX_ENTRY.size)
+                        for i in range(end - begin - 1, -1, -1):
+                            (start,) = INDEX_ENTRY.unpack_from(chunk, i * INDEX_ENTRY.size)
+                            scanned += 1
+                            rec = self._read_record(mm, start)
+                            if rec is not None:
+                                room, data = rec
+                                got = loaded.setdefault(room, [])
+                                if len(got) < self.size:
+                                    got.append(data)
+                            if scanned >= self.scan_limit:
+                                break
+                        end = begin
+                finally:
+                    mm.close()
+            if scanned >= self.scan_limit:
+                break
+        for room, items in loaded.items():
+            self.rings[room] = deque(reversed(items), maxlen=self.size)
+
+    @staticmethod
+    def _read_record(mm, start):
+        if start + RECORD_HEADER.size > len(mm):
+            return None
+        length, crc, room_len = RECORD_HEADER.unpack_from(mm, start)
+        body = mm[start + RECORD_HEADER.size:start + RECORD_HEADER.size + length]
+        if len(body) != length or zlib.crc32(body) != crc:
+            return None  # 깨진 기록은 건너뜀
+        return body[:room_len].decode(ENC, errors="replace"), bytes(body[room_len:])
+
+    def _close_active(self):
+        if self.mm is not None:
+            self.mm.flush()
+            self.mm.close()
+            self.mm = None
+        for f in (self.seg_file, self.idx_file):
+            if f is not None:
+                f.close()
+        self.seg_file = self.idx_file = None
+
+    def close(self):
+        with self.lock:
+            self._close_active()
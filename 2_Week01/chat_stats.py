@@ -0,0 +1,199 @@
+"""
+chat_stats.py
+- 채팅 서버 안에서 무슨 일이 일어나는지 세어 두는 계기판
+    * 숫자는 스레드마다 자기 칸(shard)에만 더해요. 잠금장치가 필요 없어서 켜 둬도 느려지지 않아요.
+    * 보여 줄 때만 모든 칸을 더해요 (1초에 한 번 정도라 부담이 적음).
+    * 걸린 시간은 '2배씩 커지는 칸'(1µs, 2µs, 4µs ...)에 개수만 세는 히스토그램으로 모아요.
+- StatsServer 를 켜면 작은 HTTP 포트에서 JSON 으로 볼 수 있어요.
+"""
+
+import json
+import threading
+import time
+import weakref
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+COUNTERS = ("msgs_in", "msgs_out", "bytes_in", "bytes_out", "broadcasts",
+            "lock_acquires", "lock_contended", "throttled_chat", "throttled_whisper")
+HISTOGRAMS = ("fanout", "lock_wait")
+BUCKETS = 32  # 1µs ~ 약 35분까지
+
+
+class Shard:
+    """한 스레드가 혼자 쓰는 칸"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.hists = {name: [0] * BUCKETS for name in HISTOGRAMS}
+        self.sums = dict.fromkeys(HISTOGRAMS, 0.0)  # 히스토그램마다 걸린 시간 합계(초)
+
+
+class Stats:
+    def __init__(self):
+        self.local = threading.local()
+        self.shards = set()     # 살아 있는 스레드들의 칸
+        self.retired = Shard()  # 끝난 스레드들의 칸을 합쳐 둔 곳
+        self.lock = threading.Lock()  # 칸 목록을 바꿀 때만 씀 (숫자를 더할 때는 안 씀)
+        self.started = time.time()
+
+    def shard(self) -> Shard:
+        try:
+            return self.local.shard
+        except AttributeError:
+            pass
+        shard = Shard()
+        token = Token()
+        self.local.shard, self.local.token = shard, token
+        with self.lock:
+            self.shards.add(shard)
+        # 스레드가 끝나 token 이 사라지면 그 칸의 숫자를 retired 에 옮김 (손님마다 스레드가 생겨도 칸이 쌓이지 않게)
+        weakref.finalize(token, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        with self.lock:
+            self.shards.discard(shard)
+            merge(self.retired, shard)
+
+    def add(self, key, n=1):
+        self.shard().counts[key] += n
+
+    def observe(self, name, seconds):
+        shard = self.shard()
+        shard.hists[name][min(BUCKETS - 1, int(seconds * 1e6).bit_length())] += 1
+        shard.sums[name] += seconds
+
+    def totals(self) -> Shard:
+        total = Shard()
+        with self.lock:
+            merge(total, self.retired)
+            for shard in list(self.shards):
+                merge(total, shard)
+        return total
+
+
+class Token:
+    """스레드가 끝났는지 알아내기 위한 표 (weakref 를 걸 수 있어야 해서 클래스로 만듦)"""
+    __slots__ = ("__weakref__",)
+
+
+def merge(into: Shard, shard: Shard):
+    for key, n in shard.counts.items():
+        into.counts[key] += n
+    for name, buckets in shard.hists.items():
+        mine = into.hists[name]
+        for i, n in enumerate(buckets):
+            mine[i] += n
+        into.sums[name] += shard.sums[name]
+
+
+# 히스토그램을 사람이 보기 좋게 정리하는 함수 (백분위는 칸의 윗 경계로 어림함)
+def summarize(buckets, total_seconds):
+    count = sum(buckets)
+    out = {"count": count, "mean_us": round(total_seconds * 1e6 / count, 1) if count else 0.0}
+    for label, q in (("p50_us", 0.5), ("p99_us", 0.99), ("p999_us", 0.999)):
+        out[label] = upper_bound(buckets, count * q) if count else 0
+    out["max_us"] = upper_bound(buckets, count) if count else 0
+    out["buckets_us"] = {str(1 << i): n for i, n in enumerate(buckets) if n}  # "이 값(µs) 미만": 개수
+    return out
+
+
+def upper_bound(buckets, rank):
+    seen = 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if n and seen >= rank:
+            return 1 << i
+    return 1 << (len(buckets) - 1)
+
+
+class TimedLock:
+    """
+    threading.Lock 과 똑같이 쓰되, 기다린 시간을 재는 잠금장치.
+    바로 잡히면 시간을 재지 않으므로 기다리는 사람이 없을 때는 거의 공짜.
+    """
+
+    def __init__(self, stats):
+        self._lock = threading.Lock()
+        self.stats = stats
+
+    def __enter__(self):
+        shard = self.stats.shard()
+        shard.counts["lock_acquires"] += 1
+        if self._lock.acquire(False):
+            return self
+        start = time.perf_counter()
+        self._lock.acquire()
+        shard.counts["lock_contended"] += 1
+        waited = time.perf_counter() - start
+        shard.hists["lock_wait"][min(BUCKETS - 1, int(waited * 1e6).bit_length())] += 1
+        shard.sums["lock_wait"] += waited
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class StatsServer:
+    """
+    1초마다 숫자를 찍어 두고(초당 개수 계산용), HTTP GET 에 JSON 으로 답하는 작은 서버.
+    gauges 는 지금 값(접속자 수 등)을 dict 로 돌려주는 함수.
+    """
+
+    def __init__(self, stats, gauges, host="127.0.0.1", port=0, interval=1.0, keep=10):
+        self.stats = stats
+        self.gauges = gauges
+        self.interval = interval
+        self.samples = deque(maxlen=keep + 1)  # (시각, 합계) — 최근 keep 초
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/stats"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(owner.report(), ensure_ascii=False, indent=2).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # 들여다볼 때마다 서버 화면에 찍히지 않게
+
+        self.httpd = HTTPServer((host, port), Handler)
+        self.port = self.httpd.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self._sample_loop, daemon=True).start()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def _sample_loop(self):
+        while True:
+            self.samples.append((time.monotonic(), self.stats.totals()))
+            time.sleep(self.interval)
+
+    # 최근 window 초 동안의 초당 증가량
+    def _rates(self, now, total, window):
+        past = [s for s in self.samples if now - s[0] >= window - self.interval / 2]
+        if not past:
+            return None
+        t, old = past[-1]
+        dt = now - t
+        return {key: round((total.counts[key] - old.counts[key]) / dt, 1)
+                for key in ("msgs_in", "msgs_out", "bytes_in", "bytes_out", "broadcasts")}
+
+    def report(self):
+        now = time.monotonic()
+        total = self.stats.totals()
+        return {
+            "uptime_s": round(time.time() - self.stats.started, 1),
+            **self.gauges(),
+            "totals": total.counts,
+            "per_sec_1s": self._rates(now, total, 1.0),
+            "per_sec_10s": self._rates(now, total, 10.0),
+            "fanout": summarize(total.hists["fanout"], total.sums["fanout"]),
+            "lock_wait": summarize(total.hists["lock_wait"], total.sums["lock_wait"]),
+        }
@@ -1,16 +1,31 @@
 import socket     # 네트워크 통신용
 import threading  # 동시에 보내고 받기 위해 필요
 import sys        # 키보드 입력을 다루기 위해 필요
+import struct     # 바이너리 프레임의 길이를 바이트로 적을 때 사용
+import zlib       # 압축 프레임을 풀거나 만들 때 사용
+import argparse   # --binary 같은 옵션을 받기 위해 필요
 
 HOST = "127.0.0.1"  # 서버 주소 (같은 컴퓨터에서 테스트하면 127.0.0.1)
 PORT = 5000         # 서버와 똑같이 맞춰야 함
 ENC = "utf-8"       # 글자 깨지지 않게 UTF-8 사용
 
+# 바이너리 프레임 모드 (server.py 와 똑같이 맞춰야 함)
+MAGIC = b"\xffCHB"                  # 접속하자마자 이걸 보내면 서버가 프레임 모드로 바꿔 줌
+FLAG_ZLIB = 0x01                    # 긴 메시지는 압축해서 주고받기
+FRAME_HEADER = struct.Struct(">IB")  # [길이 4바이트][종류 1바이트]
+FRAME_TEXT = 0x01
+FRAME_TEXT_Z = 0x02
+FRAME_PING = 0x03  # 서버가 "살아 있니?" 하고 물어봄
+FRAME_PONG = 0x04  # "살아 있어!" 라는 답
+COMPRESS_MIN = 256
+
+send_lock = threading.Lock()  # PONG 답장과 내 입력이 섞여 나가지 않게 함
+
 
 # 서버에서 오는 메시지를 계속 받는 함수
 def recv_loop(sock):
     try:
-        f = sock.makefile("r", encoding=ENC, newline="\n")  # 서버에서 오는 걸 줄 단위로 읽기
+        f = sock.makefile("r", encoding=ENC, errors="replace", newline="\n")  # 서버에서 오는 걸 줄 단위로 읽기
         for line in f:  # 계속 읽음
             print(line.strip())  # 화면에 출력
     except:
@@ -19,12 +34,52 @@ def recv_loop(sock):
         sock.close()  # 끝나면 전화기 끊기
 
 
+# 바이너리 프레임 모드에서 서버 메시지를 받는 함수
+def recv_loop_binary(sock):
+    try:
+        f = sock.makefile("rb")
+        # 서버가 확인 신호(MAGIC)를 보내기 전에 온 건 예전처럼 줄 단위 글자
+        while f.peek(1)[:1] not in (MAGIC[:1], b""):
+            print(f.readline().decode(ENC, errors="replace").strip())
+        ack = f.read(len(MAGIC) + 1)
+        if ack[:len(MAGIC)] != MAGIC:
+            return
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                break
+            length, kind = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if kind == FRAME_PING:  # 바로 답해야 서버가 끊긴 연결로 보지 않음
+                with send_lock:
+                    sock.sendall(FRAME_HEADER.pack(len(payload), FRAME_PONG) + payload)
+                continue
+            if kind == FRAME_TEXT_Z:
+                payload = zlib.decompress(payload)
+            elif kind != FRAME_TEXT:
+                continue  # 모르는 종류는 건너뜀
+            print(payload.decode(ENC, errors="replace"))
+    except:
+        pass
+    finally:
+        sock.close()
+
+
 # 내가 입력한 걸 서버로 계속 보내는 함수
-def send_loop(sock):
+def send_loop(sock, binary=False, compress=False):
     try:
         for line in sys.stdin:  # 키보드에서 한 줄 입력할 때마다
             msg = line.strip()
-            sock.sendall((msg + "\n").encode(ENC))  # 서버로 전송
+            data = msg.encode(ENC)
+            if not binary:
+                frame = data + b"\n"
+            elif compress and len(data) > COMPRESS_MIN:
+                z = zlib.compress(data)
+                frame = FRAME_HEADER.pack(len(z), FRAME_TEXT_Z) + z
+            else:
+                frame = FRAME_HEADER.pack(len(data), FRAME_TEXT) + data
+            with send_lock:
+                sock.sendall(frame)  # 서버로 전송
             if msg == "/종료":  # '/종료' 입력하면 종료
                 break
     except:
@@ -35,13 +90,21 @@ def send_loop(sock):
 
 # 메인 실행 부분
 def main():
+    parser = argparse.ArgumentParser(description="간단 채팅 클라이언트")
+    parser.add_argument("--binary", action="store_true", help="길이+종류 프레임으로 주고받기 (새 서버 전용)")
+    parser.add_argument("--compress", action="store_true", help="--binary 와 함께: 긴 메시지는 압축")
+    args = parser.parse_args()
+
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.connect((HOST, PORT))  # 서버에 연결
+        if args.binary:
+            s.sendall(MAGIC + bytes([FLAG_ZLIB if args.compress else 0]))  # 프레임 모드로 바꿔 달라고 인사
         # 서버에서 오는 메시지를 받는 전용 스레드 만들기
-        t_recv = threading.Thread(target=recv_loop, args=(s,), daemon=True)
+        target = recv_loop_binary if args.binary else recv_loop
+        t_recv = threading.Thread(target=target, args=(s,), daemon=True)
         t_recv.start()
         # 메인 스레드는 내가 입력한 걸 보내는 역할
-        send_loop(s)
+        send_loop(s, args.binary, args.binary and args.compress)
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,24 @@
 import socket      # 네트워크 통신(전화기 같은 역할)을 할 수 있게 해주는 기본 도구
 import threading   # 동시에 여러 사람과 대화(멀티태스킹)를 할 수 있게 해주는 도구
+import selectors   # 스레드 없이 한 명의 교환원이 여러 전화선을 돌아가며 살피게 해주는 도구
+import argparse    # 실행할 때 --mode 같은 옵션을 받기 위한 도구
+import time        # 느린 손님이 얼마나 오래 밀려 있었는지 재기 위한 도구
+import os          # 프로세스 번호, 임시 폴더 경로 등을 다룰 때 사용
+import json        # 프로세스끼리 주고받는 작은 안내(닉네임 확인 등)를 글자로 바꿀 때 사용
+import struct      # 프로세스끼리 주고받는 묶음(프레임)의 길이를 바이트로 적을 때 사용
+import tempfile    # 프로세스끼리 이야기할 유닉스 소켓 파일을 임시 폴더에 만들기 위해 사용
+import multiprocessing  # CPU 코어마다 일꾼 프로세스를 띄우기 위한 도구
+import zlib        # 바이너리 프레임 모드에서 긴 메시지를 압축할 때 사용
+from collections import deque  # 앞에서 꺼내고 뒤에 넣는 게 빠른 줄(큐)
+
+from chat_history import MessageHistory  # 방마다 최근 대화를 기억하고 디스크에 남기는 도구
+from timer_wheel import TimerWheel        # 시간이 다 된 손님만 빨리 찾아내는 타이머 바퀴
+from chat_stats import Stats, StatsServer, TimedLock  # 서버 안에서 일어나는 일을 세는 계기판
+
+try:
+    import resource  # 한 프로그램이 열 수 있는 전화선(파일) 개수 제한을 바꾸는 도구 (리눅스/맥 전용)
+except ImportError:
+    resource = None
 
 # 서버가 열릴 주소와 포트 번호를 정해요
 HOST = "0.0.0.0"   # 0.0.0.0 은 '내 컴퓨터로 들어오는 모든 연결을 받겠다'는 뜻
@@ -9,48 +28,520 @@ PORT = 5000        # 전화기로 치면 '내선 번호' 같은 것. 아무 숫
 clients = {}        # 소켓(전화선) -> 이름(닉네임)
 name_to_sock = {}   # 이름(닉네임) -> 소켓(전화선)
 
+# 계기판: 받은/보낸 메시지와 바이트, 방송에 걸린 시간, 잠금장치를 기다린 시간 (--stats-port 로 봄)
+stats = Stats()
+STATS_PORT = 0            # 계기판을 볼 HTTP 포트 (0이면 끔). 일꾼 프로세스는 이 번호 + 순번
+STATS_HOST = "127.0.0.1"  # 계기판은 기본으로 이 컴퓨터에서만 볼 수 있음
+
 # 여러 사람이 동시에 들어와도 순서가 꼬이지 않게 '문 잠금장치' 같은 걸 씀
-lock = threading.Lock()
+# (threading.Lock 과 똑같이 쓰지만, 누가 쓰고 있어서 기다린 시간을 계기판에 적음)
+lock = TimedLock(stats)
 
 ENC = "utf-8"       # 글자 깨지지 않게 'UTF-8' 방식으로 메시지를 주고받음
 
+NAME_PROMPT = "닉네임을 입력하세요:"
+
+# 바이너리 프레임 모드 (새 client.py --binary 가 원할 때만 켜짐, 옛날 손님은 그대로 줄 단위)
+# - 손님이 접속하자마자 MAGIC + 기능 1바이트를 보내면, 서버도 MAGIC + 허락한 기능으로 답함
+# - 0xFF 는 UTF-8 글자에 절대 나오지 않으므로 옛날 손님의 닉네임과 헷갈릴 일이 없음
+# - 그 뒤로는 [길이 4바이트][종류 1바이트][내용] 프레임으로 주고받음
+MAGIC = b"\xffCHB"
+HELLO_SIZE = len(MAGIC) + 1
+FLAG_ZLIB = 0x01                    # 기능: 긴 프레임은 zlib 으로 압축해도 됨
+FRAME_HEADER = struct.Struct(">IB")
+FRAME_TEXT = 0x01                   # 내용: UTF-8 메시지 (줄바꿈 없음)
+FRAME_TEXT_Z = 0x02                 # 내용: zlib 으로 압축한 UTF-8 메시지
+FRAME_PING = 0x03                   # 살아 있니? (받으면 같은 내용으로 PONG 을 돌려줌)
+FRAME_PONG = 0x04                   # 살아 있어!
+COMPRESS_MIN = 256                  # 이보다 긴 메시지만 압축 (짧으면 오히려 손해)
+
+
+# 바이너리 프레임 규칙을 어긴 손님 (연결을 끊음)
+class ProtocolError(Exception):
+    pass
+
+
+# 토큰 통: 1초에 rate 개씩 채워지고 burst 개까지 모임. 보낼 때마다 1개씩 씀
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp", "dropped", "noticed")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.stamp = time.monotonic()
+        self.dropped = 0        # 제한에 걸려 버린 메시지 수
+        self.noticed = False    # 이번에 막히고 나서 이미 알려 줬는지 (알림까지 도배되지 않게)
+
+    def take(self, now=None) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.noticed = False
+            return True
+        self.dropped += 1
+        return False
+
+    def wait_time(self):
+        """토큰 1개가 다시 찰 때까지 남은 초"""
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate > 0 else 0.0
+
+# 채팅방(방) 설정
+DEFAULT_ROOM = "로비"   # 처음 들어오면 여기에 있음. 사람이 없어도 사라지지 않는 방
+MAX_ROOM_NAME = 30      # 방 이름 최대 글자 수
+
+
+# 채팅방 1개: 이 방에 있는 사람 목록(members)과 이 방 전용 잠금장치를 가짐
+# - 메시지는 방 사람에게만 보내므로 전체 인원이 아니라 '방 인원'만큼만 일함
+# - 방마다 잠금장치가 따로라서 바쁜 방이 다른 방을 기다리게 하지 않음
+class Room:
+    __slots__ = ("name", "members", "lock")
+
+    def __init__(self, name):
+        self.name = name
+        self.members = set()          # 이 방에 있는 소켓들
+        self.lock = threading.Lock()
+
+
+rooms = {DEFAULT_ROOM: Room(DEFAULT_ROOM)}  # 방 이름 -> Room
+rooms_lock = threading.Lock()  # 방을 만들거나 지울 때, 누가 어느 방에 있는지 바꿀 때만 씀
+
+# 대화 기록 설정 (--history, --history-dir 로 바꿀 수 있음)
+HISTORY_SIZE = 20   # 방마다 기억할 최근 메시지 수 (0이면 끔). 새로 들어온 사람에게 보여줌
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_history")
+history = None      # MessageHistory (서버가 시작될 때 만듦)
+
+# 보내기 줄(큐) 설정 - 한 사람이 못 받고 있어도 다른 사람은 기다리지 않게 함
+# (실행할 때 --high-water, --hard-limit, --slow-grace 로 바꿀 수 있음)
+OUTQ_HIGH_WATER = 256 * 1024   # 이만큼(바이트) 넘게 밀리면 '느린 손님' 후보
+OUTQ_HARD_LIMIT = 1024 * 1024  # 이만큼 넘게 밀리면 바로 내보냄
+SLOW_GRACE = 5.0               # 후보 상태가 이 시간(초) 넘게 이어지면 내보냄
+
+# 살아 있는지 확인(하트비트)과 오래 조용한 손님 정리 (--heartbeat, --pong-timeout, --idle-timeout)
+# - 끊긴 줄도 모르는 연결(half-open)이 명부에 남아 방송할 때마다 헛일을 하지 않게 함
+# - 바이너리 손님: 조용하면 PING 을 보내고, PONG_TIMEOUT 안에 아무것도 안 오면 내보냄
+# - 옛날 줄 단위 손님: PING 을 못 알아들으니 운영체제의 TCP keepalive 와 IDLE_TIMEOUT 으로 확인
+HEARTBEAT_INTERVAL = 30.0  # 이 초 동안 조용한 바이너리 손님에게 PING (0이면 끔)
+PONG_TIMEOUT = 10.0        # PING 뒤 이 초 안에 답이 없으면 끊긴 것으로 봄
+IDLE_TIMEOUT = 0.0         # 이 초 동안 아무것도 안 보낸 손님은 내보냄 (0이면 끔)
+TIMER_TICK = 1.0           # 타이머 바퀴가 한 칸 움직이는 간격(초)
+wheel = None               # TimerWheel (서버가 시작될 때 만듦)
+
+# 도배 막기 (--chat-rate, --chat-burst, --whisper-rate, --whisper-burst)
+# - 한 사람이 수천 줄을 붙여 넣으면 줄마다 방 전체에 보내느라 서버가 바빠짐
+# - 손님마다 '토큰 통'을 두고, 토큰이 있을 때만 보내 줌 (없으면 버리고 본인에게만 알림)
+# - 방 채팅과 귓속말은 통을 따로 씀 (귓속말 도배가 방 채팅까지 막지 않게)
+CHAT_RATE = 5.0       # 방 채팅: 1초에 채워지는 토큰 수 (0이면 제한 없음)
+CHAT_BURST = 20       # 방 채팅: 한꺼번에 보낼 수 있는 최대 개수
+WHISPER_RATE = 2.0    # 귓속말: 1초에 채워지는 토큰 수 (0이면 제한 없음)
+WHISPER_BURST = 10    # 귓속말: 한꺼번에 보낼 수 있는 최대 개수
+
+# 이벤트 루프 모드에서만 쓰는 것들
+BACKLOG = 1024          # 한꺼번에 몰려온 손님을 잠깐 줄 세워 둘 수 있는 자리 수
+RECV_SIZE = 65536       # 한 번에 읽어 올 최대 바이트 수
+MAX_LINE = 64 * 1024    # 줄바꿈 없이 이보다 길게 보내면 비정상 손님으로 보고 연결을 끊음
+SEND_BATCH = 64         # 한 번에 모아서 보내는 조각 수
+selector = None         # 이벤트 루프 모드일 때 전화선들을 살피는 교환원
+
+# 멀티 프로세스 모드(--workers N)에서만 쓰는 것들
+# - 일꾼 프로세스 N개가 같은 포트를 나눠 듣고(SO_REUSEPORT),
+#   '허브' 프로세스가 방송/귓속말/닉네임 명부를 일꾼들 사이에 전달해요.
+bus_link = None         # 일꾼 → 허브 연결 (Conn). None 이면 혼자 일하는 서버
+bus_seq = 0             # 허브에 보낸 질문마다 붙이는 번호
+pending_claims = {}     # 번호 -> Conn (허브에 닉네임을 물어보고 답을 기다리는 손님)
+pending_whispers = {}   # 번호 -> (보낸 사람 소켓, 보낸 사람 이름, 받는 사람 이름, 메시지)
+pending_rooms = {}      # 번호 -> 방 목록을 물어본 사람 소켓
+
+BUS_HEADER = struct.Struct(">IB")  # 프레임 머리: 몸통 길이(4바이트) + 종류(1바이트)
+BUS_CLAIM = ord("C")           # 일꾼→허브: 이 닉네임 써도 돼?
+BUS_CLAIM_RESULT = ord("c")    # 허브→일꾼: 된다/안 된다
+BUS_RELEASE = ord("R")         # 일꾼→허브: 이 닉네임 이제 안 씀
+BUS_BCAST = ord("B")           # 방송 (몸통은 이미 UTF-8로 바뀐 메시지 그대로)
+BUS_CHAT = ord("H")            # 기록에 남길 채팅 방송 (허브가 디스크에 적고, 일꾼은 최근 대화에 기억)
+BUS_WHISPER = ord("W")         # 귓속말 전달
+BUS_WHISPER_RESULT = ord("w")  # 허브→보낸 일꾼: 받는 사람이 있었는지
+BUS_ROOM = ord("M")            # 일꾼→허브: 이 방 인원이 늘었다/줄었다
+BUS_ROOMS = ord("L")           # 일꾼→허브: 방 목록 알려줘
+BUS_ROOMS_RESULT = ord("l")    # 허브→일꾼: 방 목록
+
+conns = {}              # 소켓(전화선) -> Conn(보낼 줄, 읽다 만 글자 등 손님 상태)
+
+
+# 손님 1명의 상태를 담아 두는 작은 상자
+# - 보낼 메시지는 바로 보내지 않고 이 사람 전용 줄(outq)에 세워 둬요.
+# - 스레드 모드에서는 이 사람 전용 '배달원' 스레드가, 이벤트 루프 모드에서는
+#   교환원이 상대가 받을 수 있을 때 줄에서 꺼내 보내요.
+class Conn:
+    __slots__ = ("sock", "addr", "name", "inbuf", "outq", "out_bytes",
+                 "over_since", "closing", "wake", "pending", "room",
+                 "binary", "compress", "prefix", "last_seen", "ping_sent",
+                 "chat_bucket", "whisper_bucket")
+
+    def __init__(self, sock, addr, threaded=False):
+        self.sock = sock
+        self.addr = addr
+        self.name = None            # 닉네임 등록 전에는 None
+        self.inbuf = bytearray()    # 아직 줄바꿈이 안 와서 처리 못 한 글자 (이벤트 루프 모드)
+        self.outq = deque()         # 아직 못 보낸 메시지 조각들 (여러 사람이 같은 bytes 를 같이 씀)
+        self.out_bytes = 0          # outq 에 쌓인 총 바이트 수
+        self.over_since = None      # high-water 를 처음 넘은 시각
+        self.closing = False        # 남은 글자만 다 보내고 끊을 예정인지
+        self.pending = None         # 허브에 확인 중인 닉네임 (멀티 프로세스 모드)
+        self.room = None            # 지금 들어가 있는 방 (Room)
+        self.binary = None          # None: 아직 모름, False: 옛날 줄 단위, True: 바이너리 프레임
+        self.compress = False       # 압축 프레임을 보내도 되는지
+        self.prefix = b""           # "닉네임> " 을 미리 UTF-8로 바꿔 둔 것 (채팅을 풀지 않고 붙이기만 함)
+        self.last_seen = time.monotonic()  # 이 손님에게서 마지막으로 뭔가 받은 시각
+        self.ping_sent = 0.0        # 답을 기다리는 PING 을 보낸 시각 (0이면 기다리는 것 없음)
+        self.chat_bucket = TokenBucket(CHAT_RATE, CHAT_BURST)           # 방 채팅 도배 막기
+        self.whisper_bucket = TokenBucket(WHISPER_RATE, WHISPER_BURST)  # 귓속말 도배 막기
+        # 스레드 모드에서 배달원을 깨우는 종 (이벤트 루프 모드는 스레드가 1개라 필요 없음)
+        self.wake = threading.Condition() if threaded else None
+
+
+# 보낼 메시지 1개
+# - 받는 사람의 통신 방식(줄 단위/프레임/압축 프레임)에 맞는 bytes 를
+#   처음 필요할 때 한 번만 만들어 두고, 같은 방식의 사람들은 그걸 같이 씀
+class Message:
+    __slots__ = ("line", "frame", "zframe")
+
+    def __init__(self, line: bytes):
+        self.line = line    # UTF-8 + 줄바꿈 (옛날 손님에게는 이걸 그대로 보냄)
+        self.frame = None
+        self.zframe = None
+
+    def wire(self, conn) -> bytes:
+        if not conn.binary:
+            return self.line
+        if conn.compress and len(self.line) > COMPRESS_MIN:
+            if self.zframe is None:
+                self.zframe = make_frame(FRAME_TEXT_Z, zlib.compress(self.line[:-1]))
+            return self.zframe
+        if self.frame is None:
+            self.frame = make_frame(FRAME_TEXT, self.line[:-1])
+        return self.frame
+
+
+# 프레임 1개를 만드는 함수: [길이][종류][내용]
+def make_frame(kind, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload), kind) + payload
+
 
 # 특정 사람에게 메시지를 보내는 함수
 def send_line(sock, msg: str):
-    try:
-        sock.sendall((msg + "\n").encode(ENC))  # 글자를 UTF-8로 바꿔서 보내기
-    except:
-        pass  # 실패하면 그냥 무시 (나중에 정리될 거니까)
+    send_bytes(sock, (msg + "\n").encode(ENC))  # 글자를 UTF-8로 바꿔서 보내기
+
+
+# 이미 UTF-8로 바뀐 한 줄을 보내는 함수 (보낼 줄에 세우기만 하고 기다리지 않음)
+def send_bytes(sock, data: bytes):
+    conn = conns.get(sock)
+    if conn is not None:
+        queue_bytes(conn, Message(data).wire(conn) if conn.binary else data)
+    # conn 이 없으면 이미 나간 사람이니 그냥 무시 (나중에 정리될 거니까)
+
+
+# 여러 사람이 같이 쓰는 Message 를 보내는 함수
+def send_message(sock, message: Message):
+    conn = conns.get(sock)
+    if conn is not None:
+        queue_bytes(conn, message.wire(conn))
+
 
+# 방 안에 있는 모든 사람에게 메시지를 보내는 함수 (room=None 이면 서버 전체)
+# - remember=True 면 최근 대화 기록에도 남김 (나중에 들어온 사람에게 보여줌)
+def broadcast(msg: str, exclude_sock=None, room=None, remember=False):
+    broadcast_bytes((msg + "\n").encode(ENC), exclude_sock, room, remember)
 
-# 채팅방 안에 있는 모든 사람에게 메시지를 보내는 함수
-def broadcast(msg: str, exclude_sock=None):
-    with lock:  # 다른 사람이 동시에 바꿀 수 있으니까 잠금장치 걸기
-        targets = [s for s in clients.keys() if s is not exclude_sock]  # 보낼 사람 목록
+
+# 이미 UTF-8로 바뀐 한 줄을 방송하는 함수 (채팅 내용은 글자로 풀지 않고 bytes 그대로 전달)
+def broadcast_bytes(data: bytes, exclude_sock=None, room=None, remember=False):
+    fanout(data, exclude_sock, room)  # 한 번만 만든 bytes 를 모두가 나눠 씀
+    if remember and history is not None:
+        history.append(room, data)
+    if bus_link is not None:  # 다른 일꾼 프로세스의 손님들에게도 전달 ([방이름]\0[메시지])
+        bus_send(BUS_CHAT if remember else BUS_BCAST, (room or "").encode(ENC) + b"\0" + data)
+
+
+# 이 프로세스에 붙어 있는 사람들에게 메시지를 나눠 주는 함수
+def fanout(data: bytes, exclude_sock=None, room=None):
+    if room is None:
+        with lock:  # 다른 사람이 동시에 바꿀 수 있으니까 잠금장치 걸기
+            targets = [s for s in clients.keys() if s is not exclude_sock]  # 보낼 사람 목록
+    else:
+        r = rooms.get(room)
+        if r is None:
+            return  # 이 프로세스에는 그 방 사람이 없음
+        with r.lock:  # 이 방 잠금장치만 잠그므로 다른 방은 기다리지 않음
+            targets = [s for s in r.members if s is not exclude_sock]
+    start = time.perf_counter()
+    message = Message(data)
     for s in targets:
-        send_line(s, msg)  # 한 명씩 메시지 보내기
+        send_message(s, message)  # 한 명씩 줄에 세우기 (느린 사람이 있어도 안 기다림)
+    stats.add("broadcasts")
+    stats.observe("fanout", time.perf_counter() - start)
+
+
+# 지금 이 사람이 있는 방 이름을 알려주는 함수
+def room_of(sock):
+    conn = conns.get(sock)
+    room = conn.room if conn is not None else None
+    return room.name if room is not None else None
+
+
+# 방에 들어가는 함수 (방이 없으면 새로 만듦)
+def join_room(sock, room_name):
+    conn = conns.get(sock)
+    if conn is None:
+        return
+    with rooms_lock:
+        if clients.get(sock) is None:
+            return  # 그 사이 나간 사람 (방에 유령이 남지 않게)
+        room = rooms.get(room_name)
+        if room is None:
+            room = rooms[room_name] = Room(room_name)
+        with room.lock:
+            room.members.add(sock)
+        conn.room = room
+    if bus_link is not None:  # 허브가 이 방 사람이 있는 일꾼에게만 방송을 넘기도록 알림
+        bus_send(BUS_ROOM, json.dumps({"room": room_name, "delta": 1}, ensure_ascii=False).encode(ENC))
+
+
+# 지금 있는 방에서 나오는 함수 (비어 버린 방은 지움, 로비는 빼고)
+def leave_room(sock):
+    conn = conns.get(sock)
+    if conn is None:
+        return
+    with rooms_lock:
+        room, conn.room = conn.room, None
+        if room is None:
+            return
+        with room.lock:
+            room.members.discard(sock)
+            empty = not room.members
+        if empty and room.name != DEFAULT_ROOM and rooms.get(room.name) is room:
+            del rooms[room.name]
+    if bus_link is not None:
+        bus_send(BUS_ROOM, json.dumps({"room": room.name, "delta": -1}, ensure_ascii=False).encode(ENC))
+
+
+# 보낼 메시지를 그 사람의 줄에 세우는 함수
+def queue_bytes(conn, data: bytes):
+    if conn.closing:
+        return  # 이미 나가는 중인 손님
+    if conn is not bus_link:
+        stats.add("msgs_out")
+    if conn.wake is None:  # 이벤트 루프 모드 (스레드 1개라 잠금장치 필요 없음)
+        conn.outq.append(data)
+        conn.out_bytes += len(data)
+        if conn.name is not None and too_slow(conn):  # 허브 연결처럼 이름 없는 건 내보내지 않음
+            evict_slow(conn)
+        elif len(conn.outq) == 1:
+            flush(conn)  # 밀린 게 없었으면 바로 보내 보기 (대부분 여기서 끝남)
+        return
+    with conn.wake:  # 스레드 모드: 여러 스레드가 동시에 세울 수 있으니 잠금
+        conn.outq.append(data)
+        conn.out_bytes += len(data)
+        slow = too_slow(conn)
+        if not slow:
+            conn.wake.notify()  # 배달원 깨우기
+    if slow:
+        evict_slow(conn)
+
+
+# 줄이 너무 길게 밀려 있는지 확인하는 함수
+def too_slow(conn) -> bool:
+    if conn.out_bytes <= OUTQ_HIGH_WATER:
+        conn.over_since = None
+        return False
+    now = time.monotonic()
+    if conn.over_since is None:
+        conn.over_since = now
+    return conn.out_bytes > OUTQ_HARD_LIMIT or now - conn.over_since > SLOW_GRACE
+
+
+# 메시지를 계속 못 받는 손님을 내보내는 함수 (다른 사람들의 메모리/지연을 지키기 위해)
+def evict_slow(conn):
+    print(f"느린 손님 내보냄: {conn.name or conn.addr} ({conn.out_bytes} bytes 밀림)")
+    conn.outq.clear()       # 못 보낸 건 버림
+    conn.out_bytes = 0
+    remove_client(conn.sock, announce=True)
+    finish_conn(conn)       # 남은 걸 기다리지 않고 바로 끊음
+
+
+# 스레드 모드에서 한 사람 전용 배달원이 하는 일
+# - 줄에 메시지가 생기면 꺼내서 보내고, 없으면 잠들어 기다림
+# - 이 사람이 느려도 막히는 건 이 배달원뿐이라 다른 사람에게는 영향이 없음
+def writer_loop(conn):
+    while True:
+        with conn.wake:
+            while not conn.outq and not conn.closing:
+                conn.wake.wait()
+            if not conn.outq:  # 나가는 중이고 남은 것도 없음
+                break
+            chunks = list(conn.outq)
+            conn.outq.clear()
+        data = b"".join(chunks)  # 밀린 조각을 한 번에 보내서 시스템 호출 횟수를 줄임
+        try:
+            conn.sock.sendall(data)
+        except OSError:
+            break
+        stats.add("bytes_out", len(data))
+        with conn.wake:
+            conn.out_bytes -= len(data)
+            if conn.out_bytes <= OUTQ_HIGH_WATER:
+                conn.over_since = None
+    finish_conn(conn)
+
+
+# 손님과의 연결을 정리하는 함수 (남은 메시지가 있으면 다 보낸 뒤에 끊음)
+def close_conn(conn):
+    if conn.wake is not None:  # 스레드 모드: 배달원에게 '다 보내면 끊어' 라고 알림
+        with conn.wake:
+            conn.closing = True
+            conn.wake.notify()
+        return
+    conn.closing = True
+    if conn.outq:
+        watch(conn, selectors.EVENT_WRITE)  # 더 읽지 않고, 보내기만 마저 함
+    else:
+        finish_conn(conn)
+
+
+# 정말로 전화선을 끊는 함수 (여러 번 불려도 괜찮음)
+def finish_conn(conn):
+    conn.closing = True
+    conns.pop(conn.sock, None)
+    if wheel is not None:
+        wheel.cancel(conn)
+    if selector is not None:
+        try:
+            selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+    try:
+        # shutdown 을 먼저 해야 다른 스레드에서 읽기/보내기로 기다리던 것도 바로 풀려남
+        conn.sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    try:
+        conn.sock.close()
+    except OSError:
+        pass
+
+
+# 닉네임 한 줄을 받아 등록을 시도하는 함수
+# - 성공하면 이름을, 실패하면(다시 입력 요청을 보낸 뒤) None 을 돌려줌
+# - 스레드 모드와 이벤트 루프 모드가 똑같이 이 함수를 써서 규칙이 달라지지 않게 함
+def try_register_name(sock, line: str):
+    name = line.strip()  # 이름 앞뒤 공백 제거
+    if not name:  # 이름이 비어있으면 다시 입력 요청
+        send_line(sock, "빈 닉네임은 안돼요. 다시 입력:")
+        return None
+    with lock:
+        if name in name_to_sock:  # 이미 같은 이름이 있으면
+            send_line(sock, f"'{name}'는 이미 사용 중입니다. 다른 닉네임을 입력하세요:")
+            return None
+        if bus_link is None:
+            # 사용 가능한 이름이면 등록하기
+            register_name(sock, name)
+            return name  # 이 이름을 최종으로 사용
+    # 멀티 프로세스 모드: 다른 일꾼에 같은 이름이 있을 수 있으니 허브에 물어봄 (답은 나중에 옴)
+    claim_name(sock, name)
+    return None
+
+
+# 닉네임을 명부에 적는 함수 (lock 을 잡은 상태에서 불러야 함)
+def register_name(sock, name):
+    name_to_sock[name] = sock
+    clients[sock] = name
+    conn = conns.get(sock)
+    if conn is not None:
+        conn.name = name
+        conn.prefix = f"{name}> ".encode(ENC)
 
 
 # 새로 들어온 사람에게 이름(닉네임)을 받아서 등록하는 함수
-def ensure_unique_name(sock):
-    send_line(sock, "닉네임을 입력하세요:")  # 안내 메시지 보내기
-    f = sock.makefile("r", encoding=ENC, newline="\n")  # 읽기 편하게 파일처럼 바꿔줌
+# - read_unit: 한 줄(또는 프레임 1개)을 bytes 로 읽어 오는 함수. 없으면 줄 단위로 읽음
+def ensure_unique_name(sock, read_unit=None):
+    send_line(sock, NAME_PROMPT)  # 안내 메시지 보내기
+    if read_unit is None:
+        read_unit = sock.makefile("rb").readline  # 읽기 편하게 파일처럼 바꿔줌
     while True:
-        line = f.readline()  # 한 줄 읽기 (사람이 입력한 것)
+        line = read_unit()  # 한 줄 읽기 (사람이 입력한 것)
         if not line:  # 아무 것도 없으면 (즉, 연결이 끊겼으면)
             return None
-        name = line.strip()  # 이름 앞뒤 공백 제거
-        if not name:  # 이름이 비어있으면 다시 입력 요청
-            send_line(sock, "빈 닉네임은 안돼요. 다시 입력:")
-            continue
-        with lock:
-            if name in name_to_sock:  # 이미 같은 이름이 있으면
-                send_line(sock, f"'{name}'는 이미 사용 중입니다. 다른 닉네임을 입력하세요:")
-            else:
-                # 사용 가능한 이름이면 등록하기
-                name_to_sock[name] = sock
-                clients[sock] = name
-                return name  # 이 이름을 최종으로 사용
+        name = try_register_name(sock, line.decode(ENC, errors="replace"))
+        if name:
+            return name
+
+
+# 손님이 보낸 인사(MAGIC + 기능)를 보고 바이너리 프레임 모드를 켜는 함수
+def negotiate(conn, hello: bytes):
+    if hello[:len(MAGIC)] != MAGIC:
+        conn.binary = False
+        return
+    conn.binary = True
+    conn.compress = bool(hello[len(MAGIC)] & FLAG_ZLIB)
+    # 확인 신호는 프레임이 아니라 그대로 보냄 (손님은 이걸 보고 프레임 읽기로 바꿈)
+    queue_bytes(conn, MAGIC + bytes([FLAG_ZLIB if conn.compress else 0]))
+    arm_timer(conn)  # 이제 PING 을 알아듣는 손님이니 하트비트 시작
+
+
+# 받은 프레임 1개의 내용을 꺼내는 함수 (채팅이 아닌 프레임이면 None)
+def decode_frame(conn, kind, payload: bytes):
+    if kind == FRAME_TEXT:
+        return payload
+    if kind == FRAME_PING:  # 손님이 서버가 살아 있는지 물어봄
+        queue_bytes(conn, make_frame(FRAME_PONG, payload))
+        return None
+    if kind == FRAME_TEXT_Z:
+        d = zlib.decompressobj()
+        out = d.decompress(payload, MAX_LINE)  # 압축 폭탄 방지: 최대 크기까지만 풂
+        if d.unconsumed_tail:
+            raise ProtocolError("압축을 푼 메시지가 너무 깁니다")
+        return out
+    return None  # 모르는 종류는 건너뜀 (나중에 생길 기능을 위해)
+
+
+# 스레드 모드에서 한 줄(또는 프레임 1개)씩 bytes 로 읽어 오는 함수를 만들어 주는 함수
+def blocking_reader(conn, f):
+    def read_unit():
+        while True:
+            if conn.binary is None:  # 처음 1바이트로 옛날 손님인지 새 손님인지 구분
+                first = f.peek(1)[:1]
+                if not first:
+                    return b""
+                if first == MAGIC[:1]:
+                    hello = f.read(HELLO_SIZE)
+                    if len(hello) < HELLO_SIZE:
+                        return b""
+                    negotiate(conn, hello)
+                else:
+                    conn.binary = False
+            if not conn.binary:
+                line = f.readline()
+                conn.last_seen = time.monotonic()
+                stats.add("bytes_in", len(line))
+                return line
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return b""
+            length, kind = FRAME_HEADER.unpack(header)
+            if length > MAX_LINE:
+                raise ProtocolError("프레임이 너무 깁니다")
+            payload = f.read(length)
+            if len(payload) < length:
+                return b""
+            conn.last_seen = time.monotonic()
+            stats.add("bytes_in", FRAME_HEADER.size + length)
+            unit = decode_frame(conn, kind, payload)
+            if unit:  # 빈 메시지나 채팅이 아닌 프레임은 건너뛰고 다음 것을 읽음
+                return unit
+    return read_unit
 
 
 # 사람이 나갔을 때 처리하는 함수
@@ -61,8 +552,19 @@ def remove_client(sock, announce=True):
             del clients[sock]  # 사람 목록에서 제거
             if name in name_to_sock:
                 del name_to_sock[name]  # 이름-소켓 연결도 제거
-    if announce and name:  # 퇴장 알림을 켜둔 경우
-        broadcast(f"{name}님이 퇴장하셨습니다.")  # 모두에게 알림
+    if name and bus_link is not None:
+        bus_send(BUS_RELEASE, json.dumps({"name": name}).encode(ENC))  # 허브 명부에서도 지움
+    room = room_of(sock)
+    leave_room(sock)
+    if announce and name and room:  # 퇴장 알림을 켜둔 경우
+        broadcast(f"{name}님이 퇴장하셨습니다.", room=room)  # 같은 방 사람들에게 알림
+    conn = conns.get(sock)
+    if conn is not None:  # 줄에 남은 메시지를 마저 보내고 끊음
+        if conn.chat_bucket.dropped or conn.whisper_bucket.dropped:
+            print(f"도배 제한: {name or conn.addr} 채팅 {conn.chat_bucket.dropped}개, "
+                  f"귓속말 {conn.whisper_bucket.dropped}개를 버림")
+        close_conn(conn)
+        return
     try:
         sock.close()  # 전화기 끊기
     except:
@@ -78,6 +580,9 @@ def handle_whisper(sender_name, text, sock):
     _, target_name, msg = parts
     with lock:
         target_sock = name_to_sock.get(target_name)  # 대상 이름으로 전화선 찾기
+    if not target_sock and bus_link is not None:
+        remote_whisper(sock, sender_name, target_name, msg)  # 다른 일꾼에 있을 수 있음
+        return
     if not target_sock:  # 대상이 없으면 안내
         send_line(sock, f"'{target_name}' 닉네임을 찾을 수 없습니다.")
         return
@@ -88,44 +593,822 @@ def handle_whisper(sender_name, text, sock):
         send_line(sock, f"(귓→{target_name}) {sender_name}> {msg}")
 
 
+# 닉네임 등록이 끝난 사람에게 환영 인사를 하는 함수
+def welcome(sock, name):
+    join_room(sock, DEFAULT_ROOM)  # 처음에는 로비에 들어감
+    broadcast(f"📥 {name}님이 입장하셨습니다.", room=DEFAULT_ROOM)  # 로비 사람들에게 입장 알림
+    send_line(sock, "명령어: /종료  |  귓속말: /w 닉 메시지  |  방: /join 방이름, /leave, /rooms")
+    send_line(sock, "채팅을 시작해 보세요!")
+    replay_history(sock, DEFAULT_ROOM)
+
+
+# 방의 최근 대화를 보여주는 함수
+def replay_history(sock, room):
+    lines = history.recent(room) if history is not None else []
+    if not lines:
+        return
+    send_line(sock, f"--- '{room}' 방 최근 대화 {len(lines)}개 ---")
+    for data in lines:
+        send_bytes(sock, data)  # 기록해 둔 bytes 를 그대로 보냄 (바이너리 손님에게는 프레임으로)
+    send_line(sock, "--- 여기까지 ---")
+
+
+# 다른 방으로 옮기는 함수 (/join 방이름, /leave)
+def handle_join(sock, name, room_name):
+    if not room_name or len(room_name) > MAX_ROOM_NAME or "\0" in room_name:
+        send_line(sock, f"사용법: /join <방이름> (공백 없이 {MAX_ROOM_NAME}자 이내)")
+        return
+    old = room_of(sock)
+    if old == room_name:
+        send_line(sock, f"이미 '{room_name}' 방에 있습니다.")
+        return
+    leave_room(sock)
+    if old:
+        broadcast(f"{name}님이 '{room_name}' 방으로 이동했습니다.", room=old)
+    join_room(sock, room_name)
+    broadcast(f"📥 {name}님이 '{room_name}' 방에 들어왔습니다.", exclude_sock=sock, room=room_name)
+    send_line(sock, f"'{room_name}' 방에 입장했습니다.")
+    replay_history(sock, room_name)
+
+
+# 방 목록을 보여주는 함수 (/rooms)
+def handle_rooms(sock):
+    if bus_link is not None:  # 멀티 프로세스 모드: 전체 인원은 허브가 알고 있음
+        remote_rooms(sock)
+        return
+    with rooms_lock:
+        counts = {r.name: len(r.members) for r in rooms.values()}
+    send_line(sock, format_rooms(counts, room_of(sock)))
+
+
+# 방 목록을 한 줄 글자로 만드는 함수 (예: "방 목록: 로비(3), *게임(2)"  * = 내가 있는 방)
+def format_rooms(counts, mine):
+    counts.setdefault(DEFAULT_ROOM, 0)
+    parts = [f"{'*' if n == mine else ''}{n}({c})"
+             for n, c in sorted(counts.items(), key=lambda kv: (kv[0] != DEFAULT_ROOM, kv[0]))]
+    return "방 목록: " + ", ".join(parts)
+
+
+# 받은 bytes 줄의 앞뒤 공백을 지우는 함수
+# - bytes.strip() 은 ASCII 공백만 지우므로, 한글 입력에서 자주 들어가는 전각 공백(U+3000)도 같이 지움
+FULLWIDTH_SPACE = "\u3000".encode(ENC)
+
+def strip_line(line: bytes) -> bytes:
+    raw = line.strip()
+    while raw.startswith(FULLWIDTH_SPACE) or raw.endswith(FULLWIDTH_SPACE):
+        if raw.startswith(FULLWIDTH_SPACE):
+            raw = raw[len(FULLWIDTH_SPACE):]
+        if raw.endswith(FULLWIDTH_SPACE):
+            raw = raw[:-len(FULLWIDTH_SPACE)]
+        raw = raw.strip()
+    return raw
+
+
+# 채팅 한 줄을 처리하는 함수 (계속 대화하면 True, /종료면 False)
+# - line 은 받은 그대로의 bytes. 명령어일 수 있는 줄('/'로 시작)만 글자로 풀어 보고,
+#   일반 채팅은 "닉네임> " bytes 를 앞에 붙여 그대로 방송함 (풀었다 다시 바꾸는 일 없음)
+def handle_line(sock, name, line: bytes) -> bool:
+    stats.add("msgs_in")
+    raw = strip_line(line)
+    if not raw:  # 빈 줄이면 무시
+        return True
+    conn = conns.get(sock)
+    if raw[:1] != b"/":
+        if not allowed(conn, "chat"):  # 너무 빠르면 방에 보내지 않고 버림
+            return True
+        prefix = conn.prefix if conn is not None else f"{name}> ".encode(ENC)
+        broadcast_bytes(prefix + raw + b"\n", room=room_of(sock), remember=True)
+        return True
+    msg = raw.decode(ENC, errors="replace")
+    if msg == "/종료":  # 종료 명령어면
+        send_line(sock, "연결을 종료합니다. 안녕히 가세요!")
+        return False
+    if msg.startswith("/w ") or msg.startswith("/to ") or msg.startswith("/귓속말 "):
+        if allowed(conn, "whisper"):
+            handle_whisper(name, msg, sock)  # 귓속말 처리
+        return True
+    if msg == "/rooms":
+        handle_rooms(sock)
+        return True
+    # 여기부터는 방 사람들에게 알림이 가는 명령이라 방 채팅과 같은 통을 씀
+    if not allowed(conn, "chat"):
+        return True
+    if msg == "/join" or msg.startswith("/join "):
+        parts = msg.split()
+        handle_join(sock, name, parts[1] if len(parts) == 2 else "")
+        return True
+    if msg == "/leave":
+        if room_of(sock) == DEFAULT_ROOM:
+            send_line(sock, "이미 로비에 있습니다.")
+        else:
+            handle_join(sock, name, DEFAULT_ROOM)
+        return True
+    broadcast(f"{name}> {msg}", room=room_of(sock), remember=True)  # 명령어가 아니면 일반 메시지처럼 보내기
+    return True
+
+
+# 도배 제한을 확인하는 함수 (kind: "chat" 또는 "whisper")
+# - 막히면 보낸 사람에게만 한 번 알려 주고, 다시 보낼 수 있을 때까지는 조용히 버림
+def allowed(conn, kind) -> bool:
+    if conn is None:
+        return True
+    bucket = conn.chat_bucket if kind == "chat" else conn.whisper_bucket
+    if bucket.take():
+        return True
+    stats.add("throttled_" + kind)
+    if not bucket.noticed:
+        bucket.noticed = True
+        what = "메시지를" if kind == "chat" else "귓속말을"
+        send_line(conn.sock, f"{what} 너무 빨리 보내고 있어요. {bucket.wait_time():.1f}초 뒤에 다시 보내 주세요.")
+    return False
+
+
 # 한 사람과 통신하는 메인 함수 (사람 1명당 1개 스레드 실행)
 def handle_client(sock, addr):
-    name = ensure_unique_name(sock)  # 이름 받기
+    f = sock.makefile("rb")  # 입력을 bytes 로 받음 (이름 받을 때와 같은 것을 계속 써야 글자가 안 사라짐)
+    read_unit = blocking_reader(conns[sock], f)
+    try:
+        name = ensure_unique_name(sock, read_unit)  # 이름 받기
+    except (OSError, ValueError, ProtocolError):
+        name = None
     if not name:  # 이름을 못 받으면 그냥 종료
         remove_client(sock, announce=False)
         return
 
-    broadcast(f"📥 {name}님이 입장하셨습니다.")  # 모두에게 입장 알림
-    send_line(sock, "명령어: /종료  |  귓속말: /w 닉 메시지")
-    send_line(sock, "채팅을 시작해 보세요!")
+    welcome(sock, name)
 
-    f = sock.makefile("r", encoding=ENC, newline="\n")  # 입력을 줄 단위로 받음
-    for line in f:  # 계속 줄 단위로 읽음
-        msg = line.strip()
-        if not msg:  # 빈 줄이면 무시
-            continue
-        if msg == "/종료":  # 종료 명령어면
-            send_line(sock, "연결을 종료합니다. 안녕히 가세요!")
-            break
-        if msg.startswith("/w ") or msg.startswith("/to ") or msg.startswith("/귓속말 "):
-            handle_whisper(name, msg, sock)  # 귓속말 처리
-            continue
-        broadcast(f"{name}> {msg}")  # 일반 메시지면 모두에게 보내기
+    try:
+        while True:  # 계속 줄 단위로 읽음
+            line = read_unit()
+            if not line or not handle_line(sock, name, line):
+                break
+    except (OSError, ValueError, ProtocolError):
+        pass  # 느린 손님으로 내보내져서 전화선이 먼저 끊긴 경우, 프레임 규칙을 어긴 경우
 
     remove_client(sock, announce=True)  # 연결 끝나면 정리
 
 
 # 서버 시작 함수
 def accept_loop():
+    global wheel
+    wheel = TimerWheel(TIMER_TICK)
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # 서버 재시작 시 충돌 방지
         s.bind((HOST, PORT))  # 주소와 포트에 전화기 연결
         s.listen()  # "이제 손님 받아요!" 대기 상태
         print(f"서버 시작: {HOST}:{PORT}")
+        threading.Thread(target=reaper_loop, daemon=True).start()  # 타이머 바퀴를 돌리는 스레드
+        start_stats_server()
         while True:
             sock, addr = s.accept()  # 새 손님이 오면 연결 수락
+            enable_keepalive(sock)
+            conn = Conn(sock, addr, threaded=True)
+            conns[sock] = conn
+            arm_timer(conn)
+            # 보내기 전용 배달원 스레드 (느린 사람 때문에 다른 사람이 기다리지 않게)
+            threading.Thread(target=writer_loop, args=(conn,), daemon=True).start()
             t = threading.Thread(target=handle_client, args=(sock, addr), daemon=True)
             t.start()  # 사람마다 따로 스레드를 만들어 처리
 
+
+# -------------------------------------------------------------
+# 이벤트 루프 모드 (--mode event)
+# - 사람마다 스레드를 만들지 않고, 교환원(selector) 한 명이
+#   "지금 글자가 도착한 전화선"만 골라서 차례로 처리해요.
+# - 스레드 스택이 없으니 손님이 1만 명이어도 메모리가 거의 늘지 않아요.
+# -------------------------------------------------------------
+
+# 열 수 있는 전화선 개수 제한을 허용되는 최대치까지 올리는 함수
+def raise_fd_limit():
+    if resource is None:
+        return
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or hard > soft:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass  # 못 올려도 기본 제한 안에서는 잘 동작함
+
+
+# 줄에 쌓인 메시지를 상대가 받을 수 있는 만큼 보내는 함수 (절대 기다리지 않음)
+def flush(conn):
+    sock = conn.sock
+    try:
+        if not conn.outq:
+            sent = 0
+        elif hasattr(sock, "sendmsg"):
+            # 여러 조각을 이어 붙이지 않고 한 번에 보냄 (복사 없음)
+            sent = sock.sendmsg([conn.outq[i] for i in range(min(len(conn.outq), SEND_BATCH))])
+        else:
+            sent = sock.send(conn.outq[0])  # 윈도우에는 sendmsg 가 없음
+    except (BlockingIOError, InterruptedError):
+        sent = 0  # 상대가 아직 바쁨 → 나중에 교환원이 "보낼 수 있음"을 알려줄 때 다시
+    except OSError:
+        conn.outq.clear()
+        conn.out_bytes = 0
+        finish_conn(conn)
+        return
+    conn.out_bytes -= sent
+    if sent and conn is not bus_link:
+        stats.add("bytes_out", sent)
+    while sent:  # 다 보낸 조각은 줄에서 빼고, 반만 보낸 조각은 남은 부분만 남김
+        head = conn.outq[0]
+        if sent >= len(head):
+            conn.outq.popleft()
+            sent -= len(head)
+        else:
+            conn.outq[0] = memoryview(head)[sent:]
+            sent = 0
+    if conn.outq:
+        too_slow(conn)  # 밀린 시간만 기록 (내보내기는 새 메시지가 들어올 때 판단)
+        watch(conn, selectors.EVENT_WRITE | (0 if conn.closing else selectors.EVENT_READ))
+    elif conn.closing:
+        finish_conn(conn)
+    else:
+        conn.over_since = None
+        watch(conn, selectors.EVENT_READ)
+
+
+# 교환원에게 이 전화선에서 무엇(읽기/쓰기)을 지켜볼지 알려주는 함수
+def watch(conn, events):
+    try:
+        key = selector.get_key(conn.sock)
+    except (KeyError, ValueError):
+        return
+    if key.events != events:
+        selector.modify(conn.sock, events, conn)
+
+
+# 새 손님들을 받을 수 있는 만큼 한꺼번에 받는 함수
+def accept_ready(server_sock):
+    while True:
+        try:
+            sock, addr = server_sock.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            return  # 전화선이 모자라는 등 일시적인 문제 → 다음 차례에 다시
+        sock.setblocking(False)
+        enable_keepalive(sock)
+        conn = Conn(sock, addr)
+        conns[sock] = conn
+        selector.register(sock, selectors.EVENT_READ, conn)
+        arm_timer(conn)
+        send_line(sock, NAME_PROMPT)  # ensure_unique_name 과 똑같은 첫 안내
+
+
+# 글자가 도착한 전화선을 처리하는 함수
+def on_readable(conn):
+    sock = conn.sock
+    try:
+        data = sock.recv(RECV_SIZE)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError:
+        data = b""
+    if not data:  # 연결이 끊김 (스레드 모드에서 readline 이 빈 줄을 돌려준 것과 같음)
+        remove_client(sock, announce=conn.name is not None)
+        return
+
+    conn.last_seen = time.monotonic()  # 살아 있음 (타이머는 옮기지 않고, 울렸을 때 이 값을 봄)
+    stats.add("bytes_in", len(data))
+    conn.inbuf += data
+    process_lines(conn)
+
+
+# 받아 둔 바이트에서 완성된 줄(또는 프레임) 1개를 꺼내는 함수 (아직 덜 왔으면 None)
+def next_unit(conn):
+    buf = conn.inbuf
+    while True:
+        if conn.binary is None:  # 처음 1바이트로 옛날 손님인지 새 손님인지 구분
+            if not buf:
+                return None
+            if buf[0] != MAGIC[0]:
+                conn.binary = False
+            elif len(buf) < HELLO_SIZE:
+                return None
+            else:
+                negotiate(conn, bytes(buf[:HELLO_SIZE]))
+                del buf[:HELLO_SIZE]
+        if not conn.binary:
+            nl = buf.find(b"\n")
+            if nl < 0:
+                return None
+            line = bytes(buf[:nl + 1])
+            del buf[:nl + 1]
+            return line
+        if len(buf) < FRAME_HEADER.size:
+            return None
+        length, kind = FRAME_HEADER.unpack_from(buf)
+        if length > MAX_LINE:
+            raise ProtocolError("프레임이 너무 깁니다")
+        end = FRAME_HEADER.size + length
+        if len(buf) < end:
+            return None
+        unit = decode_frame(conn, kind, bytes(buf[FRAME_HEADER.size:end]))
+        del buf[:end]
+        if unit:  # 빈 메시지나 채팅이 아닌 프레임은 건너뜀
+            return unit
+
+
+# 받아 둔 바이트에서 완성된 줄을 하나씩 꺼내 처리하는 함수
+def process_lines(conn):
+    sock = conn.sock
+    while not conn.closing and conn.pending is None:  # 허브 답을 기다리는 동안은 멈춤
+        try:
+            line = next_unit(conn)
+        except ProtocolError:
+            remove_client(sock, announce=conn.name is not None)
+            return
+        if line is None:
+            break
+        if conn.name is None:  # 아직 닉네임을 받는 중
+            name = try_register_name(sock, line.decode(ENC, errors="replace"))
+            if name:
+                welcome(sock, name)
+        elif not handle_line(sock, conn.name, line):  # /종료
+            remove_client(sock, announce=True)
+            return
+    if len(conn.inbuf) > MAX_LINE + FRAME_HEADER.size:  # 줄바꿈 없이 너무 긴 입력은 비정상으로 보고 끊음
+        remove_client(sock, announce=conn.name is not None)
+
+
+# 이벤트 루프 모드 서버 시작 함수
+# - bus_path 가 있으면 멀티 프로세스 모드의 일꾼으로 동작 (같은 포트를 다른 일꾼과 나눠 들음)
+def event_loop(bus_path=None):
+    global selector, wheel
+    raise_fd_limit()
+    wheel = TimerWheel(TIMER_TICK)
+    selector = selectors.DefaultSelector()  # 리눅스는 epoll, 맥은 kqueue 를 자동으로 고름
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # 서버 재시작 시 충돌 방지
+        if bus_path:
+            # 여러 프로세스가 같은 포트를 열면 운영체제가 새 손님을 골고루 나눠 줌
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            connect_bus(bus_path)
+        s.bind((HOST, PORT))
+        s.listen(BACKLOG)
+        s.setblocking(False)
+        selector.register(s, selectors.EVENT_READ, None)  # data=None 이면 '새 손님용 전화선'
+        who = f"일꾼 pid={os.getpid()}" if bus_path else "이벤트 루프 모드"
+        print(f"서버 시작({who}): {HOST}:{PORT}")
+        start_stats_server()
+        while True:
+            for key, mask in selector.select(wheel.timeout()):
+                if key.data is None:
+                    accept_ready(s)
+                    continue
+                conn = key.data
+                if mask & selectors.EVENT_READ and not conn.closing:
+                    if conn is bus_link:
+                        on_bus_readable(conn)
+                    else:
+                        on_readable(conn)
+                if mask & selectors.EVENT_WRITE and conn.sock in conns:
+                    flush(conn)
+            for conn in wheel.advance():
+                on_timer(conn)
+
+
+# -------------------------------------------------------------
+# 하트비트 / 오래 조용한 손님 정리
+# - 손님마다 알람을 하나씩 타이머 바퀴에 걸어 두고, 울렸을 때만 상태를 확인해요.
+# - 글자가 올 때마다 알람을 옮기지 않고 last_seen 만 적어 두므로 받는 쪽 일은 늘지 않아요.
+# -------------------------------------------------------------
+
+# 운영체제가 오래 조용한 연결이 살아 있는지 직접 확인하게 하는 함수 (옛날 손님용)
+def enable_keepalive(sock):
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "TCP_KEEPIDLE"):  # 리눅스: 60초 조용하면 10초 간격으로 3번 확인
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+    except OSError:
+        pass
+
+
+# 이 손님을 다음에 언제 확인할지 정해서 알람을 거는 함수
+def arm_timer(conn, now=None):
+    if wheel is None:
+        return
+    now = time.monotonic() if now is None else now
+    deadlines = []
+    if conn.ping_sent:
+        deadlines.append(conn.ping_sent + PONG_TIMEOUT)
+    elif conn.binary and HEARTBEAT_INTERVAL > 0:
+        deadlines.append(conn.last_seen + HEARTBEAT_INTERVAL)
+    if IDLE_TIMEOUT > 0:
+        deadlines.append(conn.last_seen + IDLE_TIMEOUT)
+    if deadlines:
+        wheel.schedule(conn, min(deadlines) - now)
+
+
+# 알람이 울린 손님을 확인하는 함수
+def on_timer(conn):
+    if conn.closing or conn.sock not in conns:
+        return
+    now = time.monotonic()
+    if conn.ping_sent:
+        if conn.last_seen < conn.ping_sent and now - conn.ping_sent >= PONG_TIMEOUT:
+            reap(conn, f"PING 에 {PONG_TIMEOUT:g}초 동안 답이 없음")
+            return
+        if conn.last_seen >= conn.ping_sent:
+            conn.ping_sent = 0.0  # 답(또는 다른 무엇이든)이 왔으니 살아 있음
+    if IDLE_TIMEOUT > 0 and now - conn.last_seen >= IDLE_TIMEOUT:
+        send_line(conn.sock, f"{IDLE_TIMEOUT:g}초 동안 아무 말이 없어 연결을 종료합니다.")
+        reap(conn, "오래 조용함", wait=True)  # 살아 있는 손님이니 안내는 마저 보내고 끊음
+        return
+    if (conn.binary and HEARTBEAT_INTERVAL > 0 and not conn.ping_sent
+            and now - conn.last_seen >= HEARTBEAT_INTERVAL):
+        conn.ping_sent = now
+        queue_bytes(conn, make_frame(FRAME_PING, b""))
+    arm_timer(conn, now)
+
+
+# 손님을 정리하는 함수 (remove_client 로 명부/방에서 빼고, wait 가 아니면 바로 끊음)
+def reap(conn, reason, wait=False):
+    print(f"연결 정리: {conn.name or conn.addr} ({reason})")
+    remove_client(conn.sock, announce=conn.name is not None)
+    if not wait:
+        finish_conn(conn)  # 죽은 상대에게 남은 걸 보내려고 기다리지 않음
+
+
+# 스레드 모드에서 타이머 바퀴를 돌리는 스레드
+def reaper_loop():
+    while True:
+        time.sleep(wheel.timeout())
+        for conn in wheel.advance():
+            on_timer(conn)
+
+
+# -------------------------------------------------------------
+# 계기판 (--stats-port)
+# - 숫자 세기는 늘 켜져 있고(스레드마다 자기 칸에 더하기만 함), 포트를 열면 들여다볼 수 있어요.
+#   예) curl http://127.0.0.1:9000/stats
+# -------------------------------------------------------------
+
+# 계기판 HTTP 포트를 여는 함수 (STATS_PORT 가 0이면 아무것도 안 함)
+def start_stats_server():
+    if not STATS_PORT:
+        return
+    try:
+        server = StatsServer(stats, gauges, STATS_HOST, STATS_PORT)
+    except OSError as e:
+        print(f"계기판 포트를 열 수 없습니다: {STATS_HOST}:{STATS_PORT} ({e})")
+        return
+    server.start()
+    print(f"계기판: http://{STATS_HOST}:{server.port}/stats")
+
+
+# 지금 이 순간의 값들 (계기판을 볼 때만 계산함)
+def gauges():
+    live = [c for c in list(conns.values()) if c is not bus_link]
+    queued = [c.out_bytes for c in live]
+    throttled = sorted(((c.chat_bucket.dropped + c.whisper_bucket.dropped, c.name or str(c.addr))
+                        for c in live if c.chat_bucket.dropped or c.whisper_bucket.dropped), reverse=True)
+    return {
+        "pid": os.getpid(),
+        "users": len(clients),
+        "connections": len(live),
+        "rooms": len(rooms),
+        "threads": threading.active_count(),
+        "timers": len(wheel) if wheel is not None else 0,
+        "queued_bytes": sum(queued),
+        "max_queued_bytes": max(queued, default=0),
+        "top_throttled": [{"name": name, "dropped": n} for n, name in throttled[:10]],
+    }
+
+
+# -------------------------------------------------------------
+# 멀티 프로세스 모드 (--mode event --workers N)
+# - 파이썬은 한 프로세스에서 CPU 코어 1개만 제대로 쓰므로(GIL),
+#   일꾼 프로세스를 여러 개 띄워 코어를 나눠 써요.
+# - 일꾼끼리는 '허브'를 통해 이야기해요. 허브는 내용을 풀어 보지 않고
+#   받은 방송 묶음을 그대로 다른 일꾼들에게 넘겨 주기만 해요.
+# - 닉네임 명부의 '진짜 원본'은 허브에 있어서 프로세스가 달라도 중복이 안 생겨요.
+# -------------------------------------------------------------
+
+# 프로세스끼리 주고받는 묶음(프레임)을 만드는 함수: [길이 4바이트][종류 1바이트][몸통]
+def bus_frame(op, body: bytes) -> bytes:
+    return BUS_HEADER.pack(len(body), op) + body
+
+
+# 허브에 프레임을 보내는 함수 (보낼 줄에 세우기만 함)
+def bus_send(op, body: bytes):
+    queue_bytes(bus_link, bus_frame(op, body))
+
+
+# 받아 둔 바이트에서 완성된 프레임을 하나씩 꺼내는 함수
+# (종류, 몸통, 프레임 전체) 를 돌려줌 - 허브는 '프레임 전체'를 그대로 다시 보냄
+def read_frames(conn):
+    buf = conn.inbuf
+    while len(buf) >= BUS_HEADER.size:
+        length, op = BUS_HEADER.unpack_from(buf)
+        end = BUS_HEADER.size + length
+        if len(buf) < end:
+            break
+        frame = bytes(buf[:end])
+        del buf[:end]
+        yield op, frame[BUS_HEADER.size:], frame
+
+
+# 허브에 연결하는 함수 (일꾼 프로세스에서 실행)
+def connect_bus(bus_path):
+    global bus_link
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(bus_path)
+    sock.setblocking(False)
+    bus_link = Conn(sock, bus_path)
+    conns[sock] = bus_link
+    selector.register(sock, selectors.EVENT_READ, bus_link)
+
+
+# 허브에 '이 닉네임 써도 돼?' 라고 묻는 함수
+def claim_name(sock, name):
+    global bus_seq
+    conn = conns.get(sock)
+    if conn is None:
+        return
+    bus_seq += 1
+    conn.pending = name
+    pending_claims[bus_seq] = conn
+    bus_send(BUS_CLAIM, json.dumps({"tok": bus_seq, "name": name}).encode(ENC))
+
+
+# 다른 일꾼에 있을지 모르는 사람에게 귓속말을 보내는 함수
+def remote_whisper(sock, sender_name, target_name, msg):
+    global bus_seq
+    bus_seq += 1
+    pending_whispers[bus_seq] = (sock, sender_name, target_name, msg)
+    body = {"tok": bus_seq, "to": target_name, "from": sender_name, "msg": msg}
+    bus_send(BUS_WHISPER, json.dumps(body, ensure_ascii=False).encode(ENC))
+
+
+# 허브에 전체 방 목록을 물어보는 함수
+def remote_rooms(sock):
+    global bus_seq
+    bus_seq += 1
+    pending_rooms[bus_seq] = sock
+    bus_send(BUS_ROOMS, json.dumps({"tok": bus_seq}).encode(ENC))
+
+
+# 허브에서 온 프레임을 처리하는 함수 (일꾼 프로세스에서 실행)
+def on_bus_readable(link):
+    try:
+        data = link.sock.recv(RECV_SIZE)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError:
+        data = b""
+    if not data:  # 허브가 사라지면 일꾼도 더 이상 정확하게 일할 수 없음
+        print("허브 연결이 끊겨 일꾼을 종료합니다.")
+        raise SystemExit(1)
+    link.inbuf += data
+    for op, body, _ in read_frames(link):
+        if op == BUS_BCAST or op == BUS_CHAT:
+            # 다른 일꾼에서 온 방송은 이 프로세스 손님들에게만 나눠 줌
+            room, _, data = body.partition(b"\0")
+            room = room.decode(ENC) if room else None
+            fanout(data, room=room)
+            if op == BUS_CHAT and history is not None:
+                history.append(room, data)  # 일꾼 쪽 기록은 메모리에만 (디스크는 허브가 씀)
+        elif op == BUS_ROOMS_RESULT:
+            info = json.loads(body)
+            sock = pending_rooms.pop(info["tok"], None)
+            if sock is not None:
+                send_line(sock, format_rooms(info["rooms"], room_of(sock)))
+        elif op == BUS_CLAIM_RESULT:
+            on_claim_result(json.loads(body))
+        elif op == BUS_WHISPER:
+            info = json.loads(body)
+            with lock:
+                target_sock = name_to_sock.get(info["to"])
+            if target_sock:
+                send_line(target_sock, f"(귓){info['from']}> {info['msg']}")
+        elif op == BUS_WHISPER_RESULT:
+            info = json.loads(body)
+            item = pending_whispers.pop(info["tok"], None)
+            if item is None:
+                continue
+            sock, sender_name, target_name, msg = item
+            if info["ok"]:
+                send_line(sock, f"(귓→{target_name}) {sender_name}> {msg}")
+            else:
+                send_line(sock, f"'{target_name}' 닉네임을 찾을 수 없습니다.")
+
+
+# 허브가 닉네임 확인 결과를 알려줬을 때 처리하는 함수
+def on_claim_result(info):
+    conn = pending_claims.pop(info["tok"], None)
+    if conn is None:
+        return
+    name, conn.pending = conn.pending, None
+    sock = conn.sock
+    if sock not in conns:  # 답을 기다리는 사이에 나간 손님 → 허브에 이름을 돌려줌
+        if info["ok"]:
+            bus_send(BUS_RELEASE, json.dumps({"name": name}).encode(ENC))
+        return
+    if not info["ok"]:
+        send_line(sock, f"'{name}'는 이미 사용 중입니다. 다른 닉네임을 입력하세요:")
+    else:
+        with lock:
+            register_name(sock, name)
+        welcome(sock, name)
+    process_lines(conn)  # 기다리는 동안 먼저 도착해 있던 줄들 처리
+
+
+# 허브: 일꾼들 사이에서 방송/귓속말/닉네임 명부를 전달하는 프로세스
+def run_hub(hub_sock):
+    global selector
+    selector = selectors.DefaultSelector()
+    hub_sock.setblocking(False)
+    selector.register(hub_sock, selectors.EVENT_READ, None)
+    owners = {}  # 닉네임 -> 그 사람이 붙어 있는 일꾼 연결(Conn)
+    links = []   # 연결된 일꾼들
+    room_links = {}  # 방 이름(bytes) -> {일꾼 연결: 그 일꾼에 있는 방 인원}
+    # 디스크 기록장은 허브 한 곳에서만 씀 (여러 프로세스가 같은 파일에 쓰면 꼬이므로)
+    log = MessageHistory(0, HISTORY_DIR) if HISTORY_SIZE > 0 and HISTORY_DIR else None
+
+    def reply(link, op, obj):
+        queue_bytes(link, bus_frame(op, json.dumps(obj).encode(ENC)))
+
+    while True:
+        for key, mask in selector.select():
+            if key.data is None:  # 새 일꾼이 연결됨
+                sock, _ = hub_sock.accept()
+                sock.setblocking(False)
+                link = Conn(sock, "worker")
+                conns[sock] = link
+                links.append(link)
+                selector.register(sock, selectors.EVENT_READ, link)
+                continue
+            link = key.data
+            if mask & selectors.EVENT_WRITE and link.sock in conns:
+                flush(link)
+            if not mask & selectors.EVENT_READ:
+                continue
+            try:
+                data = link.sock.recv(RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                data = b""
+            if not data:  # 일꾼이 죽으면 그 일꾼 손님들의 닉네임도 풀어 줌
+                for name in [n for n, l in owners.items() if l is link]:
+                    del owners[name]
+                for members in room_links.values():
+                    members.pop(link, None)
+                links.remove(link)
+                finish_conn(link)
+                continue
+            link.inbuf += data
+            for op, body, frame in read_frames(link):
+                if op == BUS_BCAST or op == BUS_CHAT:
+                    # 방 이름만 보고, 그 방 사람이 있는 다른 일꾼들에게 같은 bytes 를 그대로 넘김
+                    room = body[:body.index(b"\0")]
+                    if op == BUS_CHAT:
+                        # 기록할 방송은 지금 그 방에 사람이 없는 일꾼도 최근 대화에 기억해야 함
+                        targets = links
+                        if log is not None:
+                            log.append(room.decode(ENC), body[len(room) + 1:])
+                    else:
+                        targets = room_links.get(room, ()) if room else links
+                    for other in targets:
+                        if other is not link:
+                            queue_bytes(other, frame)
+                elif op == BUS_ROOM:
+                    info = json.loads(body)
+                    room = info["room"].encode(ENC)
+                    members = room_links.setdefault(room, {})
+                    members[link] = members.get(link, 0) + info["delta"]
+                    if members[link] <= 0:
+                        del members[link]
+                        if not members:
+                            del room_links[room]
+                elif op == BUS_ROOMS:
+                    info = json.loads(body)
+                    counts = {r.decode(ENC): sum(m.values()) for r, m in room_links.items()}
+                    reply(link, BUS_ROOMS_RESULT, {"tok": info["tok"], "rooms": counts})
+                elif op == BUS_CLAIM:
+                    info = json.loads(body)
+                    ok = info["name"] not in owners
+                    if ok:
+                        owners[info["name"]] = link
+                    reply(link, BUS_CLAIM_RESULT, {"tok": info["tok"], "ok": ok})
+                elif op == BUS_RELEASE:
+                    name = json.loads(body)["name"]
+                    if owners.get(name) is link:
+                        del owners[name]
+                elif op == BUS_WHISPER:
+                    info = json.loads(body)
+                    owner = owners.get(info["to"])
+                    if owner is not None:
+                        queue_bytes(owner, frame)
+                    reply(link, BUS_WHISPER_RESULT, {"tok": info["tok"], "ok": owner is not None})
+
+
+# 일꾼 프로세스가 시작되면 실행되는 함수
+def worker_main(bus_path, settings):
+    # spawn 방식(윈도우/맥)에서는 __main__ 아래 설정이 다시 실행되지 않으니 직접 넘겨받음
+    global history
+    globals().update(settings)
+    if HISTORY_SIZE > 0:
+        # 일꾼은 시작할 때 디스크에서 최근 대화만 읽어 오고, 쓰기는 허브에 맡김
+        history = MessageHistory(HISTORY_SIZE, HISTORY_DIR or None, writable=False)
+    try:
+        event_loop(bus_path)
+    except KeyboardInterrupt:
+        pass
+
+
+# 멀티 프로세스 모드 시작 함수: 허브를 열고, 일꾼 N개를 띄운 뒤, 이 프로세스는 허브 역할을 함
+def run_workers(n, settings):
+    if not hasattr(socket, "SO_REUSEPORT") or not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("이 운영체제는 SO_REUSEPORT/유닉스 소켓을 지원하지 않아 --workers 를 쓸 수 없습니다.")
+    bus_path = os.path.join(tempfile.gettempdir(), f"chat-bus-{os.getpid()}.sock")
+    hub_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    hub_sock.bind(bus_path)
+    hub_sock.listen(n)
+    workers = []
+    for i in range(n):
+        mine = dict(settings)
+        if mine.get("STATS_PORT"):
+            mine["STATS_PORT"] += i  # 일꾼마다 계기판 포트를 하나씩 따로 씀
+        p = multiprocessing.Process(target=worker_main, args=(bus_path, mine), daemon=True)
+        p.start()
+        workers.append(p)
+    print(f"허브 시작: 일꾼 {n}개, 버스={bus_path}")
+    try:
+        run_hub(hub_sock)
+    except KeyboardInterrupt:
+        print("서버를 종료합니다.")
+    finally:
+        for p in workers:
+            p.terminate()
+        hub_sock.close()
+        try:
+            os.unlink(bus_path)
+        except OSError:
+            pass
+
+
 if __name__ == "__main__":
-    accept_loop()  # 서버 실행 시작
+    parser = argparse.ArgumentParser(description="간단 채팅 서버")
+    parser.add_argument("--mode", choices=("thread", "event"), default="thread",
+                        help="thread: 사람마다 스레드 1개 / event: 스레드 없이 이벤트 루프 1개")
+    parser.add_argument("--port", type=int, default=PORT, help="서버 포트 번호")
+    parser.add_argument("--high-water", type=int, default=OUTQ_HIGH_WATER,
+                        help="이 바이트 수 넘게 밀리면 느린 손님 후보가 됨")
+    parser.add_argument("--hard-limit", type=int, default=OUTQ_HARD_LIMIT,
+                        help="이 바이트 수 넘게 밀리면 바로 내보냄")
+    parser.add_argument("--slow-grace", type=float, default=SLOW_GRACE,
+                        help="후보 상태가 이 초 넘게 이어지면 내보냄")
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT_INTERVAL,
+                        help="이 초 동안 조용한 바이너리 손님에게 PING 을 보냄 (0이면 끔)")
+    parser.add_argument("--pong-timeout", type=float, default=PONG_TIMEOUT,
+                        help="PING 뒤 이 초 안에 답이 없으면 끊긴 것으로 보고 정리")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="이 초 동안 아무것도 보내지 않은 손님은 내보냄 (0이면 끔)")
+    parser.add_argument("--chat-rate", type=float, default=CHAT_RATE,
+                        help="한 사람이 1초에 보낼 수 있는 방 채팅 수 (0이면 제한 없음)")
+    parser.add_argument("--chat-burst", type=int, default=CHAT_BURST,
+                        help="한 사람이 한꺼번에 몰아서 보낼 수 있는 방 채팅 수")
+    parser.add_argument("--whisper-rate", type=float, default=WHISPER_RATE,
+                        help="한 사람이 1초에 보낼 수 있는 귓속말 수 (0이면 제한 없음)")
+    parser.add_argument("--whisper-burst", type=int, default=WHISPER_BURST,
+                        help="한 사람이 한꺼번에 몰아서 보낼 수 있는 귓속말 수")
+    parser.add_argument("--stats-port", type=int, default=STATS_PORT,
+                        help="계기판(JSON)을 볼 HTTP 포트 (0이면 끔, 일꾼이 여럿이면 포트+순번)")
+    parser.add_argument("--stats-host", default=STATS_HOST,
+                        help="계기판 주소 (기본은 이 컴퓨터에서만 볼 수 있는 127.0.0.1)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="event 모드에서 띄울 일꾼 프로세스 수 (2 이상이면 코어를 나눠 씀)")
+    parser.add_argument("--history", type=int, default=HISTORY_SIZE,
+                        help="방마다 기억해서 새로 들어온 사람에게 보여줄 최근 메시지 수 (0이면 끔)")
+    parser.add_argument("--history-dir", default=HISTORY_DIR,
+                        help='대화 기록을 남길 폴더 ("" 이면 디스크에 남기지 않음)')
+    args = parser.parse_args()
+    PORT = args.port
+    HISTORY_SIZE, HISTORY_DIR = args.history, args.history_dir
+    OUTQ_HIGH_WATER, OUTQ_HARD_LIMIT, SLOW_GRACE = args.high_water, args.hard_limit, args.slow_grace
+    HEARTBEAT_INTERVAL, PONG_TIMEOUT, IDLE_TIMEOUT = args.heartbeat, args.pong_timeout, args.idle_timeout
+    CHAT_RATE, CHAT_BURST = args.chat_rate, args.chat_burst
+    WHISPER_RATE, WHISPER_BURST = args.whisper_rate, args.whisper_burst
+    STATS_PORT, STATS_HOST = args.stats_port, args.stats_host
+    if args.workers > 1:
+        if args.mode != "event":
+            parser.error("--workers 는 --mode event 와 함께 써야 합니다.")
+        # 일꾼 프로세스에 넘겨줄 설정 이름들
+        shared = ("PORT", "OUTQ_HIGH_WATER", "OUTQ_HARD_LIMIT", "SLOW_GRACE", "HISTORY_SIZE",
+                  "HISTORY_DIR", "HEARTBEAT_INTERVAL", "PONG_TIMEOUT", "IDLE_TIMEOUT",
+                  "CHAT_RATE", "CHAT_BURST", "WHISPER_RATE", "WHISPER_BURST",
+                  "STATS_PORT", "STATS_HOST")
+        run_workers(args.workers, {k: globals()[k] for k in shared})
+    else:
+        if HISTORY_SIZE > 0:
+            history = MessageHistory(HISTORY_SIZE, HISTORY_DIR or None)
+        if args.mode == "event":
+            event_loop()
+        else:
+            accept_loop()  # 서버 실행 시작
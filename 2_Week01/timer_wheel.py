@@ -0,0 +1,68 @@
+"""
+timer_wheel.py
+- 손님이 수만 명이어도 '시간 다 된 손님'만 빨리 찾아내는 해시 타이머 바퀴(hashed timer wheel)
+    * 시계처럼 칸(slot)이 빙 둘러 있고, 바늘이 tick 초마다 한 칸씩 움직여요.
+    * 알람은 '몇 칸 뒤'에 해당하는 칸에 넣어 두고, 바늘이 그 칸에 오면 꺼내요.
+    * 한 번 움직일 때는 그 칸 하나만 보므로, 전체 손님 수와 상관없이 일이 적어요.
+    * 바퀴 한 바퀴보다 먼 알람은 '몇 바퀴 더 돌아야 하는지(rounds)'를 같이 적어 둬요.
+"""
+
+import math
+import threading
+import time
+
+
+class TimerWheel:
+    def __init__(self, tick=1.0, slots=512):
+        self.tick = tick
+        self.slots = [dict() for _ in range(slots)]  # 칸마다: 알람 주인 -> 남은 바퀴 수
+        self.where = {}     # 알람 주인 -> 들어 있는 칸 번호 (취소를 바로 하기 위해)
+        self.pos = 0        # 바늘 위치
+        self.next_tick = time.monotonic() + tick
+        self.lock = threading.Lock()  # 스레드 모드에서는 여러 스레드가 같이 씀
+
+    def schedule(self, key, delay):
+        """key 의 알람을 delay 초 뒤로 맞춤 (이미 있으면 옮김)"""
+        ticks = max(1, math.ceil(delay / self.tick))
+        n = len(self.slots)
+        with self.lock:
+            self._cancel(key)
+            idx = (self.pos + ticks) % n
+            self.slots[idx][key] = (ticks - 1) // n
+            self.where[key] = idx
+
+    def cancel(self, key):
+        with self.lock:
+            self._cancel(key)
+
+    def _cancel(self, key):
+        idx = self.where.pop(key, None)
+        if idx is not None:
+            self.slots[idx].pop(key, None)
+
+    def timeout(self, now=None):
+        """다음 바늘이 움직일 때까지 남은 초 (select 의 timeout 으로 씀)"""
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.next_tick - now)
+
+    def advance(self, now=None):
+        """now 까지 바늘을 돌리고, 시간이 다 된 알람 주인들을 돌려줌"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self.lock:
+            while now >= self.next_tick:
+                self.pos = (self.pos + 1) % len(self.slots)
+                slot = self.slots[self.pos]
+                if slot:
+                    for key, rounds in list(slot.items()):
+                        if rounds:
+                            slot[key] = rounds - 1  # 아직 더 돌아야 함
+                        else:
+                            del slot[key]
+                            del self.where[key]
+                            expired.append(key)
+                self.next_tick += self.tick
+        return expired
+
+    def __len__(self):
+        return len(self.where)
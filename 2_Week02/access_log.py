@@ -0,0 +1,147 @@
+"""
+access_log.py
+- 접속 기록(access log)을 요청 처리 스레드 대신 뒤에서 모아 쓰는 도구
+    * 요청 스레드는 기록 1개(사전)를 줄(deque)에 넣기만 해요. 잠금장치도, 시간 글자 만들기도, print 도 안 해요.
+    * 쓰는 스레드 1개가 flush_interval 초마다(또는 batch 개가 모이면) 모아서 한 번에 써요.
+    * 파일에는 한 줄에 JSON 하나씩(JSON Lines) 써요. 나중에 프로그램으로 읽기 쉬워요.
+    * 파일이 max_bytes 보다 커지거나 rotate_seconds 초가 지나면 access.log → access.log.1 로 넘기고 새로 써요.
+      (backups 개까지만 남기고 더 오래된 것은 지움)
+    * 줄이 max_queue 개만큼 밀려 있으면(디스크/터미널이 못 따라오면) 기다리지 않고 그 기록은 버려요.
+      버린 개수는 stats() 로 볼 수 있어요.
+    * console=True 면 예전처럼 터미널에도 사람이 읽기 좋은 줄로 보여줘요. (이것도 쓰는 스레드가 함)
+    * 파일도 터미널도 없으면(path=None, console=False) 쓰는 스레드를 띄우지 않고 기록도 만들지 않아요.
+      (부르는 쪽은 enabled 를 보고 기록에 넣을 값을 만드는 일부터 건너뛰면 돼요)
+"""
+
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+
+class AccessLog:
+    def __init__(self, path=None, console=True, max_bytes=10 * 1024 * 1024, rotate_seconds=0,
+                 backups=5, max_queue=10000, batch=256, flush_interval=0.2):
+        self.path = path                    # None 이면 파일에 쓰지 않음
+        self.console = console
+        self.max_bytes = max_bytes          # 0 이면 크기로는 넘기지 않음
+        self.rotate_seconds = rotate_seconds  # 0 이면 시간으로는 넘기지 않음
+        self.backups = backups
+        self.max_queue = max_queue
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.records = deque()  # append/popleft 는 스레드끼리 동시에 해도 안전 (잠금장치 없음)
+        self.wake = threading.Event()
+        self.written = 0
+        self.dropped = 0        # 밀려서 버린 기록 수 (여러 스레드가 더해서 조금 틀릴 수 있음. 대략 보는 용도)
+        self.rotations = 0
+        self.file = None
+        self.opened_at = 0.0
+        self.stopped = False
+        self.enabled = bool(path) or console  # 기록을 보낼 곳이 있는지
+        self.thread = None
+        if self.enabled:
+            self.thread = threading.Thread(target=self._write_loop, daemon=True)
+            self.thread.start()
+
+    def log(self, **fields):
+        """기록 1개를 맡김 (기다리지 않음). 시각은 쓰는 스레드가 글자로 바꿈"""
+        if not self.enabled:
+            return
+        if len(self.records) >= self.max_queue:
+            self.dropped += 1
+            return
+        fields["ts"] = time.time()
+        self.records.append(fields)
+        if len(self.records) == self.batch:
+            self.wake.set()  # 많이 모였으면 flush_interval 을 기다리지 않고 바로 씀
+
+    def stats(self):
+        return {"queued": len(self.records), "written": self.written,
+                "dropped": self.dropped, "rotations": self.rotations}
+
+    def close(self):
+        """남은 기록을 다 쓰고 파일을 닫음 (서버를 끝낼 때)"""
+        self.stopped = True
+        if self.thread is None:
+            return
+        self.wake.set()
+        self.thread.join(timeout=2)
+
+    def _write_loop(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            while self.records:
+                batch = []
+                while self.records and len(batch) < self.batch:
+                    batch.append(self.records.popleft())
+                try:
+                    self._write(batch)
+                except Exception:
+                    self.dropped += len(batch)  # 디스크가 꽉 찼을 때 등. 서버는 계속 돌아야 함
+            if self.stopped:
+                if self.file is not None:
+                    self.file.close()
+                return
+
+    def _write(self, batch):
+        stamp, second = "", None
+        lines, console = [], []
+        for record in batch:
+            ts = record.pop("ts")
+            if int(ts) != second:  # 시각 글자는 1초에 한 번만 만듦
+                second = int(ts)
+                moment = datetime.datetime.fromtimestamp(second)
+                stamp = moment.strftime("%Y-%m-%d %H:%M:%S")
+                iso = moment.astimezone().isoformat()
+            if self.path:
+                lines.append(json.dumps({"time": iso, **record}, ensure_ascii=False))
+            if self.console:
+                console.append(self._console_line(stamp, record))
+        if lines:
+            self._file().write("\n".join(lines) + "\n")
+            self.file.flush()
+        if console:
+            sys.stdout.write("\n".join(console) + "\n")
+            sys.stdout.flush()
+        self.written += len(batch)
+
+    @staticmethod
+    def _console_line(stamp, record):
+        # 예전 log_console 과 같은 모양
+        line = f"[{stamp}] 접속: IP={record.get('ip')}  Path={record.get('path')}  → {record.get('status')}"
+        if record.get("location"):
+            line += f"\n[{stamp}] 위치 추정: {record['location']}  (기관/통신사: {record.get('org')})"
+        return line
+
+    # 지금 쓸 파일 (넘길 때가 됐으면 넘기고 새로 엶)
+    def _file(self):
+        if self.file is not None and self._should_rotate():
+            self.file.close()
+            self.file = None
+            self._rotate()
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+            self.opened_at = time.time()
+        return self.file
+
+    def _should_rotate(self):
+        if self.max_bytes and self.file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self.opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        # access.log.4 → .5, ... access.log → .1 (가장 오래된 것은 덮어써서 지워짐)
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
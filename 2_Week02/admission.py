@@ -0,0 +1,55 @@
+"""
+admission.py
+- 손님(IP)마다 초당 요청 수를 제한하는 도구 (토큰 통, token bucket)
+    * IP 마다 통에 토큰이 burst 개까지 있고, 1초에 rate 개씩 다시 차요. 요청 1개에 토큰 1개를 써요.
+      토큰이 없으면 429 Too Many Requests 로 바로 돌려보내요. (위치 찾기도, 페이지 만들기도 안 함)
+    * 기억하는 칸 수가 slots 개로 정해져 있어요. 수백만 개의 IP 가 와도 메모리가 늘지 않아요.
+      - IP 는 해시로 칸을 정해요. 다른 IP 가 그 칸을 쓰고 있을 때,
+        그 IP 가 한동안 조용했으면(통이 다시 가득 찼으면) 칸을 넘겨받고,
+        아직 바쁘면 그 통을 같이 써요. (칸이 모자라도 제한이 풀리지는 않는 쪽으로)
+    * 칸을 여러 묶음으로 나눠 잠가서 스레드끼리 거의 부딪히지 않아요.
+"""
+
+import threading
+import time
+from array import array
+
+STRIPES = 64  # 잠금장치 수 (칸 번호 % STRIPES 번 잠금장치를 씀)
+
+
+class IPLimiter:
+    def __init__(self, rate, burst, slots=65536):
+        self.rate = rate                    # 1초에 다시 차는 토큰 수 (0 이면 제한 없음)
+        self.burst = max(1, burst)          # 통의 크기 (한꺼번에 보낼 수 있는 요청 수)
+        self.slots = slots
+        self.keys = [None] * slots          # 칸마다 지금 쓰는 IP
+        self.tokens = array("d", [float(self.burst)]) * slots
+        self.stamps = array("d", [0.0]) * slots  # 마지막으로 토큰을 계산한 시각
+        self.locks = [threading.Lock() for _ in range(STRIPES)]
+        self.limited = [0] * STRIPES        # 429 로 돌려보낸 요청 수 (잠금장치 묶음별, 볼 때 합침)
+        self.shared = [0] * STRIPES         # 다른 IP 와 통을 같이 쓰게 된 횟수 (칸이 모자란지 보는 용도)
+
+    def allow(self, ip, now=None):
+        """(보내도 되는지, 다시 와도 되는 때까지 남은 초)"""
+        if self.rate <= 0:
+            return True, 0.0
+        now = time.monotonic() if now is None else now
+        slot = hash(ip) % self.slots
+        with self.locks[slot % STRIPES]:
+            tokens = min(self.burst, self.tokens[slot] + (now - self.stamps[slot]) * self.rate)
+            if self.keys[slot] != ip:
+                if self.keys[slot] is None or tokens >= self.burst:
+                    self.keys[slot] = ip  # 비었거나 조용해진 칸은 새 IP 가 넘겨받음 (가득 찬 통으로 시작)
+                else:
+                    self.shared[slot % STRIPES] += 1
+            self.stamps[slot] = now
+            if tokens >= 1:
+                self.tokens[slot] = tokens - 1
+                return True, 0.0
+            self.tokens[slot] = tokens
+            self.limited[slot % STRIPES] += 1  # 잠금장치 안에서 묶음별로 셈 (스레드끼리 더하다 잃어버리지 않게)
+        return False, (1 - tokens) / self.rate
+
+    def stats(self):
+        return {"limited_429": sum(self.limited), "shared_slots": sum(self.shared),
+                "rate": self.rate, "burst": self.burst}
@@ -0,0 +1,213 @@
+"""
+async_server.py
+- asyncio 로 만든 작은 HTTP/1.1 서버 뼈대 (server.py --mode asyncio 에서 사용)
+    * 연결마다 스레드를 만들지 않고, 스레드 1개가 수만 개의 keep-alive 연결을 돌아가며 처리해요.
+    * 여기서는 요청을 읽고 응답을 쓰는 일만 해요. 주소별로 무엇을 답할지는 app 함수가 정해요.
+      (server.py 의 handle_async 가 스레드 방식과 똑같은 내용을 만들어 줌)
+    * 스레드 1개가 모든 요청을 처리하므로, 밀리면 모든 손님이 같이 기다려요.
+      그래서 0.05초마다 "제때 깨어났는지(지연, lag)"를 재고, 지연이 max_delay 초를 넘으면
+      새 요청은 app 까지 보내지 않고 짧은 503 으로 돌려보내요. (pooled_server 의 max_delay 와 같은 뜻)
+"""
+
+import asyncio
+import html
+import socket
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+
+MAX_LINE = 65536        # 요청 줄/머리글 한 줄의 최대 길이
+MAX_HEADERS = 100       # 머리글 최대 개수
+ERROR_CONTENT_TYPE = BaseHTTPRequestHandler.error_content_type
+LAG_INTERVAL = 0.05     # 이 초마다 깨어나서 지연을 잼
+RETRY_AFTER = 1         # 503 을 받은 손님에게 "이 초 뒤에 다시 오세요"
+
+
+class Headers(dict):
+    """머리글 이름의 대소문자를 가리지 않는 사전 (headers.get("Accept-Encoding") 처럼 씀)"""
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+class Request:
+    __slots__ = ("method", "target", "path", "version", "headers", "client_ip")
+
+    def __init__(self, method, target, version, headers, client_ip):
+        self.method = method
+        self.target = target                    # "?" 뒤까지 포함한 원래 주소
+        self.path = target.split("?", 1)[0]
+        self.version = version
+        self.headers = headers
+        self.client_ip = client_ip
+
+
+class Response:
+    """
+    app 이 돌려주는 응답.
+    body 대신 file_path 를 주면 파일을 loop.sendfile 로 보냄 (큰 정적 파일용).
+    """
+    __slots__ = ("status", "headers", "body", "file_path", "file_size", "close")
+
+    def __init__(self, status, headers=(), body=b"", file_path=None, file_size=0, close=False):
+        self.status = status
+        self.headers = list(headers)
+        self.body = body
+        self.file_path = file_path
+        self.file_size = file_size
+        self.close = close
+
+
+def error_response(code, message=None, explain=None):
+    """BaseHTTPRequestHandler.send_error 와 똑같은 오류 페이지 (연결도 똑같이 닫음)"""
+    shortmsg, longmsg = BaseHTTPRequestHandler.responses.get(code, ("???", "???"))
+    body = (BaseHTTPRequestHandler.error_message_format % {
+        "code": code,
+        "message": html.escape(message or shortmsg, quote=False),
+        "explain": html.escape(explain or longmsg, quote=False),
+    }).encode("UTF-8", "replace")
+    return Response(code, [("Content-Type", ERROR_CONTENT_TYPE)], body, close=True)
+
+
+def busy_response():
+    """너무 밀렸을 때 보내는 짧은 503 (pooled_server 의 것과 같은 내용)"""
+    return Response(503, [("Retry-After", str(RETRY_AFTER)), ("Content-Type", "text/plain")],
+                    b"Server busy, retry later.\n", close=True)
+
+
+class _DateCache:
+    """Date 머리글은 1초에 한 번만 만듦"""
+    second = None
+    value = ""
+
+    @classmethod
+    def now(cls):
+        second = int(time.time())
+        if second != cls.second:
+            cls.second, cls.value = second, formatdate(second, usegmt=True)
+        return cls.value
+
+
+class AsyncHTTPServer:
+    def __init__(self, app, host, port, server_version, keepalive=5.0, backlog=1024, max_delay=0.5):
+        self.app = app
+        self.host, self.port = host, port
+        self.server_version = server_version
+        self.keepalive = keepalive
+        self.backlog = backlog
+        self.max_delay = max_delay  # 지연이 이 초를 넘으면 새 요청은 503 (0 이면 안 함)
+        self.connections = 0    # 지금 붙어 있는 연결 수
+        self.lag = 0.0          # 마지막으로 잰 지연(초)
+        self.shed_delay = 0     # 지연 때문에 503 으로 돌려보낸 요청 수
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle_conn, self.host, self.port,
+                                            backlog=self.backlog, limit=MAX_LINE)
+        watcher = asyncio.ensure_future(self._watch_lag())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+    async def _watch_lag(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lag = max(0.0, time.monotonic() - started - LAG_INTERVAL)
+
+    def stats(self):
+        return {"connections": self.connections, "lag_ms": round(self.lag * 1000, 3),
+                "shed_delay_503": self.shed_delay}
+
+    async def _handle_conn(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
+        peer = writer.get_extra_info("peername")
+        client_ip = peer[0] if peer else ""
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader, client_ip), self.keepalive)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break  # 조용히 기다리다 시간이 다 됐거나 상대가 끊음
+                except ValueError:
+                    await self._write(writer, None, error_response(400))
+                    break
+                if request is None:
+                    break
+                if self.max_delay and self.lag > self.max_delay:
+                    self.shed_delay += 1
+                    response = busy_response()
+                elif request.method != "GET":
+                    response = error_response(501, f"Unsupported method ({request.method!r})")
+                else:
+                    response = await self.app(request)
+                keep = self._keep_alive(request) and not response.close
+                await self._write(writer, request, response, keep)
+                if not keep:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _read_request(self, reader, client_ip):
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode("iso-8859-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError("잘못된 요청 줄")
+        method, target, version = parts
+        headers = Headers()
+        for _ in range(MAX_HEADERS + 1):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, sep, value = line.decode("iso-8859-1").partition(":")
+            if not sep:
+                raise ValueError("잘못된 머리글")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise ValueError("머리글이 너무 많음")
+        length = int(headers.get("Content-Length", "0") or 0)
+        if length:
+            await reader.readexactly(length)  # GET 에 몸통이 붙어 오면 읽어서 버림
+        return Request(method, target, version, headers, client_ip)
+
+    @staticmethod
+    def _keep_alive(request):
+        conn = (request.headers.get("Connection") or "").lower()
+        if request.version == "HTTP/1.1":
+            return conn != "close"
+        return conn == "keep-alive"
+
+    async def _write(self, writer, request, response, keep=False):
+        reason = HTTPStatus(response.status).phrase if response.status in HTTPStatus._value2member_map_ else ""
+        lines = [f"HTTP/1.1 {response.status} {reason}",
+                 f"Server: {self.server_version}",
+                 f"Date: {_DateCache.now()}"]
+        lines += [f"{name}: {value}" for name, value in response.headers]
+        if response.status != 304:
+            size = response.file_size if response.file_path else len(response.body)
+            lines.append(f"Content-Length: {size}")
+        if not keep:
+            lines.append("Connection: close")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("iso-8859-1")
+        if response.file_path:
+            writer.write(head)
+            await writer.drain()
+            with open(response.file_path, "rb") as f:
+                # 큰 파일은 운영체제가 파일에서 바로 보내게 함 (안 되면 asyncio 가 알아서 나눠 읽어 보냄)
+                await asyncio.get_running_loop().sendfile(writer.transport, f, 0, response.file_size)
+        else:
+            writer.write(head + response.body)  # 머리글과 몸통을 한 번에
+            await writer.drain()
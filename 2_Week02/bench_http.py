@@ -0,0 +1,334 @@
+"""
+bench_http.py
+- server.py 웹 서버 부하 테스트 / 지연 시간 측정 도구
+- ipapi_stub.py(가짜 ip-api)와 server.py 를 직접 띄우고, 서버의 위치 찾기가 가짜 ip-api 를 보게 해요.
+    * 손님 연결은 127.0.0.2 ~ 127.0.0.(N+1) 주소에서 나가요. (127.0.0.1 은 위치를 "localhost" 로
+      바로 답해서 위치 찾기를 안 거치기 때문. 리눅스는 127.x.x.x 전부 내 컴퓨터 주소로 쓸 수 있음)
+- 가짜 손님(keep-alive 연결) C개가 쉬지 않고 /, /metrics, /whoami, 없는 주소를 정해진 비율로 요청해요.
+  --concurrency 에 여러 값을 주면 차례로 잽니다.
+- 단계마다 초당 요청 수, p50/p99/p999 지연 시간, 오류 비율, 서버 스레드 수/메모리를 재요.
+- 결과는 JSON 으로 저장하므로 --mode 끼리(pool / thread / asyncio) 비교하기 쉬워요.
+- 서버를 직접 띄울 때는 손님(IP)별 요청 수 제한을 꺼요(--ip-rate 0). 켜 두면 429 만 재게 되므로.
+  제한까지 같이 재려면 --ip-limit 을 주세요. 429 는 오류와 따로 limited_429 로 세요.
+
+예)
+    python bench_http.py --spawn "--mode pool" --concurrency 16,64,256 --out pool.json
+    python bench_http.py --spawn "--mode asyncio" --concurrency 16,64,256 --procs 2 --out asyncio.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource  # 열 수 있는 소켓 수 제한 올리기 (리눅스/맥 전용)
+except ImportError:
+    resource = None
+
+ENC = "utf-8"
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER_PY = os.path.join(HERE, "server.py")
+STUB_PY = os.path.join(HERE, "ipapi_stub.py")
+# 요청 종류: 이름 -> 보낼 주소 (404 는 스캐너처럼 매번 다른 주소)
+TARGETS = {"/": "/", "/metrics": "/metrics", "/whoami": "/whoami", "404": "/no-such-page-{n}"}
+DEFAULT_MIX = "/=70,/metrics=5,/whoami=15,404=10"
+
+
+# 지연 시간 목록(초)을 p50/p99/p999/최대값(ms) 요약으로 바꾸는 함수
+def summarize(samples):
+    if not samples:
+        return {"count": 0, "p50": None, "p99": None, "p999": None, "max": None, "mean": None}
+    s = sorted(samples)
+
+    def pct(p):
+        return round(s[min(len(s) - 1, int(len(s) * p))] * 1000, 3)
+
+    return {
+        "count": len(s),
+        "p50": pct(0.50),
+        "p99": pct(0.99),
+        "p999": pct(0.999),
+        "max": round(s[-1] * 1000, 3),
+        "mean": round(sum(s) / len(s) * 1000, 3),
+    }
+
+
+# 서버 프로세스의 메모리(RSS, KB)와 스레드 수를 읽는 함수 (리눅스 /proc 사용)
+def read_proc(pid):
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            info = {}
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    info["rss_kb"] = int(line.split()[1])
+                elif line.startswith("Threads:"):
+                    info["threads"] = int(line.split()[1])
+            return info
+    except OSError:
+        return None
+
+
+# "/=70,/whoami=30" → [("/", 70), ("/whoami", 30)]
+def parse_mix(text):
+    mix = []
+    for part in text.split(","):
+        name, _, weight = part.strip().rpartition("=")
+        if name not in TARGETS:
+            raise SystemExit(f"--mix 에 모르는 요청 종류: {name!r} (가능: {', '.join(TARGETS)})")
+        mix.append((name, float(weight)))
+    return mix
+
+
+# 가짜 손님 1명: keep-alive 연결 하나로 요청 → 응답을 끝까지 읽기 → 다음 요청 (쉬지 않음)
+async def client_loop(idx, cfg, stats, stop_at):
+    names = [name for name, _ in cfg["mix"]]
+    weights = [w for _, w in cfg["mix"]]
+    rng = random.Random(idx)
+    source = (f"127.0.0.{2 + idx % cfg['client_ips']}", 0) if cfg["client_ips"] else None
+    reader = writer = None
+    n = 0
+    while time.perf_counter() < stop_at:
+        name = rng.choices(names, weights)[0]
+        target = TARGETS[name].format(n=n)
+        n += 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(cfg["host"], cfg["port"], local_addr=source), cfg["timeout"])
+                stats["connects"] += 1
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {cfg['host']}\r\nAccept-Encoding: gzip\r\n\r\n"
+                         .encode("ascii"))
+            status, close = await asyncio.wait_for(read_response(reader), cfg["timeout"])
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            if stats["measuring"]:
+                key = type(e).__name__
+                stats["errors"][key] = stats["errors"].get(key, 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)  # 서버가 못 받는 중이면 잠깐 쉬고 다시 연결
+            continue
+        if stats["measuring"]:
+            stats["latency"].setdefault(name, []).append(time.perf_counter() - started)
+            key = str(status)
+            stats["statuses"][key] = stats["statuses"].get(key, 0) + 1
+        if close:  # 서버가 "이번까지만" 이라고 하면 (404, 바쁠 때 등) 새로 연결
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+# 응답 1개를 끝까지 읽는 함수 → (응답 번호, 서버가 연결을 닫는지)
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    length, close = 0, False
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection" and value.strip().lower() == "close":
+            close = True
+    if length and status != 304:
+        await reader.readexactly(length)
+    return status, close
+
+
+# 프로세스 1개가 맡은 손님들을 돌리는 함수 (--procs 로 여러 프로세스에 나눠서 부름)
+def run_clients(first, count, cfg):
+    async def main():
+        stats = {"measuring": False, "latency": {}, "statuses": {}, "errors": {}, "connects": 0}
+        stop_at = time.perf_counter() + cfg["warmup"] + cfg["duration"]
+        tasks = [asyncio.ensure_future(client_loop(first + i, cfg, stats, stop_at)) for i in range(count)]
+        await asyncio.sleep(cfg["warmup"])
+        stats["measuring"] = True
+        started = time.perf_counter()
+        await asyncio.sleep(cfg["duration"])
+        stats["measuring"] = False
+        stats["seconds"] = time.perf_counter() - started
+        await asyncio.gather(*tasks)
+        return stats
+
+    return asyncio.run(main())
+
+
+# 포트가 열릴 때까지 기다리는 함수 (서버/가짜 ip-api 를 띄웠을 때)
+def wait_port(host, port, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{host}:{port}/", timeout=1).close()
+            return True
+        except urllib.error.HTTPError:
+            return True  # 404 라도 답했으면 떠 있음
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def fetch_json(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            return json.loads(resp.read().decode(ENC))
+    except (OSError, ValueError):
+        return None
+
+
+# 손님 수 1단계를 재는 함수
+def run_level(concurrency, args, cfg, pid, pool):
+    procs = max(1, min(args.procs, concurrency))
+    shares = [concurrency // procs + (1 if i < concurrency % procs else 0) for i in range(procs)]
+    firsts = [sum(shares[:i]) for i in range(procs)]
+    futures = [pool.submit(run_clients, first, share, cfg) for first, share in zip(firsts, shares)]
+
+    # 도는 동안 서버 스레드 수/메모리의 최댓값을 잼
+    peak = {}
+    while not all(f.done() for f in futures):
+        info = read_proc(pid)
+        for key, value in (info or {}).items():
+            peak[key] = max(peak.get(key, 0), value)
+        time.sleep(0.2)
+    parts = [f.result() for f in futures]
+
+    latency, statuses, errors = {}, {}, {}
+    for part in parts:
+        for name, samples in part["latency"].items():
+            latency.setdefault(name, []).extend(samples)
+        for key, n in part["statuses"].items():
+            statuses[key] = statuses.get(key, 0) + n
+        for key, n in part["errors"].items():
+            errors[key] = errors.get(key, 0) + n
+    seconds = max(part["seconds"] for part in parts)
+    done = sum(statuses.values())
+    failed = sum(errors.values())
+    # 우리가 일부러 보낸 404 말고, 서버가 못 해낸 응답(5xx)과 연결 오류를 오류로 셈
+    # (429 는 요청 수 제한이 일부러 돌려보낸 것이라 따로 셈)
+    refused = sum(n for key, n in statuses.items() if key.startswith("5"))
+    limited = statuses.get("429", 0)
+    everything = [s for samples in latency.values() for s in samples]
+    return {
+        "concurrency": concurrency,
+        "requests": done,
+        "rps": round(done / seconds, 1) if seconds else None,
+        "latency_ms": summarize(everything),
+        "by_route_ms": {name: summarize(samples) for name, samples in sorted(latency.items())},
+        "statuses": statuses,
+        "errors": errors,
+        "error_rate": round((refused + failed) / (done + failed), 5) if done + failed else None,
+        "limited_429": limited,
+        "limited_rate": round(limited / done, 5) if done else None,
+        "connects": sum(part["connects"] for part in parts),
+        "server_peak": peak or None,
+        "server_after": read_proc(pid),
+    }
+
+
+def run(args):
+    host = "127.0.0.1"
+    stub = server = None
+    cfg = {"host": host, "port": args.port, "mix": parse_mix(args.mix), "timeout": args.timeout,
+           "warmup": args.warmup, "duration": args.duration, "client_ips": args.client_ips}
+    try:
+        if not args.no_spawn:
+            stub = subprocess.Popen([sys.executable, STUB_PY, "--port", str(args.stub_port),
+                                     "--delay", str(args.stub_delay)],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if not wait_port(host, args.stub_port):
+                raise SystemExit("가짜 ip-api 가 시작되지 않았습니다.")
+            env = dict(os.environ, GEO_API=f"http://{host}:{args.stub_port}",
+                       GEOIP_DB=os.path.join(HERE, "no-such-geoip.db"))  # 오프라인 파일 말고 가짜 ip-api 를 보게
+            cmd = [sys.executable, SERVER_PY, "--port", str(args.port), "--quiet"]
+            if not args.ip_limit:
+                cmd += ["--ip-rate", "0"]  # 부하 손님이 429 를 받지 않게 (--spawn 에 직접 주면 그게 이김)
+            cmd += shlex.split(args.spawn or "")
+            server = subprocess.Popen(cmd, env=env, cwd=HERE,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if not wait_port(host, args.port):
+                raise SystemExit("서버가 시작되지 않았습니다: " + " ".join(cmd))
+        pid = server.pid if server is not None else args.server_pid
+        levels = []
+        proc_start = read_proc(pid)
+        with ProcessPoolExecutor(max_workers=args.procs) as pool:
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                level = run_level(concurrency, args, cfg, pid, pool)
+                levels.append(level)
+                lat = level["latency_ms"]
+                print(f"c={concurrency:<5} {level['rps']} req/s  p50={lat['p50']}ms p99={lat['p99']}ms "
+                      f"p999={lat['p999']}ms  errors={level['error_rate']}  429={level['limited_429']}  "
+                      f"threads={(level['server_peak'] or {}).get('threads')}", file=sys.stderr)
+                time.sleep(args.pause)  # 단계 사이에 keep-alive 연결이 정리될 시간
+        return {
+            "label": args.label,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {"port": args.port, "spawn": args.spawn, "mix": args.mix, "procs": args.procs,
+                       "client_ips": args.client_ips, "stub_delay": args.stub_delay, "ip_limit": args.ip_limit,
+                       "duration": args.duration, "warmup": args.warmup, "timeout": args.timeout},
+            "levels": levels,
+            "server": {"pid": pid, "start": proc_start, "end": read_proc(pid),
+                       "metrics": fetch_json(f"http://{host}:{args.port}/metrics")},
+            "geo_api": fetch_json(f"http://{host}:{args.stub_port}/stats") if stub is not None else None,
+        }
+    finally:
+        for p in (server, stub):
+            if p is not None:
+                p.terminate()
+                p.wait(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웹 서버 부하 테스트")
+    parser.add_argument("--port", type=int, default=8099, help="띄울(또는 이미 떠 있는) 서버 포트")
+    parser.add_argument("--spawn", default="", metavar="ARGS",
+                        help='server.py 에 넘길 옵션 (예: "--mode asyncio")')
+    parser.add_argument("--ip-limit", action="store_true",
+                        help="띄운 서버의 손님(IP)별 요청 수 제한을 켜 둠 (기본: --ip-rate 0 으로 끔)")
+    parser.add_argument("--no-spawn", action="store_true",
+                        help="서버를 띄우지 않고 이미 떠 있는 서버를 잼 (--server-pid 로 스레드 수 측정)")
+    parser.add_argument("--server-pid", type=int, default=None, help="이미 떠 있는 서버의 프로세스 번호")
+    parser.add_argument("--stub-port", type=int, default=8098, help="가짜 ip-api 포트")
+    parser.add_argument("--stub-delay", type=float, default=0.02, help="가짜 ip-api 가 답하기 전에 기다리는 시간(초)")
+    parser.add_argument("--concurrency", default="16,64,256", help="동시에 요청하는 손님 수 (쉼표로 여러 단계)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="요청 종류별 비율 (/, /metrics, /whoami, 404)")
+    parser.add_argument("--client-ips", type=int, default=200,
+                        help="손님 연결이 나가는 127.0.0.x 주소 수 (0: 모두 127.0.0.1 → 위치 찾기 안 함)")
+    parser.add_argument("--procs", type=int, default=1, help="손님을 나눠 돌릴 프로세스 수 (부하 쪽이 먼저 막힐 때)")
+    parser.add_argument("--duration", type=float, default=10.0, help="단계마다 측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="측정 전에 보내기만 하는 시간(초)")
+    parser.add_argument("--pause", type=float, default=1.0, help="단계 사이에 쉬는 시간(초)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="응답 1개를 기다리는 최대 시간(초)")
+    parser.add_argument("--label", default="", help="결과에 붙일 이름 (버전 비교용)")
+    parser.add_argument("--out", default=None, help="결과 JSON 을 저장할 파일 (없으면 화면에 출력)")
+    args = parser.parse_args()
+
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+    result = run(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding=ENC) as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+geo_cache.py
+- IP 위치 찾기 결과를 잠깐 기억해 두는 저장소 (LRU + TTL)
+    * 최근에 쓴 것부터 max_size 개까지만 기억해요. 넘치면 가장 오래 안 쓴 것부터 지워요. (LRU)
+    * 기억한 결과는 ttl 초 동안만 믿어요. 실패한 결과도 negative_ttl 초 동안 기억해서
+      안 되는 주소를 계속 다시 물어보지 않아요. (negative caching)
+    * 오래된 결과는 일단 돌려주고, 뒤에서 조용히 새로 찾아 둬요. (백그라운드 새로 고침)
+- 여러 스레드가 동시에 써도 안전해요.
+- GeoBatcher: 동시에 들어온 위치 찾기를 모아서 한 번에 물어봐요.
+    * 같은 IP 를 여러 스레드가 동시에 찾으면 한 번만 물어보고 답을 나눠 가져요. (single-flight)
+    * 다른 IP 들은 몇 ms 동안 모았다가 한 번의 묶음 요청으로 물어봐요. (micro-batching)
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class GeoCache:
+    def __init__(self, lookup, max_size=10000, ttl=3600.0, negative_ttl=60.0,
+                 workers=2, backlog=1000):
+        self.lookup = lookup            # 실제로 위치를 찾는 함수 (ip -> {"ip", "location", "org"})
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = OrderedDict()    # ip -> (결과, 믿을 수 있는 마지막 시각)
+        self.lock = threading.Lock()
+        self.refreshing = set()         # 뒤에서 찾는 중인 ip (같은 ip 를 여러 번 맡기지 않게)
+        self.jobs = queue.Queue(maxsize=backlog)  # 새로 고침 할 일 (꽉 차면 이번엔 건너뜀)
+        for _ in range(workers):
+            threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def get(self, ip):
+        """결과가 필요할 때: 믿을 만한 게 없으면 지금 바로 찾고 기다림 (/whoami 용)"""
+        result, fresh = self.find(ip)
+        if fresh:
+            return result
+        result = self.lookup(ip)
+        self.put(ip, result)
+        return result
+
+    def peek(self, ip):
+        """기다리지 않을 때: 기억한 게 있으면(오래됐어도) 돌려주고, 없거나 오래됐으면 뒤에서 찾게 맡김"""
+        result, fresh = self.find(ip)
+        if not fresh:
+            self.refresh(ip)
+        return result
+
+    def put(self, ip, result):
+        ttl = self.ttl if result.get("location") else self.negative_ttl
+        with self.lock:
+            self.entries[ip] = (result, time.monotonic() + ttl)
+            self.entries.move_to_end(ip)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)  # 가장 오래 안 쓴 것부터 지움
+
+    def refresh(self, ip):
+        with self.lock:
+            if ip in self.refreshing:
+                return
+            self.refreshing.add(ip)
+        try:
+            self.jobs.put_nowait(ip)
+        except queue.Full:
+            with self.lock:
+                self.refreshing.discard(ip)  # 너무 밀려 있으면 이번엔 포기 (다음 요청 때 다시)
+
+    def find(self, ip):
+        """(기억한 결과 또는 None, 아직 믿을 만한지) — 기다리지도, 새로 고침을 맡기지도 않음"""
+        with self.lock:
+            entry = self.entries.get(ip)
+            if entry is None:
+                return None, False
+            self.entries.move_to_end(ip)  # 방금 썼으니 '최근에 쓴 것'으로
+        result, expires = entry
+        return result, time.monotonic() < expires
+
+    def _refresh_loop(self):
+        while True:
+            ip = self.jobs.get()
+            try:
+                self.put(ip, self.lookup(ip))
+            except Exception:
+                pass
+            finally:
+                with self.lock:
+                    self.refreshing.discard(ip)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class GeoBatcher:
+    def __init__(self, fetch, window=0.005, max_batch=100, timeout=5.0, max_running=4):
+        self.fetch = fetch          # 여러 IP 를 한 번에 찾는 함수 (ip 목록 -> {ip: 결과})
+        self.window = window        # 첫 요청이 온 뒤 이 초 동안 더 모음
+        self.max_batch = max_batch  # 한 묶음의 최대 IP 수 (ip-api 묶음 요청은 100개까지)
+        self.timeout = timeout
+        self.max_running = max_running
+        self.running = threading.BoundedSemaphore(max_running)  # 동시에 나가 있는 묶음 요청 수 제한
+        self.inflight = {}          # ip -> Future (찾는 중인 것. 같은 ip 는 여기서 기다림)
+        self.pending = []           # 아직 묶음으로 보내지 않은 ip
+        self.cond = threading.Condition()
+        self.batches = 0            # 지금까지 보낸 묶음 요청 수
+        self.coalesced = 0          # 이미 찾는 중이라 새로 묻지 않고 기다린 수
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+    def lookup(self, ip):
+        future = self.submit(ip)
+        try:
+            return future.result(self.timeout)
+        except Exception:
+            return {"ip": ip, "location": None, "org": None}
+
+    def submit(self, ip):
+        """찾기를 맡기고 Future 를 바로 돌려줌 (기다리지 않음. asyncio 에서는 asyncio.wrap_future 로 기다림)"""
+        with self.cond:
+            future = self.inflight.get(ip)
+            if future is None:
+                future = self.inflight[ip] = Future()
+                self.pending.append(ip)
+                self.cond.notify()
+            else:
+                self.coalesced += 1
+        return future
+
+    def _batch_loop(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+            time.sleep(self.window)  # 잠깐 더 모음
+            # 묶음 요청이 이미 많이 나가 있으면 하나 끝날 때까지 기다림 (그동안 온 것은 다음 묶음에 모임)
+            self.running.acquire()
+            with self.cond:
+                batch = self.pending[:self.max_batch]
+                del self.pending[:self.max_batch]
+                futures = [self.inflight[ip] for ip in batch]
+                self.batches += 1
+            # 묶음 요청은 이 스레드를 잡아 두지 않게 따로 보냄 (그동안 다음 묶음을 모음)
+            threading.Thread(target=self._run, args=(batch, futures), daemon=True).start()
+
+    def _run(self, batch, futures):
+        try:
+            results = self.fetch(batch)
+        except Exception:
+            results = {}
+        finally:
+            self.running.release()
+        with self.cond:
+            for ip in batch:
+                self.inflight.pop(ip, None)  # 이제부터 오는 요청은 새로 물어봄
+        for ip, future in zip(batch, futures):
+            future.set_result(results.get(ip) or {"ip": ip, "location": None, "org": None})
@@ -0,0 +1,270 @@
+"""
+geoip_db.py
+- 인터넷에 묻지 않고 내 컴퓨터의 'IP 범위 → 위치' 표로 위치를 찾는 도구
+    * CSV 를 한 번만 읽어서, 시작 IP 순서로 정렬된 작은 바이너리 파일로 만들어요. (import)
+    * 서버는 그 파일을 mmap 으로 열고 bisect(이진 탐색)로 찾아요. 네트워크 없이 몇 µs 면 끝나요.
+    * IPv4 와 IPv6 를 따로 된 표에 담아요. (IPv4 는 4바이트, IPv6 는 16바이트 키)
+    * 큰 범위 안에 작은 범위가 있으면 만들 때 겹치지 않게 나눠요. (작은 범위가 이김, 일부만 겹치면 오류)
+    * 파일이 새로 바뀌면 뒤에서 새로 열고, 준비가 끝나면 한 번에 갈아 끼워요. (요청은 기다리지 않음)
+
+CSV 한 줄 (머리줄 있어도 됨, # 으로 시작하면 주석):
+    시작IP,끝IP,나라,지역,도시,기관
+    또는  CIDR(예: 1.2.3.0/24),나라,지역,도시,기관
+
+예)
+    python geoip_db.py import ranges.csv geoip.db
+    python geoip_db.py lookup geoip.db 8.8.8.8 2001:4860::8888
+"""
+
+import argparse
+import bisect
+import csv
+import ipaddress
+import mmap
+import os
+import struct
+import threading
+import time
+
+MAGIC = b"GEOIPDB1"
+HEADER = struct.Struct(">8sIIQ")    # 표시, IPv4 범위 수, IPv6 범위 수, 글자 모음 시작 위치
+V4_RECORD = struct.Struct(">4s4sII")    # 시작 IP, 끝 IP, 위치 글자 위치, 기관 글자 위치
+V6_RECORD = struct.Struct(">16s16sII")
+STRING_LEN = struct.Struct(">H")
+NO_STRING = 0xFFFFFFFF               # 글자가 없음 (None)
+ENCODING = "utf-8"
+
+
+# ---------------------------------------------------------------------
+# CSV → 바이너리 파일 만들기 (한 번만)
+# ---------------------------------------------------------------------
+
+def read_ranges(csv_path):
+    """CSV 에서 (시작 IP, 끝 IP, 위치 글자, 기관) 을 하나씩 꺼냄"""
+    with open(csv_path, newline="", encoding=ENCODING) as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                if "/" in row[0]:
+                    net = ipaddress.ip_network(row[0].strip(), strict=False)
+                    start, end, rest = net[0], net[-1], row[1:]
+                else:
+                    start = ipaddress.ip_address(row[0].strip())
+                    end = ipaddress.ip_address(row[1].strip())
+                    rest = row[2:]
+            except ValueError:
+                continue  # 머리줄이나 잘못된 줄은 건너뜀
+            if start.version != end.version or int(start) > int(end):
+                continue
+            rest = [p.strip() for p in rest] + [""] * 4
+            country, region, city, org = rest[:4]
+            # 서버가 ip-api 결과로 만드는 것과 같은 모양의 한 줄
+            location = " ".join(p for p in (country, region, city) if p) or None
+            yield start, end, location, org or None
+
+
+def flatten(rows, size):
+    """
+    (시작, 끝, 위치, 기관) 범위들을 겹치지 않는 범위들로 바꿈 (시작 IP 순서)
+    - 찾을 때는 '시작 IP 가 key 보다 작거나 같은 마지막 범위' 하나만 보므로, 범위가 겹치면 안 됨
+    - 큰 범위 안에 작은 범위가 들어 있으면 작은 범위가 이김 (큰 범위는 그 앞뒤 조각으로 나눔)
+    - 일부만 겹치거나, 같은 범위인데 위치가 다르면 어느 쪽이 맞는지 알 수 없으니 ValueError
+    """
+    def ip_text(n):
+        return str(ipaddress.ip_address(n.to_bytes(size, "big")))
+
+    rows = [(int.from_bytes(s, "big"), int.from_bytes(e, "big"), loc, org) for s, e, loc, org in rows]
+    rows.sort(key=lambda r: (r[0], -r[1]))  # 시작이 같으면 큰 범위 먼저 (위치가 None 이어도 비교하지 않음)
+    out = []
+    stack = []    # 지금 열려 있는 범위들 (바깥 → 안쪽)
+    cursor = 0    # 아직 내보내지 않은 첫 IP
+
+    def emit(row, last):
+        nonlocal cursor
+        if cursor <= last:
+            out.append((cursor.to_bytes(size, "big"), last.to_bytes(size, "big"), row[2], row[3]))
+        cursor = last + 1
+
+    for row in rows:
+        start, end = row[0], row[1]
+        while stack and stack[-1][1] < start:  # 이미 끝난 범위의 남은 뒷부분
+            done = stack.pop()
+            emit(done, done[1])
+        if stack:
+            top = stack[-1]
+            if (start, end) == (top[0], top[1]):
+                if (row[2], row[3]) != (top[2], top[3]):
+                    raise ValueError(f"같은 범위에 다른 위치가 있습니다: {ip_text(start)}-{ip_text(end)} "
+                                     f"({top[2]!r} / {row[2]!r})")
+                continue  # 똑같은 줄이 두 번 → 하나만
+            if end > top[1]:
+                raise ValueError(f"범위가 일부만 겹칩니다: {ip_text(top[0])}-{ip_text(top[1])} 와 "
+                                 f"{ip_text(start)}-{ip_text(end)}")
+            emit(top, start - 1)  # 바깥 범위의 앞부분
+        cursor = start
+        stack.append(row)
+    while stack:
+        done = stack.pop()
+        emit(done, done[1])
+    return out
+
+
+def build(csv_path, db_path):
+    """CSV 를 읽어 정렬된 바이너리 파일을 만듦 (다 쓴 뒤에 이름을 바꿔서, 읽는 쪽이 반쯤 쓴 파일을 보지 않게)"""
+    v4, v6 = [], []
+    for start, end, location, org in read_ranges(csv_path):
+        (v4 if start.version == 4 else v6).append((start.packed, end.packed, location, org))
+    v4 = flatten(v4, 4)
+    v6 = flatten(v6, 16)
+
+    strings = bytearray()
+    offsets = {}  # 같은 글자는 한 번만 저장
+
+    def string_offset(text):
+        if text is None:
+            return NO_STRING
+        if text not in offsets:
+            data = text.encode(ENCODING)[:0xFFFF]
+            offsets[text] = len(strings)
+            strings.extend(STRING_LEN.pack(len(data)) + data)
+        return offsets[text]
+
+    body = bytearray()
+    for record, rows in ((V4_RECORD, v4), (V6_RECORD, v6)):
+        for start, end, location, org in rows:
+            body += record.pack(start, end, string_offset(location), string_offset(org))
+    strings_at = HEADER.size + len(body)
+
+    tmp_path = db_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(v4), len(v6), strings_at))
+        f.write(body)
+        f.write(strings)
+    os.replace(tmp_path, db_path)
+    return len(v4), len(v6)
+
+
+# ---------------------------------------------------------------------
+# 바이너리 파일에서 찾기
+# ---------------------------------------------------------------------
+
+class _Starts:
+    """bisect 가 쓸 수 있게 표의 '시작 IP' 만 순서대로 보여주는 목록 (복사하지 않고 mmap 에서 바로 읽음)"""
+
+    def __init__(self, mm, base, count, record, key_size):
+        self.mm, self.base, self.count = mm, base, count
+        self.size, self.key_size = record.size, key_size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        at = self.base + i * self.size
+        return self.mm[at:at + self.key_size]
+
+
+class GeoIPDatabase:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, v4_count, v6_count, self.strings_at = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"GeoIP 파일이 아닙니다: {path}")
+        v6_base = HEADER.size + v4_count * V4_RECORD.size
+        self.v4 = _Starts(self.mm, HEADER.size, v4_count, V4_RECORD, 4)
+        self.v6 = _Starts(self.mm, v6_base, v6_count, V6_RECORD, 16)
+
+    def lookup(self, ip: str):
+        """ip 가 들어 있는 범위를 찾아 {"ip", "location", "org"} 로 돌려줌 (없으면 location 이 None)"""
+        try:
+            addr = ipaddress.ip_address(ip.split("%", 1)[0])
+        except ValueError:
+            return {"ip": ip, "location": None, "org": None}
+        if addr.version == 6 and addr.ipv4_mapped is not None:
+            addr = addr.ipv4_mapped  # ::ffff:1.2.3.4 는 IPv4 표에서 찾음
+        table, record = (self.v4, V4_RECORD) if addr.version == 4 else (self.v6, V6_RECORD)
+        key = addr.packed
+        i = bisect.bisect_right(table, key) - 1  # 시작 IP 가 key 보다 작거나 같은 마지막 범위
+        if i >= 0:
+            _, end, loc_at, org_at = record.unpack_from(self.mm, table.base + i * record.size)
+            if key <= end:
+                return {"ip": ip, "location": self._string(loc_at), "org": self._string(org_at)}
+        return {"ip": ip, "location": None, "org": None}
+
+    def _string(self, offset):
+        if offset == NO_STRING:
+            return None
+        at = self.strings_at + offset
+        (length,) = STRING_LEN.unpack_from(self.mm, at)
+        return self.mm[at + STRING_LEN.size:at + STRING_LEN.size + length].decode(ENCODING, errors="replace")
+
+    def __len__(self):
+        return len(self.v4) + len(self.v6)
+
+
+class ReloadingDatabase:
+    """
+    파일이 바뀌었는지 interval 초마다 살펴보고, 바뀌었으면 뒤에서 새로 열어 갈아 끼움.
+    - 요청을 처리하는 쪽은 잠금장치 없이 지금 있는 것(self.db)을 그대로 씀
+    - 예전 파일은 그걸 쓰던 요청이 모두 끝나면 저절로 닫힘 (mmap 이 참조가 없어지면 닫힘)
+    """
+
+    def __init__(self, path, interval=30.0, log=print):
+        self.path = path
+        self.interval = interval
+        self.log = log
+        self.db = None
+        self.stamp = None  # (파일 번호, 크기, 수정 시각) — 바뀌었는지 비교용
+        self._reload()
+        threading.Thread(target=self._watch_loop, daemon=True).start()
+
+    def lookup(self, ip):
+        db = self.db  # 한 번만 읽어 두면 중간에 갈아 끼워져도 이 요청은 같은 파일을 씀
+        return db.lookup(ip) if db is not None else None
+
+    def _reload(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if stamp == self.stamp:
+            return
+        try:
+            db = GeoIPDatabase(self.path)
+        except (OSError, ValueError, struct.error) as e:
+            self.log(f"GeoIP 파일을 열 수 없습니다: {self.path} ({e})")
+            return
+        self.db, self.stamp = db, stamp
+        self.log(f"GeoIP 파일 불러옴: {self.path} (범위 {len(db)}개)")
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(self.interval)
+            self._reload()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 GeoIP 파일 만들기 / 찾아보기")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="CSV 를 바이너리 파일로 만들기")
+    p_import.add_argument("csv_path")
+    p_import.add_argument("db_path")
+    p_lookup = sub.add_parser("lookup", help="바이너리 파일에서 IP 찾아보기")
+    p_lookup.add_argument("db_path")
+    p_lookup.add_argument("ips", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        started = time.perf_counter()
+        try:
+            n4, n6 = build(args.csv_path, args.db_path)
+        except ValueError as e:
+            raise SystemExit(f"GeoIP 파일을 만들 수 없습니다: {e}")
+        print(f"완료: IPv4 {n4}개, IPv6 {n6}개 → {args.db_path} "
+              f"({os.path.getsize(args.db_path)} bytes, {time.perf_counter() - started:.2f}초)")
+    else:
+        db = GeoIPDatabase(args.db_path)
+        for ip in args.ips:
+            print(db.lookup(ip))
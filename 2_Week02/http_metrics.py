@@ -0,0 +1,173 @@
+"""
+http_metrics.py
+- 웹 서버가 받은 요청 수, 응답 번호(200/404...), 걸린 시간을 세는 도구
+    * 숫자는 스레드마다 자기 칸(shard)에만 더해요. 잠금장치 없이도 개수가 사라지지 않아요.
+    * 모르는 주소(스캐너가 아무렇게나 두드리는 주소)는 "other" 한 칸에 모아서 메모리가 늘지 않아요.
+    * /metrics 로 보여줄 내용은 interval 초에 한 번만 새로 만들어요. (자주 불러도 부담이 적음)
+    * JSON(예전 모양 그대로 + 더 자세한 것)과 Prometheus 글자 형식 둘 다 만들 수 있어요.
+"""
+
+import json
+import threading
+import time
+import weakref
+
+# 걸린 시간 칸의 경계(초). Prometheus 의 le("이하") 칸과 같은 뜻
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+OTHER = "other"  # 모르는 주소를 모아 두는 칸 이름
+
+
+class RouteStats:
+    """주소 1개의 숫자들 (한 스레드 안에서만 더함)"""
+    __slots__ = ("count", "statuses", "buckets", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.statuses = {}                              # 응답 번호 -> 개수
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # 마지막 칸은 +Inf
+        self.seconds = 0.0                              # 걸린 시간 합계
+
+    def merge(self, other):
+        self.count += other.count
+        for status, n in list(other.statuses.items()):
+            self.statuses[status] = self.statuses.get(status, 0) + n
+        for i, n in enumerate(other.buckets):
+            self.buckets[i] += n
+        self.seconds += other.seconds
+
+
+class _Token:
+    """스레드가 끝났는지 알아내기 위한 표 (weakref 를 걸 수 있어야 해서 클래스로 만듦)"""
+    __slots__ = ("__weakref__",)
+
+
+class Metrics:
+    def __init__(self, routes, interval=1.0):
+        self.routes = tuple(routes) + (OTHER,)
+        self.interval = interval
+        self.local = threading.local()
+        self.shards = {}        # 살아 있는 스레드들의 칸 (번호 -> {주소: RouteStats})
+        self.retired = self._new_shard()  # 끝난 스레드들의 칸을 합쳐 둔 곳
+        self.extra = {}         # 다른 곳에서 세는 숫자 (이름 -> 숫자를 돌려주는 함수)
+        self.lock = threading.Lock()      # 칸 목록을 바꿀 때만 씀 (숫자를 더할 때는 안 씀)
+        self.snapshot_lock = threading.Lock()
+        self.cached_at = 0.0
+        self.cached = None      # (JSON bytes, Prometheus bytes)
+
+    def _new_shard(self):
+        return {route: RouteStats() for route in self.routes}
+
+    def _shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            pass
+        shard = self.local.shard = self._new_shard()
+        token = self.local.token = _Token()
+        with self.lock:
+            self.shards[id(token)] = shard
+        # 스레드가 끝나면(연결마다 스레드가 생기고 사라짐) 그 칸을 retired 에 합쳐서 칸이 쌓이지 않게 함
+        weakref.finalize(token, self._retire, id(token))
+        return shard
+
+    def _retire(self, key):
+        with self.lock:
+            shard = self.shards.pop(key, None)
+            if shard is not None:
+                for route, stats in shard.items():
+                    self.retired[route].merge(stats)
+
+    def route_of(self, path):
+        return path if path in self.routes else OTHER
+
+    def observe(self, path, status, seconds):
+        """요청 1개를 기록"""
+        stats = self._shard()[self.route_of(path)]
+        stats.count += 1
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        i = 0
+        while i < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[i]:
+            i += 1
+        stats.buckets[i] += 1
+        stats.seconds += seconds
+
+    def _totals(self):
+        total = self._new_shard()
+        with self.lock:
+            for shard in [self.retired] + list(self.shards.values()):
+                for route, stats in shard.items():
+                    total[route].merge(stats)
+        return total
+
+    def snapshot(self):
+        """(JSON bytes, Prometheus bytes) — interval 초 안에 다시 부르면 만들어 둔 것을 그대로 줌"""
+        cached = self.cached
+        if cached is not None and time.monotonic() - self.cached_at < self.interval:
+            return cached
+        with self.snapshot_lock:  # 여러 스레드가 동시에 새로 만들지 않게 (기다린 쪽은 방금 만든 걸 씀)
+            if self.cached is not None and time.monotonic() - self.cached_at < self.interval:
+                return self.cached
+            total = self._totals()
+            extra = {name: fn() for name, fn in self.extra.items()}
+            body = json.dumps(self._as_json(total, extra), ensure_ascii=False, indent=2).encode("utf-8")
+            self.cached = (body, self._as_prometheus(total, extra).encode("utf-8"))
+            self.cached_at = time.monotonic()
+            return self.cached
+
+    def _as_json(self, total, extra):
+        by_status = {}
+        for stats in total.values():
+            for status, n in stats.statuses.items():
+                by_status[str(status)] = by_status.get(str(status), 0) + n
+        return {
+            "total": sum(s.count for s in total.values()),                     # 예전과 같은 모양
+            "by_path": {route: s.count for route, s in total.items() if s.count},  # 예전과 같은 모양
+            "by_status": by_status,
+            "latency_ms": {route: summarize(s) for route, s in total.items() if s.count},
+            **extra,
+        }
+
+    def _as_prometheus(self, total, extra):
+        lines = ["# HELP http_requests_total Requests by route and status code.",
+                 "# TYPE http_requests_total counter"]
+        for route, s in total.items():
+            for status, n in sorted(s.statuses.items()):
+                lines.append(f'http_requests_total{{route="{route}",code="{status}"}} {n}')
+        lines += ["# HELP http_request_duration_seconds Request latency by route.",
+                  "# TYPE http_request_duration_seconds histogram"]
+        for route, s in total.items():
+            seen = 0
+            for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), s.buckets):
+                seen += n
+                lines.append(f'http_request_duration_seconds_bucket{{route="{route}",le="{bound}"}} {seen}')
+            lines.append(f'http_request_duration_seconds_sum{{route="{route}"}} {s.seconds:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{route="{route}"}} {s.count}')
+        for name, value in extra.items():
+            lines += flatten_prometheus(name, value)
+        return "\n".join(lines) + "\n"
+
+
+# 칸별 개수로 백분위를 어림하는 함수 (그 칸의 윗 경계로 답함)
+def summarize(stats):
+    out = {"count": stats.count, "mean": round(stats.seconds * 1000 / stats.count, 3) if stats.count else 0}
+    for label, q in (("p50", 0.5), ("p99", 0.99)):
+        rank, seen = stats.count * q, 0
+        for bound, n in zip(LATENCY_BUCKETS + (None,), stats.buckets):
+            seen += n
+            if n and seen >= rank:
+                out[label] = bound * 1000 if bound is not None else None  # None = 5초 넘음
+                break
+    return out
+
+
+# 다른 곳에서 센 숫자(사전이면 한 단계 안쪽까지)를 Prometheus 줄로 바꾸는 함수
+def flatten_prometheus(name, value):
+    if isinstance(value, dict):
+        lines = []
+        for key, v in value.items():
+            if isinstance(v, (int, float)):
+                lines.append(f"{name}_{key} {v}")
+        return lines
+    if isinstance(value, (int, float)):
+        return [f"{name} {value}"]
+    return []
@@ -0,0 +1,90 @@
+"""
+ipapi_stub.py
+- ip-api.com 흉내를 내는 작은 시험용 서버 (인터넷 없이 server.py 의 위치 찾기를 시험할 때 사용)
+    * GET  /json/<ip>  → IP 1개의 위치
+    * POST /batch      → IP 목록(JSON 배열)의 위치를 같은 순서로
+    * GET  /stats      → 지금까지 받은 요청 수 (묶음으로 잘 모였는지 확인용)
+- 위치는 IP 로 정해지는 가짜 값이에요. 10.x.x.x 는 ip-api 처럼 실패(fail)로 답해요.
+
+예)
+    python ipapi_stub.py --port 8900 --delay 0.05
+    GEO_API=http://127.0.0.1:8900 python server.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENCODING = "utf-8"
+DELAY = 0.0  # 답하기 전에 일부러 기다리는 시간(초). 느린 외부 API 흉내
+COUNTS = {"single": 0, "batch": 0, "ips": 0}
+COUNTS_LOCK = threading.Lock()
+
+
+# IP 로 정해지는 가짜 위치
+def fake_location(ip: str):
+    if ip.startswith("10."):
+        return {"status": "fail", "message": "private range", "query": ip}
+    n = sum(ip.encode())
+    return {"status": "success", "country": "Stubland", "regionName": f"Region{n % 17}",
+            "city": f"City{n % 101}", "org": f"StubNet{n % 7}", "query": ip}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        return
+
+    def send_json(self, data):
+        body = json.dumps(data).encode(ENCODING)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/stats":
+            with COUNTS_LOCK:
+                self.send_json(dict(COUNTS))
+        elif path.startswith("/json/"):
+            time.sleep(DELAY)
+            with COUNTS_LOCK:
+                COUNTS["single"] += 1
+                COUNTS["ips"] += 1
+            self.send_json(fake_location(path[len("/json/"):]))
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0] != "/batch":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        ips = json.loads(self.rfile.read(length).decode(ENCODING))
+        time.sleep(DELAY)
+        with COUNTS_LOCK:
+            COUNTS["batch"] += 1
+            COUNTS["ips"] += len(ips)
+        # ip-api 는 문자열 또는 {"query": ip} 둘 다 받음
+        self.send_json([fake_location(q["query"] if isinstance(q, dict) else q) for q in ips])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ip-api.com 흉내 시험용 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--delay", type=float, default=DELAY, help="답하기 전에 기다리는 시간(초)")
+    args = parser.parse_args()
+    DELAY = args.delay
+    ThreadingHTTPServer.request_queue_size = 128  # 부하 테스트 때 처음 보는 IP 가 한꺼번에 와도 연결을 놓치지 않게
+    httpd = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"ip-api 시험 서버: http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
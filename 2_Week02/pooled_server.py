@@ -0,0 +1,203 @@
+"""
+pooled_server.py
+- 일꾼 스레드 수가 정해져 있는 HTTP 서버 (ThreadingHTTPServer 대신 사용)
+    * ThreadingHTTPServer 는 연결마다 새 스레드를 만들어서, 손님이 몰리면 스레드가 끝없이 늘어요.
+    * 여기서는 일꾼 workers 명이 '대기 줄'에서 연결을 하나씩 꺼내 처리해요.
+    * 대기 줄도 queue_size 까지만 받아요. 꽉 차면 기다리게 하지 않고 바로 503 + Retry-After 로 돌려보내요.
+    * 줄에서 max_delay 초보다 오래 기다린 연결도 처리하지 않고 503 으로 돌려보내요.
+      (손님은 이미 오래 기다렸고, 늦게 처리해 봐야 줄만 더 길어지므로 — 줄이 짧아질 때까지 앞에서부터 덜어 냄)
+    * 일꾼은 요청이 도착한 연결만 받아요. 새 연결과 keep-alive 로 다음 요청을 기다리는 연결은
+      '쉬는 연결 감시' 스레드(selectors)가 맡고, 요청이 도착하면 그때 대기 줄에 세워요.
+      keepalive 초 동안 아무것도 안 보낸 연결은 닫아요.
+      (그래서 아무것도 안 보내는 연결이 많아도 일꾼이 모자라지 않아요)
+      handler 는 PooledRequestHandler 를 물려받아야 이렇게 동작해요.
+"""
+
+import queue
+import selectors
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+RETRY_AFTER = 1  # 503 을 받은 손님에게 "이 초 뒤에 다시 오세요"
+
+
+class PooledHTTPServer(HTTPServer):
+    def __init__(self, address, handler, workers=32, queue_size=64, backlog=128, max_delay=0.5,
+                 keepalive=5.0, max_idle=10000):
+        self.request_queue_size = backlog  # 운영체제가 accept 전에 줄 세워 둘 수 있는 연결 수 (listen)
+        # 쉬는 연결 감시 (새 연결 / 다음 요청을 기다리는 연결은 parked 로 받아서 감시 스레드가 등록)
+        self.idle = selectors.DefaultSelector()
+        self.parked = queue.SimpleQueue()
+        self.idle_count = 0
+        self.wake_r, self.wake_w = socket.socketpair()  # 감시 스레드를 select 에서 깨우는 용도
+        self.wake_r.setblocking(False)
+        self.wake_w.setblocking(False)
+        self.idle.register(self.wake_r, selectors.EVENT_READ)
+        super().__init__(address, handler)
+        self.workers = workers
+        self.waiting = queue.Queue(maxsize=queue_size)  # 일꾼을 기다리는 연결들 (+ 줄 선 시각)
+        self.max_delay = max_delay  # 줄에서 이 초보다 오래 기다린 연결은 돌려보냄 (0 이면 안 함)
+        self.keepalive = keepalive  # 쉬는 연결을 이 초 동안 다음 요청이 없으면 닫음
+        self.max_idle = max_idle    # 쉬는 연결을 이만큼까지만 맡아 둠 (넘으면 그냥 닫음)
+        self.busy_workers = 0
+        self.shed = 0           # 줄이 꽉 차서 503 으로 돌려보낸 연결 수
+        self.shed_delay = 0     # 너무 오래 기다려서 503 으로 돌려보낸 연결 수
+        self.count_lock = threading.Lock()
+        threading.Thread(target=self._idle_loop, daemon=True).start()
+        for _ in range(workers):
+            threading.Thread(target=self._worker_loop, daemon=True).start()
+
+    # 새 연결이 오면(accept 한 스레드에서) 감시 스레드에게 넘기기만 함 (요청이 도착하면 대기 줄로)
+    def process_request(self, request, client_address):
+        self.park(request, client_address)
+
+    # 요청이 도착한 연결을 대기 줄에 세움 (꽉 찼으면 503)
+    def enqueue(self, request, client_address):
+        try:
+            self.waiting.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            with self.count_lock:
+                self.shed += 1
+            self._reject(request)
+
+    # 너무 바쁠 때: 요청을 읽지도 않고 짧은 503 을 보내고 끊음 (accept 하는 스레드가 막히지 않게 기다리지 않음)
+    def _reject(self, request):
+        body = b"Server busy, retry later.\n"
+        response = (b"HTTP/1.1 503 Service Unavailable\r\n"
+                    b"Retry-After: " + str(RETRY_AFTER).encode() + b"\r\n"
+                    b"Content-Type: text/plain\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                    b"Connection: close\r\n\r\n" + body)
+        try:
+            request.setblocking(False)
+            request.send(response)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _worker_loop(self):
+        while True:
+            request, client_address, queued_at = self.waiting.get()
+            if self.max_delay and time.monotonic() - queued_at > self.max_delay:
+                with self.count_lock:
+                    self.shed_delay += 1
+                self._reject(request)
+                continue
+            with self.count_lock:
+                self.busy_workers += 1
+            handler = None
+            try:
+                handler = self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if getattr(handler, "parked", False):
+                    self.park(request, client_address)  # 다음 요청을 기다리는 건 감시 스레드에게
+                else:
+                    self.shutdown_request(request)
+                with self.count_lock:
+                    self.busy_workers -= 1
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    # 요청을 기다리는 연결을 감시 스레드에게 넘김 (일꾼/accept 스레드는 바로 다음 일을 하러 감)
+    def park(self, request, client_address):
+        with self.count_lock:
+            full = self.idle_count >= self.max_idle
+            if full:
+                self.shed += 1
+            else:
+                self.idle_count += 1
+        if full:
+            self._reject(request)
+            return
+        self.parked.put((request, client_address))
+        try:
+            self.wake_w.send(b"x")
+        except OSError:
+            pass  # 이미 깨울 신호가 쌓여 있음
+
+    def _idle_loop(self):
+        next_sweep = 0.0
+        while True:
+            events = self.idle.select(timeout=min(1.0, self.keepalive))
+            now = time.monotonic()
+            for key, _ in events:
+                if key.fileobj is self.wake_r:
+                    try:
+                        self.wake_r.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                # 요청이 왔음 (또는 손님이 끊었음) → 대기 줄로
+                self._unpark(key.fileobj)
+                self.enqueue(key.fileobj, key.data[0])
+            while True:
+                try:
+                    request, client_address = self.parked.get_nowait()
+                except queue.Empty:
+                    break
+                self.idle.register(request, selectors.EVENT_READ, (client_address, now + self.keepalive))
+            # keepalive 초 동안 조용했던 연결은 닫음 (0.5초에 한 번만 훑음)
+            if now >= next_sweep:
+                next_sweep = now + 0.5
+                for key in list(self.idle.get_map().values()):
+                    if key.data is not None and key.data[1] <= now:
+                        self._unpark(key.fileobj)
+                        self.shutdown_request(key.fileobj)
+
+    def _unpark(self, request):
+        self.idle.unregister(request)
+        with self.count_lock:
+            self.idle_count -= 1
+
+    def server_close(self):
+        super().server_close()
+        for key in list(self.idle.get_map().values()):
+            key.fileobj.close()
+        self.idle.close()
+        self.wake_w.close()
+
+    def stats(self):
+        return {"workers": self.workers, "busy": self.busy_workers, "idle_keepalive": self.idle_count,
+                "queued": self.waiting.qsize(), "shed_503": self.shed, "shed_delay_503": self.shed_delay}
+
+
+class PooledRequestHandler(BaseHTTPRequestHandler):
+    """
+    PooledHTTPServer 용 handler 뼈대
+    - 응답을 보낸 뒤 이미 도착한 다음 요청이 없으면, 연결을 열어 둔 채(parked) 일꾼을 돌려줌
+      → 다음 요청은 새 handler 가 처리 (self.timeout 은 요청 하나를 읽는 동안만 씀)
+    - 다른 서버(ThreadingHTTPServer 등)에서는 예전처럼 이 연결에서 다음 요청을 기다림
+    """
+    parked = False
+
+    def handle(self):
+        if not isinstance(self.server, PooledHTTPServer):
+            super().handle()
+            return
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self.has_pending_request():
+                self.parked = not self.close_connection
+                return
+            self.handle_one_request()
+
+    # 다음 요청(의 앞부분)이 이미 와 있는지 — 기다리지 않고 확인
+    def has_pending_request(self):
+        try:
+            self.connection.settimeout(0)
+            return bool(self.rfile.peek(1))  # 읽어 둔 것이 있거나, 지금 바로 읽을 수 있으면 True
+        except OSError:
+            self.close_connection = True
+            return False
+        finally:
+            try:
+                self.connection.settimeout(self.timeout)
+            except OSError:
+                pass
+
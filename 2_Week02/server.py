@@ -1,9 +1,21 @@
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # 웹 서버의 뼈대
+from http.server import ThreadingHTTPServer  # 웹 서버의 뼈대
 import datetime             # 현재 시간 찍을 때 사용
 import json                 # /metrics, /whoami에서 JSON(컴퓨터 친화적 형식)으로 응답
 import urllib.request       # 외부(인터넷)로 간단히 요청 보낼 때 사용(표준 라이브러리)
 import urllib.error         # 외부 요청이 실패할 때의 예외(오류) 처리
 import os                   # 파일이 있는지 확인할 때 사용
+import time                 # 요청 하나에 걸린 시간을 잴 때 사용
+import argparse             # 실행할 때 --workers 같은 옵션을 받기 위해 사용
+import asyncio              # --mode asyncio: 스레드 없이 연결 수만 개를 처리할 때 사용
+
+from geo_cache import GeoCache, GeoBatcher  # 위치 찾기 결과를 기억하고, 동시에 온 것은 모아서 물어봄
+from geoip_db import ReloadingDatabase  # 인터넷 없이 내 컴퓨터의 IP 범위 표로 위치 찾기
+from static_cache import StaticCache, accepts_gzip  # index.html 같은 파일을 기억해 두고 빠르게 보냄
+from http_metrics import Metrics   # 요청 수/응답 번호/걸린 시간을 스레드끼리 부딪히지 않게 셈
+from pooled_server import PooledHTTPServer, PooledRequestHandler  # 일꾼 스레드 수가 정해진 서버 (꽉 차면 503)
+from async_server import AsyncHTTPServer, Response, error_response  # asyncio 로 만든 서버 뼈대
+from access_log import AccessLog    # 접속 기록을 뒤에서 모아 씀 (요청 스레드는 print 하지 않음)
+from admission import IPLimiter     # 손님(IP)마다 초당 요청 수 제한 (넘으면 429)
 
 # 서버가 열릴 주소와 포트 번호를 정합니다.
 HOST = "0.0.0.0"            # 0.0.0.0 = "모든 곳에서 들어오는 연결을 받겠다"는 뜻
@@ -12,20 +24,57 @@ PORT = 8080                 # 과제에서 지정한 포트 번호
 # 글자가 깨지지 않도록 UTF-8로 고정합니다.
 ENCODING = "utf-8"
 
-# 이 서버가 받은 요청의 개수를 세기 위한 작은 저장소(사전형)
+# 연결 재사용(keep-alive)과 일꾼 수 (--keepalive, --workers, --queue, --backlog)
+KEEPALIVE_TIMEOUT = 5       # 다음 요청 없이 이 초 동안 조용하면 연결을 닫음
+WORKERS = 32                # 요청을 처리하는 일꾼 스레드 수 (더 늘어나지 않음)
+QUEUE_SIZE = 64             # 일꾼을 기다릴 수 있는 연결 수 (넘치면 503)
+BACKLOG = 128               # 운영체제가 accept 전에 줄 세워 둘 수 있는 연결 수
+MAX_QUEUE_DELAY = 0.5       # 이 초보다 오래 밀린 요청은 처리하지 않고 503 (--max-queue-delay)
+
+# 손님(IP) 1명이 보낼 수 있는 요청 수 (--ip-rate, --ip-burst)
+# - 한 사람이 요청을 퍼부으면 다른 손님이 느려지고, 요청마다 위치 찾기가 외부 API 로 나갑니다.
+# - 넘친 요청은 위치 찾기 없이 짧은 429 로 바로 돌려보냅니다.
+IP_RATE = 100               # 1초에 다시 차는 요청 수 (0 이면 제한 없음)
+IP_BURST = 200              # 한꺼번에 보낼 수 있는 요청 수
+IP_SLOTS = 65536            # IP 를 기억하는 칸 수 (고정. IP 가 아무리 많아도 메모리가 늘지 않음)
+LIMITER = IPLimiter(IP_RATE, IP_BURST, IP_SLOTS)
+TOO_MANY_BODY = b"Too many requests, slow down.\n"
+
+# 이 서버가 받은 요청의 개수를 세기 위한 계기판
 # - total: 전체 요청 수
-# - by_path: 주소(예: "/", "/metrics")별로 몇 번 왔는지 세기
-REQUEST_COUNTER = {
-    "total": 0,
-    "by_path": {}
-}
+# - by_path: 주소(예: "/", "/metrics")별로 몇 번 왔는지 세기 (모르는 주소는 "other" 한 칸에 모음)
+# - by_status, latency_ms: 응답 번호별 개수, 주소별 걸린 시간
+# - 스레드마다 따로 세고 /metrics 를 볼 때 합치므로 요청이 몰려도 개수가 사라지지 않습니다.
+ROUTES = ("/", "/index.html", "/metrics", "/whoami")
+METRICS_INTERVAL = 1.0      # /metrics 내용은 이 초에 한 번만 새로 만듦
+METRICS = Metrics(ROUTES, METRICS_INTERVAL)
+
+# 접속 기록 (--access-log, --log-max-bytes, --log-rotate, --quiet)
+# - 요청마다 터미널에 print 하면 손님이 많을 때 터미널이 느려서 서버도 같이 느려집니다.
+# - 그래서 요청 스레드는 기록을 줄에 넣기만 하고, 쓰는 스레드가 모아서 파일/터미널에 씁니다.
+# - __main__ 에서 옵션대로 새로 만듭니다. (이 파일을 import 만 할 때는 터미널에만 보여줌)
+ACCESS_LOG = AccessLog()
+METRICS.extra["access_log"] = lambda: ACCESS_LOG.stats()
+METRICS.extra["admission"] = lambda: LIMITER.stats()
 
 # 간단한 도우미 함수: 콘솔(터미널)에 보기 좋게 로그(기록) 출력
+# - 서버 시작/종료처럼 가끔 있는 일에만 씁니다. 요청마다 남기는 기록은 ACCESS_LOG 로 보냅니다.
 def log_console(message: str):
     # 현재 시간을 예쁘게 만들어서 앞에 붙입니다.
     now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{now}] {message}")
 
+# 오프라인 GeoIP 파일 (geoip_db.py import 로 만든 것)
+# - 이 파일이 있으면 ip-api.com 에 묻지 않고 이 파일에서 바로 찾습니다. (몇 µs, 네트워크 없음)
+# - 서버가 켜져 있는 동안 파일을 새로 만들어 두면 GEOIP_RELOAD 초 안에 알아서 갈아 끼웁니다.
+GEOIP_DB_PATH = os.environ.get("GEOIP_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "geoip.db"))
+GEOIP_RELOAD = 30
+
+# 위치를 물어볼 외부 API 주소 (시험할 때는 ipapi_stub.py 주소로 바꿔서 씀)
+GEO_API = os.environ.get("GEO_API", "http://ip-api.com").rstrip("/")
+GEO_FIELDS = "status,country,regionName,city,org,query"
+GEO_BATCH_WINDOW = 0.005    # 다른 IP 들을 이 초 동안 모아서 한 번에 물어봄
+
 # 접속자의 IP로 대략적인 위치를 알아보는 함수(선택 기능)
 # - 무료 공개 API(ip-api.com)를 사용합니다.
 # - 외부 요청이므로, 회사/학교 네트워크 설정에 따라 막힐 수도 있습니다.
@@ -35,91 +84,214 @@ def lookup_location_by_ip(ip: str):
     if ip in ("127.0.0.1", "::1"):
         return {"ip": ip, "location": "localhost", "org": None}
 
-    # 외부 API 주소를 만듭니다. (표준 라이브러리 urllib으로 호출)
-    url = f"http://ip-api.com/json/{ip}?fields=status,country,regionName,city,org,query"
+    # 오프라인 GeoIP 파일이 있으면 거기서 찾습니다. (인터넷에 묻지 않음)
+    found = GEOIP.lookup(ip)
+    if found is not None:
+        return found
+
+    # 인터넷으로 물어봅니다. 동시에 온 요청들과 모아서 한 번에 물어봅니다. (GEO_BATCHER)
+    return GEO_BATCHER.lookup(ip)
+
 
+# ip-api 답(사전 1개)을 우리가 쓰는 모양 {"ip", "location", "org"} 으로 바꾸는 함수
+def parse_location(ip: str, data: dict):
+    # status가 success이면 우리가 보고 싶은 정보가 들어 있습니다.
+    if data.get("status") == "success":
+        country = data.get("country", "")
+        region = data.get("regionName", "")
+        city = data.get("city", "")
+        org = data.get("org", None)
+        # 사람이 읽기 편한 한 줄 문장으로 만듭니다.
+        loc_text = " ".join([p for p in [country, region, city] if p])
+        return {"ip": ip, "location": loc_text or None, "org": org}
+    # 실패했을 때는 None 값들을 돌려줍니다.
+    return {"ip": ip, "location": None, "org": None}
+
+
+# 여러 IP 의 위치를 외부 API 에 한 번에 물어보는 함수 (ip 목록 -> {ip: 결과})
+# - 1개면 예전처럼 /json/<ip>, 여러 개면 /batch 로 한 번에 보냅니다. (ip-api 는 한 번에 100개까지)
+def fetch_locations(ips):
     try:
-        # 인터넷으로 요청을 보냅니다.
-        with urllib.request.urlopen(url, timeout=4) as resp:
-            # 받은 내용을 UTF-8로 읽어서 파이썬 사전으로 바꿉니다.
-            data = json.loads(resp.read().decode(ENCODING))
-            # status가 success이면 우리가 보고 싶은 정보가 들어 있습니다.
-            if data.get("status") == "success":
-                country = data.get("country", "")
-                region = data.get("regionName", "")
-                city = data.get("city", "")
-                org = data.get("org", None)
-                # 사람이 읽기 편한 한 줄 문장으로 만듭니다.
-                loc_text = " ".join([p for p in [country, region, city] if p])
-                return {"ip": ip, "location": loc_text or None, "org": org}
+        if len(ips) == 1:
+            # 외부 API 주소를 만듭니다. (표준 라이브러리 urllib으로 호출)
+            url = f"{GEO_API}/json/{ips[0]}?fields={GEO_FIELDS}"
+            with urllib.request.urlopen(url, timeout=4) as resp:
+                # 받은 내용을 UTF-8로 읽어서 파이썬 사전으로 바꿉니다.
+                answers = [json.loads(resp.read().decode(ENCODING))]
+        else:
+            req = urllib.request.Request(f"{GEO_API}/batch?fields={GEO_FIELDS}",
+                                         data=json.dumps(ips).encode(ENCODING),
+                                         headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(req, timeout=4) as resp:
+                answers = json.loads(resp.read().decode(ENCODING))
     except Exception:
         # 인터넷이 안 되거나, API가 답을 안 줄 수도 있으니 조용히 무시합니다.
-        pass
+        return {}
+    # 답은 보낸 순서대로 옵니다.
+    return {ip: parse_location(ip, data) for ip, data in zip(ips, answers) if isinstance(data, dict)}
 
-    # 실패했을 때는 None 값들을 돌려줍니다.
-    return {"ip": ip, "location": None, "org": None}
+# 위치 찾기 결과 기억 장치
+# - 외부 API 는 한 번에 최대 4초까지 걸릴 수 있어서, 요청마다 부르면 페이지가 느려집니다.
+# - /whoami 만 결과를 기다리고, 나머지 주소는 기억해 둔 것만 쓰거나 뒤에서 찾아 두게 맡깁니다.
+GEO_CACHE_SIZE = 10000      # 최대 몇 개의 IP 를 기억할지 (넘치면 오래 안 쓴 것부터 지움)
+GEO_CACHE_TTL = 3600        # 찾은 위치를 믿는 시간(초)
+GEO_NEGATIVE_TTL = 60       # 찾기에 실패한 IP 를 다시 물어보지 않고 기다리는 시간(초)
+GEO_BATCHER = GeoBatcher(fetch_locations, GEO_BATCH_WINDOW)
+# 뒤에서 찾는 일꾼이 여럿이어야 처음 보는 IP 가 몰려올 때 한 묶음으로 모입니다.
+GEO_CACHE = GeoCache(lookup_location_by_ip, GEO_CACHE_SIZE, GEO_CACHE_TTL, GEO_NEGATIVE_TTL, workers=8)
+
+# 오프라인 GeoIP 파일 (없으면 계속 ip-api.com 을 씁니다)
+GEOIP = ReloadingDatabase(GEOIP_DB_PATH, GEOIP_RELOAD, log=log_console)
+
+
+# 접속자 위치를 알려주는 함수
+# - 오프라인 파일이 있으면 빠르니까 언제나 바로 찾습니다. (기억 장치를 거치지 않아야 새 파일이 바로 반영됨)
+# - 없으면 기억 장치를 씁니다. wait=True(/whoami)일 때만 인터넷 답을 기다립니다.
+def locate(ip: str, wait: bool):
+    if GEOIP.db is not None:
+        return lookup_location_by_ip(ip)
+    return GEO_CACHE.get(ip) if wait else GEO_CACHE.peek(ip)
+
+# /metrics 에 위치 찾기 기억 장치 상태도 같이 보여줍니다.
+METRICS.extra["geo"] = lambda: {"cache_entries": len(GEO_CACHE), "batches": GEO_BATCHER.batches,
+                                "coalesced": GEO_BATCHER.coalesced}
+
+# 정적 파일 기억 장치 (요청마다 디스크에서 읽지 않음. 파일이 바뀌면 1초 안에 알아챔)
+STATIC_CACHE = StaticCache()
+
+# index.html이 없을 때 보여줄 간단한 안내 페이지
+FALLBACK_PAGE = "<h1>index.html 파일을 이 폴더에 두세요.</h1>".encode(ENCODING)
+
+
+# ---------------------------------------------------------------------
+# 두 가지 서버(스레드 / asyncio)가 똑같은 내용을 답하도록 같이 쓰는 함수들
+# ---------------------------------------------------------------------
+
+# 정적 파일 응답에 붙일 머리글 (Content-Length 는 보내는 쪽에서 붙임)
+def static_headers(page, gzipped):
+    # 브라우저가 "이건 HTML이고 UTF-8이다"를 알 수 있게 머리글을 붙입니다.
+    headers = [("Content-Type", page.content_type),
+               ("ETag", page.etag_for(gzipped)),
+               ("Last-Modified", page.last_modified)]
+    if page.has_gzip:
+        headers.append(("Vary", "Accept-Encoding"))  # 중간 캐시가 압축본/원본을 섞지 않게
+    if gzipped:
+        headers.append(("Content-Encoding", "gzip"))
+    return headers
+
+
+# /metrics 몸통과 종류 (Prometheus 가 가져갈 때는 ?format=prometheus 또는 Accept: text/plain 으로 글자 형식)
+def metrics_body(target, accept):
+    as_json, as_text = METRICS.snapshot()
+    if "format=prometheus" in target or "text/plain" in accept or "openmetrics" in accept:
+        return as_text, "text/plain; version=0.0.4; charset=utf-8"
+    return as_json, "application/json; charset=utf-8"
+
+
+# /whoami 몸통: 접속자의 IP와 대략적인 위치를 JSON으로
+def whoami_body(who):
+    return json.dumps(who, ensure_ascii=False, indent=2).encode(ENCODING)
+
+
+# 접속 기록 1줄 (요구사항: 접속 시간, 클라이언트 IP, 위치) — 줄에 넣기만 하고 바로 돌아옴
+def log_access(ip, method, target, status, seconds, who):
+    if not ACCESS_LOG.enabled:  # --quiet 이고 --access-log 도 없으면 기록을 만들 필요도 없음
+        return
+    location = who.get("location") if who else None
+    ACCESS_LOG.log(ip=ip, method=method, path=target, status=status,
+                   ms=round(seconds * 1000, 3), location=location,
+                   org=who.get("org") if location else None)
 
 # 실제로 요청을 받아서 처리하는 "직원" 클래스(사람 1명이라고 생각하면 편합니다)
-class SpacePirateHandler(BaseHTTPRequestHandler):
+class SpacePirateHandler(PooledRequestHandler):
     # 서버 버전 문자열(그냥 보이는 이름 정도)
     server_version = "SpacePirateHTTP/0.1"
 
+    # HTTP/1.1: 한 번 연결하면 여러 요청을 이어서 보낼 수 있습니다. (요청마다 새로 연결하지 않음)
+    # - 그래서 모든 응답에 Content-Length 가 있어야 합니다. (어디까지가 이번 응답인지 알 수 있게)
+    protocol_version = "HTTP/1.1"
+    # 다음 요청을 기다리는 최대 시간(초)
+    # - pool 모드에서는 조용한 연결을 일꾼이 붙잡지 않고 서버의 감시 스레드가 기다립니다. (PooledRequestHandler)
+    #   여기서는 요청 하나를 읽는 동안 손님이 멈췄을 때 얼마나 기다릴지로만 씁니다.
+    timeout = KEEPALIVE_TIMEOUT
+    disable_nagle_algorithm = True  # 머리글과 몸통을 나눠 보내도 기다리지 않고 바로 나가게
+
     # 기본 로그(영문, 지저분)를 끄고, 우리가 예쁘게 찍는 log_console만 쓰겠습니다.
     def log_message(self, format, *args):
         return
 
+    # 응답 번호를 보낼 때 기억해 둡니다. (계기판에 200/404 별로 세기 위해)
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+
     # 웹 브라우저가 "GET" 방식으로 요청했을 때 여기로 들어옵니다.
     def do_GET(self):
+        # 이번 요청을 기록(카운트)합니다. 걸린 시간과 응답 번호도 같이 남깁니다.
+        started = time.perf_counter()
+        self.status = 0
+        self.who = None
+        path = self.path.split("?", 1)[0]  # "?" 뒤(검색어 같은 것)는 주소 구분에 쓰지 않음
+        try:
+            allowed, retry_after = LIMITER.allow(self.client_address[0])
+            if allowed:
+                self.route(path)
+            else:
+                self.send_too_many(retry_after)
+        finally:
+            seconds = time.perf_counter() - started
+            METRICS.observe(path, self.status, seconds)
+            log_access(self.client_address[0], self.command, self.path, self.status, seconds, self.who)
+
+    # 너무 자주 온 손님: 위치 찾기도 페이지 만들기도 없이 짧은 429 를 보내고 연결을 닫습니다.
+    # (연결을 닫아야 이 손님이 일꾼 하나를 계속 붙잡지 못합니다.)
+    def send_too_many(self, retry_after):
+        self.send_response(429)
+        self.send_header("Retry-After", str(int(retry_after) + 1))
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(TOO_MANY_BODY)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(TOO_MANY_BODY)
+        self.close_connection = True
+
+    # 주소에 따라 알맞은 응답을 보내는 함수
+    def route(self, path):
         # 1) 접속한 사람의 IP 주소를 가져옵니다.
         client_ip = self.client_address[0]
 
-        # 2) 이번 요청을 기록(카운트)합니다.
-        REQUEST_COUNTER["total"] += 1
-        REQUEST_COUNTER["by_path"][self.path] = REQUEST_COUNTER["by_path"].get(self.path, 0) + 1
-
-        # 3) 터미널에 접속 로그를 남깁니다. (요구사항: 접속 시간, 클라이언트 IP)
-        log_console(f"접속: IP={client_ip}  Path={self.path}")
-
-        # 4) 위치 정보도 한 번 시도해서 콘솔에 같이 보여줍니다. (요구사항: IP 기반 위치 확인)
-        who = lookup_location_by_ip(client_ip)
-        if who.get("location"):
-            log_console(f"위치 추정: {who['location']}  (기관/통신사: {who.get('org')})")
-
-        # 5) 주소에 따라 다르게 응답합니다.
-        if self.path in ("/", "/index.html"):
-            # index.html 파일이 같은 폴더에 있는지 확인합니다.
-            if os.path.exists("index.html"):
-                # 파일을 읽어서 브라우저로 보냅니다.
-                with open("index.html", "rb") as f:
-                    content = f.read()
-                # 200 OK(정상) 상태를 먼저 보냅니다. (요구사항: 200번 메시지)
-                self.send_response(200)
-                # 브라우저가 "이건 HTML이고 UTF-8이다"를 알 수 있게 머리글을 붙입니다.
-                self.send_header("Content-Type", "text/html; charset=utf-8")
-                self.send_header("Content-Length", str(len(content)))
-                self.end_headers()  # 여기까지가 "머리글". 이제 "몸통(내용)"을 보냅니다.
-                self.wfile.write(content)
+        # 2) 위치를 알아봅니다. (요구사항: IP 기반 위치 확인)
+        #    /whoami 는 결과가 꼭 필요하니 기다리고, 나머지는 기억해 둔 것만 씁니다.
+        #    (처음 온 IP 면 뒤에서 찾아 두고, 이번 기록에는 위치를 생략합니다.)
+        #    접속 시간, 클라이언트 IP, 위치는 응답이 끝난 뒤 do_GET 에서 접속 기록으로 남깁니다.
+        who = self.who = locate(client_ip, wait=path == "/whoami")
+
+        # 3) 주소에 따라 다르게 응답합니다.
+        if path in ("/", "/index.html"):
+            # index.html 파일이 같은 폴더에 있는지 확인합니다. (기억해 둔 게 있으면 디스크를 보지 않음)
+            page = STATIC_CACHE.get("index.html")
+            if page is not None:
+                self.send_static(page)
             else:
-                # index.html이 없다면 간단한 안내 페이지를 즉석에서 만들어 보냅니다.
-                fallback = "<h1>index.html 파일을 이 폴더에 두세요.</h1>".encode(ENCODING)
+                # index.html이 없다면 간단한 안내 페이지를 보냅니다.
                 self.send_response(200)
                 self.send_header("Content-Type", "text/html; charset=utf-8")
-                self.send_header("Content-Length", str(len(fallback)))
+                self.send_header("Content-Length", str(len(FALLBACK_PAGE)))
                 self.end_headers()
-                self.wfile.write(fallback)
+                self.wfile.write(FALLBACK_PAGE)
 
-        elif self.path == "/metrics":
+        elif path == "/metrics":
             # 지금까지 몇 번 요청이 들어왔는지 JSON으로 보여줍니다.
-            body = json.dumps(REQUEST_COUNTER, ensure_ascii=False, indent=2).encode(ENCODING)
+            body, ctype = metrics_body(self.path, self.headers.get("Accept", ""))
             self.send_response(200)
-            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Type", ctype)
             self.send_header("Content-Length", str(len(body)))
             self.end_headers()
             self.wfile.write(body)
 
-        elif self.path == "/whoami":
+        elif path == "/whoami":
             # 접속자의 IP와 대략적인 위치를 JSON으로 보여줍니다.
-            body = json.dumps(who, ensure_ascii=False, indent=2).encode(ENCODING)
+            body = whoami_body(who)
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.send_header("Content-Length", str(len(body)))
@@ -130,11 +302,171 @@ class SpacePirateHandler(BaseHTTPRequestHandler):
             # 모르는 주소면 404 Not Found(찾을 수 없음)로 답합니다.
             self.send_error(404, "Not Found")
 
+    # 기억해 둔 정적 파일을 보내는 함수
+    def send_static(self, page):
+        # 브라우저가 gzip 을 받을 수 있으면 미리 압축해 둔 것을 보냅니다.
+        gzipped = page.has_gzip and accepts_gzip(self.headers.get("Accept-Encoding"))
+        # 브라우저가 이미 같은 걸 가지고 있으면 304(바뀐 것 없음)로 몸통 없이 답합니다.
+        if page.not_modified(self.headers):
+            self.send_response(304)
+            self.send_header("ETag", page.etag_for(gzipped))
+            self.send_header("Last-Modified", page.last_modified)
+            self.end_headers()
+            return
+        # 200 OK(정상) 상태를 먼저 보냅니다. (요구사항: 200번 메시지)
+        self.send_response(200)
+        for name, value in static_headers(page, gzipped):
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(page.gzip_size if gzipped else page.size))
+        self.end_headers()  # 여기까지가 "머리글". 이제 "몸통(내용)"을 보냅니다.
+        if page.body is not None:
+            self.wfile.write(page.gzip_body if gzipped else page.body)
+        else:
+            # 큰 파일은 메모리로 읽지 않고 운영체제가 파일에서 바로 보내게 합니다. (os.sendfile)
+            with open(page.gzip_path if gzipped else page.path, "rb") as f:
+                self.connection.sendfile(f, 0, page.gzip_size if gzipped else page.size)
+
+# ---------------------------------------------------------------------
+# asyncio 모드 (--mode asyncio)
+# - 스레드 1개가 모든 연결을 돌아가며 처리합니다. 연결이 수만 개여도 스레드/메모리가 늘지 않습니다.
+# - 주소별 응답 내용은 위의 스레드 방식과 똑같습니다.
+# ---------------------------------------------------------------------
+
+GEO_TASKS = {}  # ip -> 찾는 중인 asyncio 작업 (같은 IP 를 동시에 찾으면 하나를 같이 기다림)
+# 한꺼번에 찾는 중일 수 있는 IP 수 (GEO_BATCHER 가 동시에 보내는 묶음 수 x 묶음 크기만큼)
+# - 처음 보는 IP 가 수만 개 몰려도 찾기 작업이 끝없이 늘지 않게 함
+GEO_ASYNC_SLOTS = asyncio.Semaphore(GEO_BATCHER.max_running * GEO_BATCHER.max_batch)
+
+
+# 접속자 위치를 알려주는 함수 (asyncio 판: 인터넷 답을 기다리는 동안에도 스레드를 잡아 두지 않음)
+# - 인터넷으로 찾는 것은 스레드 방식과 똑같이 GEO_BATCHER 에 맡김 (같은 IP 는 한 번, 다른 IP 는 묶음으로)
+async def locate_async(ip: str, wait: bool):
+    if ip in ("127.0.0.1", "::1") or GEOIP.db is not None:
+        return lookup_location_by_ip(ip)  # 인터넷에 묻지 않는 경우는 바로 끝남
+    result, fresh = GEO_CACHE.find(ip)
+    if fresh:
+        return result
+    task = GEO_TASKS.get(ip)
+    if task is None:
+        if not wait and GEO_ASYNC_SLOTS.locked():
+            return result  # 찾는 중인 게 너무 많으면 이번엔 뒤에서 찾기를 건너뜀 (다음 요청 때 다시)
+        task = GEO_TASKS[ip] = asyncio.ensure_future(fetch_and_remember(ip))
+    if wait:
+        return await asyncio.shield(task)  # 이 요청이 끊겨도 찾기는 마저 해서 기억해 둠
+    return result
+
+
+async def fetch_and_remember(ip: str):
+    try:
+        async with GEO_ASYNC_SLOTS:
+            future = GEO_BATCHER.submit(ip)
+            # shield: 시간이 넘어도 같은 IP 를 기다리는 다른 요청의 Future 까지 취소하지 않게
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), GEO_BATCHER.timeout)
+    except Exception:
+        result = {"ip": ip, "location": None, "org": None}
+    finally:
+        GEO_TASKS.pop(ip, None)
+    GEO_CACHE.put(ip, result)
+    return result
+
+
+# asyncio 서버가 요청 1개마다 부르는 함수
+async def handle_async(request):
+    started = time.perf_counter()
+    allowed, retry_after = LIMITER.allow(request.client_ip)
+    if allowed:
+        who = await locate_async(request.client_ip, wait=request.path == "/whoami")
+        response = build_response(request, who)
+    else:
+        # 너무 자주 온 손님: 위치 찾기 없이 짧은 429 (스레드 방식의 send_too_many 와 같은 내용)
+        who = None
+        response = Response(429, [("Retry-After", str(int(retry_after) + 1)), ("Content-Type", "text/plain")],
+                            TOO_MANY_BODY, close=True)
+    seconds = time.perf_counter() - started
+    METRICS.observe(request.path, response.status, seconds)
+    log_access(request.client_ip, request.method, request.target, response.status, seconds, who)
+    return response
+
+
+# 주소에 따라 알맞은 응답을 만드는 함수 (스레드 방식의 route 와 같은 내용)
+def build_response(request, who):
+    path = request.path
+
+    if path in ("/", "/index.html"):
+        page = STATIC_CACHE.get("index.html")
+        if page is None:
+            return Response(200, [("Content-Type", "text/html; charset=utf-8")], FALLBACK_PAGE)
+        gzipped = page.has_gzip and accepts_gzip(request.headers.get("Accept-Encoding"))
+        if page.not_modified(request.headers):
+            return Response(304, [("ETag", page.etag_for(gzipped)), ("Last-Modified", page.last_modified)])
+        headers = static_headers(page, gzipped)
+        if page.body is not None:
+            return Response(200, headers, page.gzip_body if gzipped else page.body)
+        return Response(200, headers, file_path=page.gzip_path if gzipped else page.path,
+                        file_size=page.gzip_size if gzipped else page.size)
+    if path == "/metrics":
+        body, ctype = metrics_body(request.target, request.headers.get("Accept", ""))
+        return Response(200, [("Content-Type", ctype)], body)
+    if path == "/whoami":
+        return Response(200, [("Content-Type", "application/json; charset=utf-8")], whoami_body(who))
+    # 모르는 주소면 404 Not Found(찾을 수 없음)로 답합니다.
+    return error_response(404, "Not Found")
+
+
 # 프로그램이 바로 실행될 때만 아래 코드가 돌아가도록 합니다.
 if __name__ == "__main__":
-    # ThreadingHTTPServer를 써서 요청이 몰려도 동시에 처리할 수 있게 합니다.
-    # (한 명씩만 처리하는 서버보다 덜 답답합니다.)
-    httpd = ThreadingHTTPServer((HOST, PORT), SpacePirateHandler)
+    parser = argparse.ArgumentParser(description="SpacePirate 웹 서버")
+    parser.add_argument("--mode", choices=("pool", "thread", "asyncio"), default="pool",
+                        help="pool: 정해진 수의 일꾼 스레드 / thread: 연결마다 새 스레드 (예전 방식) / "
+                             "asyncio: 스레드 1개가 모든 연결을 처리")
+    parser.add_argument("--port", type=int, default=PORT, help="서버 포트 번호")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="pool 모드의 일꾼 스레드 수")
+    parser.add_argument("--queue", type=int, default=QUEUE_SIZE, help="일꾼을 기다릴 수 있는 연결 수 (넘치면 503)")
+    parser.add_argument("--backlog", type=int, default=BACKLOG, help="accept 전에 운영체제가 줄 세워 둘 연결 수")
+    parser.add_argument("--keepalive", type=float, default=KEEPALIVE_TIMEOUT,
+                        help="keep-alive 연결에서 다음 요청을 기다리는 시간(초)")
+    parser.add_argument("--max-queue-delay", type=float, default=MAX_QUEUE_DELAY,
+                        help="이 초보다 오래 밀린 요청은 처리하지 않고 503 (pool/asyncio 모드, 0: 끔)")
+    parser.add_argument("--ip-rate", type=float, default=IP_RATE,
+                        help="손님(IP) 1명이 1초에 보낼 수 있는 요청 수 (넘으면 429, 0: 제한 없음)")
+    parser.add_argument("--ip-burst", type=int, default=IP_BURST, help="손님 1명이 한꺼번에 보낼 수 있는 요청 수")
+    parser.add_argument("--access-log", default=None,
+                        help="접속 기록을 JSON Lines 로 남길 파일 (예: access.log)")
+    parser.add_argument("--log-max-bytes", type=int, default=10 * 1024 * 1024,
+                        help="접속 기록 파일이 이 크기를 넘으면 .1 로 넘기고 새로 씀 (0: 크기로는 안 넘김)")
+    parser.add_argument("--log-rotate", type=float, default=0,
+                        help="이 초마다 접속 기록 파일을 넘김 (예: 3600 = 1시간마다, 0: 시간으로는 안 넘김)")
+    parser.add_argument("--log-backups", type=int, default=5, help="남겨 둘 지난 접속 기록 파일 수")
+    parser.add_argument("--quiet", action="store_true", help="터미널에 접속 기록을 보여주지 않음")
+    args = parser.parse_args()
+    PORT = args.port
+    SpacePirateHandler.timeout = args.keepalive
+    LIMITER = IPLimiter(args.ip_rate, args.ip_burst, IP_SLOTS)
+    ACCESS_LOG = AccessLog(args.access_log, console=not args.quiet, max_bytes=args.log_max_bytes,
+                           rotate_seconds=args.log_rotate, backups=args.log_backups)
+
+    if args.mode == "asyncio":
+        version = f"{SpacePirateHandler.server_version} {SpacePirateHandler.sys_version}"
+        aserver = AsyncHTTPServer(handle_async, HOST, PORT, version, keepalive=args.keepalive,
+                                  backlog=args.backlog, max_delay=args.max_queue_delay)
+        METRICS.extra["asyncio"] = aserver.stats
+        log_console(f"서버 시작(asyncio): http://127.0.0.1:{PORT} (또는 이 컴퓨터의 IP:{PORT})")
+        try:
+            asyncio.run(aserver.serve_forever())
+        except KeyboardInterrupt:
+            log_console("서버를 종료합니다.")
+        ACCESS_LOG.close()
+        raise SystemExit(0)
+
+    if args.mode == "pool":
+        # 일꾼 스레드 수를 정해 두고, 너무 몰리면 503 으로 돌려보냅니다. (스레드가 끝없이 늘지 않게)
+        httpd = PooledHTTPServer((HOST, PORT), SpacePirateHandler, args.workers, args.queue, args.backlog,
+                                 args.max_queue_delay, keepalive=args.keepalive)
+        METRICS.extra["pool"] = httpd.stats
+    else:
+        # ThreadingHTTPServer를 써서 요청이 몰려도 동시에 처리할 수 있게 합니다.
+        # (한 명씩만 처리하는 서버보다 덜 답답합니다.)
+        httpd = ThreadingHTTPServer((HOST, PORT), SpacePirateHandler)
     log_console(f"서버 시작: http://127.0.0.1:{PORT} (또는 이 컴퓨터의 IP:{PORT})")
 
     try:
@@ -145,3 +477,4 @@ if __name__ == "__main__":
         log_console("서버를 종료합니다.")
     finally:
         httpd.server_close()
+        ACCESS_LOG.close()  # 아직 못 쓴 접속 기록을 마저 씀
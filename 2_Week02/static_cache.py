@@ -0,0 +1,124 @@
+"""
+static_cache.py
+- 정적 파일(index.html 등)을 메모리에 기억해 두고 빠르게 보내기 위한 도구
+    * 파일 경로 + 수정 시각(mtime)으로 기억해요. 파일이 바뀌면 알아서 다시 읽어요.
+      (매번 확인하지 않고 check_interval 초에 한 번만 os.stat 으로 확인)
+    * ETag / Last-Modified 를 미리 만들어 두고, 브라우저가 "이거 이미 있어요" 하면 304 로 몸통 없이 답해요.
+    * 작은 파일은 gzip 으로 미리 압축해 둬요. (요청마다 압축하지 않음)
+    * 큰 파일은 메모리에 올리지 않고 os.sendfile 로 커널이 바로 보내게 해요. (복사 없음)
+      옆에 같은 이름 + .gz 파일이 있으면 그걸 압축본으로 써요.
+"""
+
+import gzip
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+
+class StaticFile:
+    """기억해 둔 파일 1개"""
+    __slots__ = ("path", "size", "mtime_ns", "content_type", "etag", "last_modified",
+                 "body", "gzip_body", "gzip_path", "gzip_size", "checked")
+
+    def __init__(self, path, st, inline_max):
+        self.path = path
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if ctype.startswith("text/") or ctype in ("application/javascript", "application/json"):
+            ctype += "; charset=utf-8"
+        self.content_type = ctype
+        self.etag = f'"{self.size:x}-{self.mtime_ns:x}"'
+        self.last_modified = formatdate(st.st_mtime, usegmt=True)
+        self.body = None        # 작은 파일: 내용 전체 (큰 파일은 None → sendfile)
+        self.gzip_body = None   # 작은 파일의 압축본 (압축해도 안 줄면 None)
+        self.gzip_path = None   # 큰 파일 옆의 미리 압축해 둔 .gz 파일
+        self.gzip_size = 0
+        self.checked = time.monotonic()
+        if self.size <= inline_max:
+            with open(path, "rb") as f:
+                self.body = f.read()
+            packed = gzip.compress(self.body, compresslevel=9, mtime=0)
+            if len(packed) < len(self.body):
+                self.gzip_body = packed
+                self.gzip_size = len(packed)
+        else:
+            try:
+                gz = os.stat(path + ".gz")
+                if gz.st_mtime_ns >= self.mtime_ns:  # 원본보다 오래된 압축본은 안 씀
+                    self.gzip_path = path + ".gz"
+                    self.gzip_size = gz.st_size
+            except OSError:
+                pass
+
+    @property
+    def has_gzip(self):
+        return self.gzip_body is not None or self.gzip_path is not None
+
+    def etag_for(self, gzipped):
+        # 압축본과 원본은 내용이 다르니 ETag 도 달라야 함
+        return self.etag[:-1] + '-gz"' if gzipped else self.etag
+
+    def not_modified(self, headers):
+        """브라우저가 가진 것과 같으면 True (If-None-Match 가 있으면 그것만 봄)"""
+        inm = headers.get("If-None-Match")
+        if inm is not None:
+            if inm.strip() == "*":
+                return True
+            tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+            return self.etag in tags or self.etag_for(True) in tags
+        ims = headers.get("If-Modified-Since")
+        if ims:
+            try:
+                return int(self.mtime_ns // 1_000_000_000) <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError, OverflowError):
+                return False
+        return False
+
+
+class StaticCache:
+    def __init__(self, inline_max=256 * 1024, check_interval=1.0):
+        self.inline_max = inline_max            # 이보다 큰 파일은 메모리에 올리지 않고 sendfile
+        self.check_interval = check_interval    # 파일이 바뀌었는지 확인하는 간격(초)
+        self.files = {}                         # 경로 -> StaticFile
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """path 의 StaticFile (파일이 없으면 None)"""
+        entry = self.files.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked < self.check_interval:
+            return entry
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.files.pop(path, None)
+            return None
+        if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+            entry.checked = now
+            return entry
+        with self.lock:  # 같은 파일을 여러 스레드가 동시에 읽어 들이지 않게
+            entry = self.files.get(path)
+            if entry is None or entry.mtime_ns != st.st_mtime_ns or entry.size != st.st_size:
+                try:
+                    entry = self.files[path] = StaticFile(path, st, self.inline_max)
+                except OSError:
+                    return None
+            return entry
+
+
+def accepts_gzip(accept_encoding):
+    """Accept-Encoding 에 gzip 이 있는지 (gzip;q=0 은 '싫어요' 라는 뜻)"""
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            if q.startswith("q="):
+                try:
+                    return float(q[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
@@ -0,0 +1,151 @@
+"""
+test_geo_cache.py
+- GeoBatcher / GeoCache 시험 (인터넷 없이 ipapi_stub.py 를 빈 포트에 띄워서 씀)
+    * 같은 IP 를 동시에 찾으면 외부 요청은 1번 (single-flight)
+    * 다른 IP 들은 모아서 묶음 요청 1번 (micro-batching)
+    * asyncio 모드(server.locate_async)도 같은 묶음 요청을 씀
+    * 실패한 결과는 negative_ttl 동안, 찾은 결과는 ttl 동안만 기억
+- 요청 수는 가짜 ip-api 의 /stats 로 확인해요.
+
+예)
+    python -m pytest -q test_geo_cache.py
+    python -m unittest test_geo_cache
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ipapi_stub  # noqa: E402
+import server  # noqa: E402
+from geo_cache import GeoBatcher, GeoCache  # noqa: E402
+
+
+class GeoLookupTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.httpd = ThreadingHTTPServer(("127.0.0.1", 0), ipapi_stub.StubHandler)  # 0 = 빈 포트 아무거나
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+        cls.api = f"http://127.0.0.1:{cls.httpd.server_address[1]}"
+        cls.saved_api = server.GEO_API
+        server.GEO_API = cls.api  # server.fetch_locations 가 가짜 ip-api 를 보게 함
+
+    @classmethod
+    def tearDownClass(cls):
+        server.GEO_API = cls.saved_api
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def setUp(self):
+        ipapi_stub.DELAY = 0.0
+        with ipapi_stub.COUNTS_LOCK:
+            for key in ipapi_stub.COUNTS:
+                ipapi_stub.COUNTS[key] = 0
+
+    def stats(self):
+        with urllib.request.urlopen(f"{self.api}/stats", timeout=5) as resp:
+            return json.loads(resp.read().decode(ipapi_stub.ENCODING))
+
+    def run_together(self, func, args):
+        """args 하나마다 스레드 1개로 func 를 (거의) 같은 순간에 부름 → 결과 목록"""
+        barrier = threading.Barrier(len(args))
+        results = [None] * len(args)
+
+        def worker(i):
+            barrier.wait()
+            results[i] = func(args[i])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(args))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+        return results
+
+    def wait_for(self, check, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if check():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_same_ip_is_fetched_once(self):
+        ipapi_stub.DELAY = 0.2  # 첫 요청이 나가 있는 동안 나머지가 도착하게
+        batcher = GeoBatcher(server.fetch_locations, window=0.01)
+        results = self.run_together(batcher.lookup, ["8.8.8.8"] * 20)
+
+        self.assertEqual(self.stats(), {"single": 1, "batch": 0, "ips": 1})
+        self.assertEqual(batcher.coalesced, 19)
+        self.assertEqual(len({json.dumps(r, sort_keys=True) for r in results}), 1)
+        self.assertIsNotNone(results[0]["location"])
+
+    def test_distinct_ips_go_out_as_one_batch(self):
+        ips = [f"1.2.3.{n}" for n in range(1, 31)]
+        batcher = GeoBatcher(server.fetch_locations, window=0.1)
+        results = self.run_together(batcher.lookup, ips)
+
+        self.assertEqual(self.stats(), {"single": 0, "batch": 1, "ips": len(ips)})
+        self.assertEqual(batcher.batches, 1)
+        self.assertEqual([r["ip"] for r in results], ips)  # 묶음 답이 각 IP 에 제대로 나눠짐
+        self.assertTrue(all(r["location"] for r in results))
+
+    def test_async_lookups_share_the_batcher(self):
+        ips = [f"5.6.7.{n}" for n in range(1, 21)]
+        batcher = GeoBatcher(server.fetch_locations, window=0.1)
+        saved = server.GEO_BATCHER, server.GEO_CACHE, server.GEOIP.db
+        server.GEO_BATCHER = batcher
+        server.GEO_CACHE = GeoCache(batcher.lookup, workers=1)
+        server.GEOIP.db = None  # 오프라인 GeoIP 파일이 있어도 인터넷 쪽을 시험
+        try:
+            async def main():
+                return await asyncio.gather(*(server.locate_async(ip, wait=True) for ip in ips + ips))
+            results = asyncio.run(main())
+        finally:
+            server.GEO_BATCHER, server.GEO_CACHE, server.GEOIP.db = saved
+
+        self.assertEqual(self.stats(), {"single": 0, "batch": 1, "ips": len(ips)})
+        self.assertEqual([r["ip"] for r in results], ips + ips)
+        self.assertTrue(all(r["location"] for r in results))
+
+    def test_failed_lookup_is_cached_for_negative_ttl(self):
+        batcher = GeoBatcher(server.fetch_locations, window=0.0)
+        cache = GeoCache(batcher.lookup, ttl=60, negative_ttl=0.3, workers=1)
+
+        self.assertIsNone(cache.get("10.0.0.1")["location"])  # 가짜 ip-api 는 10.x 를 실패로 답함
+        self.assertIsNone(cache.get("10.0.0.1")["location"])
+        self.assertEqual(self.stats()["ips"], 1)  # 두 번째는 기억한 실패를 씀
+
+        time.sleep(0.35)
+        cache.get("10.0.0.1")
+        self.assertEqual(self.stats()["ips"], 2)  # negative_ttl 이 지나면 다시 물어봄
+
+    def test_entry_expires_after_ttl(self):
+        batcher = GeoBatcher(server.fetch_locations, window=0.0)
+        cache = GeoCache(batcher.lookup, ttl=0.3, negative_ttl=60, workers=1)
+
+        first = cache.get("9.9.9.9")
+        self.assertIsNotNone(first["location"])
+        self.assertEqual(cache.get("9.9.9.9"), first)
+        self.assertEqual(self.stats()["ips"], 1)
+
+        time.sleep(0.35)
+        self.assertEqual(cache.peek("9.9.9.9"), first)  # 오래됐어도 일단 돌려주고 뒤에서 새로 찾음
+        self.assertTrue(self.wait_for(lambda: self.stats()["ips"] == 2))
+        self.assertTrue(self.wait_for(lambda: cache.find("9.9.9.9")[1]))  # 새로 찾은 결과는 다시 믿을 만함
+
+        time.sleep(0.35)
+        cache.get("9.9.9.9")  # get 은 기다려서 새로 찾음
+        self.assertEqual(self.stats()["ips"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
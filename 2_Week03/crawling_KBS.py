@@ -4,19 +4,42 @@ crawling_KBS.py
     폴백 순서: KBS RSS → JSON-LD → DOM → Google News RSS(site:news.kbs.co.kr)
 - 보너스: KOSPI 지수, 날씨(Seoul)
 - 특징: 세션 재시도, 강한 UA/헤더, 디버그 로그
+- RSS 후보는 동시에 요청 (걸리는 시간 ≈ 가장 느린 피드 1개)
+    rss_mode="first": 먼저 성공한 피드만 쓰고 나머지는 취소 (받는 중인 것도 연결을 끊어서 바로 멈춤)
+    rss_mode="merge": 모든 섹션 피드를 돌아가며 섞고 중복 제거
+- 디스크 캐시(http_cache.py): ETag/Last-Modified 로 다시 확인해서 304 면 저장한 본문 사용,
+    안 바뀐 본문은 다시 파싱하지 않음 (KBS_CACHE_DIR="" 로 끌 수 있음)
+- RSS/Atom 은 받는 대로 조금씩 파싱(XMLPullParser)하고, limit 개를 모으면 나머지는 받지 않음
+- 본 헤드라인 색인(seen_index.py): 실행할 때마다 기록, --since-last-run 이면 새 헤드라인만 출력
+    python crawling_KBS.py --since-last-run --json   (한 줄에 하나씩 {"title", "first_seen"})
+- 상주 모드(--daemon): cron 으로 매번 새로 띄우지 않고 계속 돌면서 피드마다 따로 확인
+    새 글이 없으면 천천히, 몰려오면 자주 (feed_scheduler.py). 세션(연결 풀)은 계속 재사용
 """
 
 from __future__ import annotations
+import argparse
+import codecs
+import datetime
 import json
+import os
+import queue
 import re
+import socket
 import sys
+import threading
+import time
 import xml.etree.ElementTree as ET
-from typing import List, Optional, Iterable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional, Iterable, Iterator, Tuple
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from http_cache import DiskCache, content_hash
+from seen_index import SeenIndex
+from feed_scheduler import FeedScheduler
+
 # bs4는 있으면 사용
 try:
     from bs4 import BeautifulSoup  # type: ignore
@@ -28,6 +51,24 @@ DEBUG = False  # 문제 생기면 True로 바꿔 실행하면 경로/상태 출
 
 KBS_HOME = "https://news.kbs.co.kr"
 GOOGLE_NEWS_RSS = "https://news.google.com/rss/search?q=site:news.kbs.co.kr&hl=ko&gl=KR&ceid=KR:ko"
+RSS_WORKERS = 6      # RSS 후보를 동시에 받는 최대 개수 (세션 연결 풀 10개 안에서)
+RSS_MODE = "first"   # "first": 먼저 성공한 피드 1개 / "merge": 모든 피드를 합쳐서
+FEED_CHUNK = 16 * 1024  # 피드를 이만큼씩 받아서 바로 파싱 (피드가 아무리 커도 메모리는 이 정도)
+
+# 디스크 캐시 위치와 크기 제한 (넘치면 오래 안 쓴 것부터 지움)
+CACHE_DIR = os.environ.get("KBS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"))
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+CACHE_MAX_ENTRIES = 2000
+
+# 본 헤드라인 색인 위치와 보관 기간(이 일수 동안 다시 안 보이면 지움)
+SEEN_DB = os.environ.get("KBS_SEEN_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "seen.sqlite3"))
+SEEN_RETENTION_DAYS = 30
+
+# 상주 모드(--daemon) 피드 확인 간격(초)
+POLL_START = 60         # 처음 간격
+POLL_MIN = 30           # 새 글이 몰려와도 이보다 자주 확인하지 않음
+POLL_MAX = 900          # 새 글이 없어도 이보다 뜸하게 확인하지 않음
+PRUNE_EVERY = 3600      # 색인에서 오래된 제목을 지우는 간격(초)
 
 # -------------------------
 # 요청 세션(재시도/헤더)
@@ -58,17 +99,243 @@ def build_session() -> requests.Session:
     return s
 
 SESSION = build_session()
+CACHE: Optional[DiskCache] = DiskCache(CACHE_DIR, CACHE_MAX_BYTES, CACHE_MAX_ENTRIES) if CACHE_DIR else None
 
 def get(url: str, timeout: int = 10) -> requests.Response:
     # 일부 사이트는 Referer 없으면 막기도 해서 가볍게 추가
     headers = {"Referer": KBS_HOME}
+    entry = CACHE.lookup(url) if CACHE is not None else None
+    if entry is not None:
+        headers.update(entry.validators())  # 전에 받은 것과 같으면 304 로 답해 달라고 요청
     r = SESSION.get(url, headers=headers, timeout=timeout)
+    if r.status_code == 304 and entry is not None:
+        body = CACHE.body(entry)
+        if body is not None:
+            if DEBUG: print(f"[DEBUG] 304 캐시 사용: {url}")
+            return _cached_response(r, entry, body)
+        # 본문 파일이 없어졌으면 조건 없이 다시 받음
+        r = SESSION.get(url, headers={"Referer": KBS_HOME}, timeout=timeout)
     # 인코딩 추정 보정
     if not r.encoding or r.encoding.lower() == "iso-8859-1":
         r.encoding = r.apparent_encoding or "utf-8"
     r.raise_for_status()
+    if CACHE is not None:
+        r.content_hash = CACHE.store(url, r.content, r.headers.get("ETag"), r.headers.get("Last-Modified"),
+                                     r.encoding, r.headers.get("Content-Type"))
+    else:
+        r.content_hash = content_hash(r.content)
+    return r
+
+def _cached_response(not_modified: requests.Response, entry, body: bytes) -> requests.Response:
+    # 304 응답 대신, 저장한 본문으로 채운 200 응답을 돌려줌 (부르는 쪽은 차이를 몰라도 됨)
+    r = requests.Response()
+    r.status_code = 200
+    r._content = body
+    r.headers = not_modified.headers
+    if entry.content_type:
+        r.headers["Content-Type"] = entry.content_type
+    r.encoding = entry.encoding
+    r.url = not_modified.url
+    r.request = not_modified.request
+    r.content_hash = entry.body_hash
+    r.from_cache = True
     return r
 
+class FetchCancelled(Exception):
+    """FeedStop 이 켜져서 다운로드를 그만둠"""
+
+class FeedStop:
+    """
+    여러 스레드가 같이 보는 '이제 그만 받아' 신호 (먼저 성공한 피드가 나왔을 때 나머지를 멈춤)
+    - 받는 쪽은 조각을 읽을 때마다 신호를 확인하고 (chunks)
+    - 신호를 켜면 받는 중인 응답의 소켓을 끊어서, 다음 조각을 기다리며 멈춰 있는 스레드도 바로 깨움
+      (다른 스레드에서 r.close() 만 하면 기다리던 recv 가 시간 제한까지 안 풀림)
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.responses = set()
+
+    def is_set(self) -> bool:
+        return self.event.is_set()
+
+    def set(self) -> None:
+        with self.lock:
+            self.event.set()
+            responses = list(self.responses)
+            self.responses.clear()
+        for r in responses:
+            _shutdown(r)
+
+    def track(self, r: requests.Response) -> None:
+        with self.lock:
+            if not self.event.is_set():
+                self.responses.add(r)
+                return
+        r.close()
+        raise FetchCancelled()
+
+    def untrack(self, r: requests.Response) -> None:
+        with self.lock:
+            self.responses.discard(r)
+
+    def chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            if self.event.is_set():
+                raise FetchCancelled()
+            yield chunk
+
+def _shutdown(r: requests.Response) -> None:
+    # 응답의 소켓을 끊음 (닫기는 그 응답을 읽던 스레드가 함)
+    sock = getattr(getattr(r.raw, "connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+def fetch_feed_titles(url: str, limit: int, timeout: int = 8, stop: Optional[FeedStop] = None) -> List[str]:
+    """RSS/Atom 피드의 제목을 받으면서 파싱. limit 개를 모으면 다운로드를 멈춤 (stop 이 켜져도 멈춤)"""
+    if stop is not None and stop.is_set():
+        raise FetchCancelled()
+    key = f"rss:{limit}"
+    r = None
+    entry = CACHE.lookup(url) if CACHE is not None else None
+    if entry is not None:
+        r = SESSION.get(url, headers={"Referer": KBS_HOME, **entry.validators()}, timeout=timeout, stream=True)
+        if r.status_code == 304:
+            r.close()
+            # 안 바뀜: 저장한 파싱 결과 → 없으면 저장한 본문을 파싱 → 둘 다 없으면 조건 없이 다시 받음
+            titles = CACHE.find_parsed(entry.body_hash, key)
+            if titles is None and entry.has_body:
+                titles = CACHE.save_parsed(entry.body_hash, key, parse_feed_titles(CACHE.body_chunks(entry), limit)[0])
+            if titles is not None:
+                if DEBUG: print(f"[DEBUG] 304 캐시 사용: {url}")
+                CACHE.touch(entry)
+                return titles
+            r = None
+    if r is None:
+        r = SESSION.get(url, headers={"Referer": KBS_HOME}, timeout=timeout, stream=True)
+    if stop is not None:
+        stop.track(r)
+
+    try:
+        with r:  # 중간에 멈추면 나머지는 받지 않고 연결을 닫음
+            return _read_feed(r, url, key, limit, stop)
+    except requests.RequestException:
+        if stop is not None and stop.is_set():
+            raise FetchCancelled() from None  # stop 이 연결을 끊어서 난 오류
+        raise
+    finally:
+        if stop is not None:
+            stop.untrack(r)
+
+def _read_feed(r: requests.Response, url: str, key: str, limit: int, stop: Optional[FeedStop]) -> List[str]:
+    r.raise_for_status()
+    if DEBUG: print(f"[DEBUG] RSS 상태 {url}: {r.status_code}")
+    chunks = r.iter_content(FEED_CHUNK)
+    if stop is not None:
+        chunks = stop.chunks(chunks)
+    if CACHE is None:
+        return parse_feed_titles(chunks, limit)[0]
+    etag, modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+    writer = CACHE.writer(url, etag, modified, r.encoding, r.headers.get("Content-Type"))
+    try:
+        titles, complete = parse_feed_titles(_tee(chunks, writer), limit)
+        if stop is not None and stop.is_set():
+            raise FetchCancelled()  # 소켓을 끊어서 끝난 것일 수 있음 (잘린 본문을 저장하지 않게)
+    except BaseException:
+        writer.abort()
+        raise
+    if complete:
+        digest = writer.commit()
+    else:
+        # 끝까지 받지 않았으니 본문은 버리고, 검증 헤더 + 파싱 결과만 저장
+        writer.abort()
+        digest = CACHE.save_partial(url, etag, modified, r.encoding, r.headers.get("Content-Type"))
+    if etag or modified:
+        CACHE.save_parsed(digest, key, titles)
+    return titles
+
+def _tee(chunks: Iterable[bytes], writer) -> Iterator[bytes]:
+    for chunk in chunks:
+        writer.write(chunk)
+        yield chunk
+
+def _local_name(tag: str) -> str:
+    # "{http://www.w3.org/2005/Atom}entry" -> "entry"
+    return tag.rsplit("}", 1)[-1]
+
+XML_DECL_ENCODING = re.compile(rb'^(\s*<\?xml[^>]*?encoding=["\'])([A-Za-z0-9._-]+)(["\'])')
+EXPAT_ENCODINGS = ("utf-8", "utf8", "utf-16", "us-ascii", "ascii", "iso-8859-1", "latin-1")
+
+def _utf8_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # 파서(expat)는 euc-kr 같은 여러 바이트 인코딩을 못 읽어서, 그런 피드는 조각마다 UTF-8 로 바꿔서 넘김
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    m = XML_DECL_ENCODING.match(first)
+    encoding = m.group(2).decode("ascii").lower() if m else "utf-8"
+    if encoding in EXPAT_ENCODINGS:
+        yield first
+        yield from chunks
+        return
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        yield first
+        yield from chunks
+        return
+    first = XML_DECL_ENCODING.sub(rb"\1utf-8\3", first, count=1)
+    yield decoder.decode(first).encode("utf-8")
+    for chunk in chunks:
+        yield decoder.decode(chunk).encode("utf-8")
+    yield decoder.decode(b"", final=True).encode("utf-8")
+
+def parse_feed_titles(chunks: Iterable[bytes], limit: int) -> Tuple[List[str], bool]:
+    """
+    RSS 2.0 / Atom 제목을 조각(bytes)을 받는 대로 파싱 → (제목들, 끝까지 읽었는지)
+    - 다 읽은 <item>/<entry> 는 부모에서 떼어 내고 비워서 메모리가 쌓이지 않게 함
+    - 중복을 뺀 제목이 limit 개가 되면 바로 멈춤 (나머지 조각은 읽지 않음)
+    - 인코딩은 XML 선언(<?xml encoding=...?>)을 보고 정함
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack = []
+    seen = set()
+    out: List[str] = []
+    for chunk in _utf8_chunks(chunks):
+        try:
+            parser.feed(chunk)
+            events = list(parser.read_events())
+        except ET.ParseError:
+            return out, False  # 깨진 뒷부분은 버리고 여기까지 모은 것만
+        for event, elem in events:
+            if event == "start":
+                if not stack and _local_name(elem.tag) not in ("rss", "feed", "RDF"):
+                    return [], False  # 피드가 아님 (HTML 오류 페이지 등)
+                stack.append(elem)
+                continue
+            stack.pop()
+            if _local_name(elem.tag) not in ("item", "entry"):
+                continue
+            title = elem.find("{*}title")
+            t = clean_text("".join(title.itertext())) if title is not None else ""
+            if 5 <= len(t) <= 200 and t not in seen:
+                seen.add(t)
+                out.append(t)
+            if stack:
+                stack[-1].remove(elem)
+            elem.clear()
+            if len(out) >= limit:
+                return out, False
+    return out, True
+
+def parse_cached(r: requests.Response, key: str, parse):
+    # 같은 본문(내용 해시)을 전에 파싱한 적 있으면 그 결과를 씀
+    if CACHE is None:
+        return parse()
+    return CACHE.parsed(r.content_hash, key, parse)
+
 # -------------------------
 # 유틸
 # -------------------------
@@ -85,6 +352,11 @@ def unique_keeping_order(items: Iterable[str]) -> List[str]:
             out.append(it)
     return out
 
+def _round_robin(feeds: List[List[str]]) -> Iterable[List[str]]:
+    # [[a1, a2], [b1]] -> [a1, b1], [a2]
+    for i in range(max((len(f) for f in feeds), default=0)):
+        yield [f[i] for f in feeds if i < len(f)]
+
 # -------------------------
 # KBS 헤드라인 크롤러
 # -------------------------
@@ -112,6 +384,12 @@ class KbsHeadlines:
         "https://news.kbs.co.kr/rss/it.xml",
     ]
 
+    def __init__(self, rss_mode: str = RSS_MODE, workers: int = RSS_WORKERS):
+        if rss_mode not in ("first", "merge"):
+            raise ValueError(f"rss_mode는 'first' 또는 'merge': {rss_mode!r}")
+        self.rss_mode = rss_mode
+        self.workers = workers
+
     def fetch(self, limit: int = 30) -> List[str]:
         # 1) RSS
         titles = self._from_rss(limit)
@@ -121,19 +399,20 @@ class KbsHeadlines:
 
         # 2) JSON-LD
         try:
-            html = get(KBS_HOME).text
+            page = get(KBS_HOME)
+            html = page.text
         except Exception as e:
             if DEBUG: print(f"[DEBUG] KBS 메인 GET 실패: {e}")
             html = ""
 
         if html:
-            titles = self._from_jsonld(html, limit)
+            titles = parse_cached(page, f"jsonld:{limit}", lambda: self._from_jsonld(html, limit))
             if titles:
                 if DEBUG: print("[DEBUG] JSON-LD 성공")
                 return titles
 
             # 3) DOM
-            titles = self._from_dom(html, limit)
+            titles = parse_cached(page, f"dom:{limit}:{HAS_BS4}", lambda: self._from_dom(html, limit))
             if titles:
                 if DEBUG: print("[DEBUG] DOM 성공")
                 return titles
@@ -148,48 +427,54 @@ class KbsHeadlines:
 
     # ---------- 1) KBS RSS ----------
     def _from_rss(self, limit: int) -> List[str]:
-        for rss_url in self.RSS_CANDIDATES:
-            try:
-                r = get(rss_url, timeout=8)
-                if DEBUG: print(f"[DEBUG] RSS 상태 {rss_url}: {r.status_code}, {len(r.text)} bytes")
-                xml_txt = r.text
-                if "<rss" not in xml_txt and "<feed" not in xml_txt:
-                    continue
-                titles = self._parse_rss_titles(xml_txt, limit)
+        # 후보마다 8초 + 재시도가 걸릴 수 있어서, 하나씩 차례로 하지 않고 동시에 요청
+        if self.rss_mode == "first":
+            return self._first_rss(limit)
+
+        # merge: 후보 순서대로 피드를 모은 뒤 한 줄씩 돌아가며 섞음 (앞 피드가 다 차지하지 않게)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            feeds = list(pool.map(lambda url: self._fetch_rss(url, limit), self.RSS_CANDIDATES))
+        merged = [t for row in _round_robin(feeds) for t in row]
+        return unique_keeping_order(merged)[:limit]
+
+    def _first_rss(self, limit: int) -> List[str]:
+        # 먼저 성공한 피드가 나오면 stop 을 켜서 나머지는 시작하지 않고, 받는 중인 것은 연결을 끊음
+        # 일꾼은 daemon 스레드라서 아직 응답 머리글을 기다리는 요청이 남아도 프로그램 종료를 붙잡지 않음
+        # (ThreadPoolExecutor 스레드는 프로그램이 끝날 때 전부 기다림)
+        stop = FeedStop()
+        todo = queue.SimpleQueue()
+        for url in self.RSS_CANDIDATES:
+            todo.put(url)
+        results = queue.SimpleQueue()  # (url, 제목들)
+
+        def worker() -> None:
+            while not stop.is_set():
+                try:
+                    url = todo.get_nowait()
+                except queue.Empty:
+                    return
+                results.put((url, self._fetch_rss(url, limit, stop)))
+
+        for _ in range(min(self.workers, len(self.RSS_CANDIDATES))):
+            threading.Thread(target=worker, daemon=True).start()
+        try:
+            for _ in self.RSS_CANDIDATES:
+                url, titles = results.get()
                 if titles:
+                    if DEBUG: print(f"[DEBUG] RSS 먼저 성공: {url}")
                     return titles
-            except Exception as e:
-                if DEBUG: print(f"[DEBUG] RSS 실패 {rss_url}: {e}")
-                continue
-        return []
+            return []
+        finally:
+            stop.set()
 
-    @staticmethod
-    def _parse_rss_titles(xml_txt: str, limit: int) -> List[str]:
+    def _fetch_rss(self, rss_url: str, limit: int, stop: Optional[FeedStop] = None) -> List[str]:
         try:
-            root = ET.fromstring(xml_txt)
-        except Exception:
+            return fetch_feed_titles(rss_url, limit, timeout=8, stop=stop)
+        except FetchCancelled:
+            return []
+        except Exception as e:
+            if DEBUG: print(f"[DEBUG] RSS 실패 {rss_url}: {e}")
             return []
-        out: List[str] = []
-
-        # RSS 2.0
-        for it in root.findall(".//item"):
-            t = clean_text(it.findtext("title") or "")
-            if t:
-                out.append(t)
-            if len(out) >= limit:
-                break
-
-        # Atom (백업)
-        if not out:
-            for it in root.findall(".//{*}entry"):
-                t = clean_text(it.findtext("{*}title") or "")
-                if t:
-                    out.append(t)
-                if len(out) >= limit:
-                    break
-
-        out = [t for t in out if 5 <= len(t) <= 200]
-        return unique_keeping_order(out)[:limit]
 
     # ---------- 2) JSON-LD ----------
     def _from_jsonld(self, html: str, limit: int) -> List[str]:
@@ -282,11 +567,7 @@ class KbsHeadlines:
     # ---------- 4) Google News RSS ----------
     def _from_google_news(self, limit: int) -> List[str]:
         try:
-            r = get(GOOGLE_NEWS_RSS, timeout=8)
-            if DEBUG:
-                print(f"[DEBUG] Google News RSS 상태: {r.status_code}, {len(r.text)} bytes")
-            xml_txt = r.text
-            return self._parse_rss_titles(xml_txt, limit)
+            return fetch_feed_titles(GOOGLE_NEWS_RSS, limit, timeout=8)
         except Exception as e:
             if DEBUG: print(f"[DEBUG] Google News RSS 실패: {e}")
             return []
@@ -338,14 +619,109 @@ def fetch_weather(city: str = "Seoul") -> Optional[dict]:
 # 메인
 # -------------------------
 
+def print_new(seen, as_json: bool) -> None:
+    # 처음 본 헤드라인만 (처음 본 시각과 함께)
+    for s in seen:
+        if not s.new:
+            continue
+        stamp = datetime.datetime.fromtimestamp(s.first_seen).astimezone().isoformat(timespec="seconds")
+        if as_json:
+            print(json.dumps({"title": s.title, "first_seen": stamp}, ensure_ascii=False), flush=True)
+        else:
+            print(f"[{stamp}] {s.title}", flush=True)
+
+def run_daemon(args) -> None:
+    """
+    피드마다 정해진 간격으로 확인하고, 새 헤드라인이 보이면 바로 출력 (Ctrl+C 로 멈춤)
+    - 확인은 RSS_WORKERS 개까지 동시에 (SESSION 의 연결 풀을 계속 재사용)
+    - 색인(SQLite)은 이 스레드에서만 씀
+    """
+    feeds = KbsHeadlines.RSS_CANDIDATES + [GOOGLE_NEWS_RSS]
+    scheduler = FeedScheduler(feeds, args.poll_start, args.poll_min, args.poll_max)
+    index = SeenIndex(args.seen_db, args.retention_days)
+    pool = ThreadPoolExecutor(max_workers=RSS_WORKERS)
+    stop = FeedStop()  # 끝낼 때 받는 중인 피드의 연결을 끊음 (종료가 다운로드를 기다리지 않게)
+    running = {}  # Future -> FeedState
+    pruned_at = time.monotonic()
+    try:
+        while True:
+            for feed in scheduler.pop_due():
+                running[pool.submit(fetch_feed_titles, feed.url, args.limit, 8, stop)] = feed
+            # 확인 중인 것이 끝나거나 다음 피드 시각이 될 때까지 기다림
+            timeout = scheduler.sleep_time()
+            if running:
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout or 0)
+                done = set()
+            for fut in done:
+                feed = running.pop(fut)
+                try:
+                    titles = fut.result()
+                except Exception as e:
+                    if DEBUG: print(f"[DEBUG] 확인 실패 {feed.url}: {e}", file=sys.stderr)
+                    titles = None
+                fresh = scheduler.done(feed, titles)
+                if titles:
+                    print_new(index.mark(titles), args.json)
+                if DEBUG:
+                    print(f"[DEBUG] {feed.url}: 새 글 {fresh}개, 다음 확인 {feed.interval:.0f}초 뒤", file=sys.stderr)
+            if time.monotonic() - pruned_at >= PRUNE_EVERY:
+                index.prune()
+                pruned_at = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        index.close()
+
 def main() -> None:
-    crawler = KbsHeadlines()
+    parser = argparse.ArgumentParser(description="KBS 헤드라인 / KOSPI / 날씨")
+    parser.add_argument("--limit", type=int, default=30, help="가져올 헤드라인 수")
+    parser.add_argument("--rss-mode", choices=("first", "merge"), default=RSS_MODE,
+                        help="first: 먼저 성공한 RSS 1개 / merge: 모든 섹션 RSS 를 합쳐서")
+    parser.add_argument("--since-last-run", action="store_true",
+                        help="지난 실행 이후 처음 본 헤드라인만 출력 (KOSPI/날씨 생략)")
+    parser.add_argument("--json", action="store_true", help="--since-last-run / --daemon 결과를 JSON Lines 로 출력")
+    parser.add_argument("--seen-db", default=SEEN_DB, help="본 헤드라인 색인 파일 (빈 값이면 기록 안 함)")
+    parser.add_argument("--retention-days", type=float, default=SEEN_RETENTION_DAYS,
+                        help="이 일수 동안 다시 안 보인 헤드라인은 색인에서 지움 (0: 지우지 않음)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="계속 돌면서 피드마다 따로 확인하고 새 헤드라인만 출력 (cron 대신)")
+    parser.add_argument("--poll-start", type=float, default=POLL_START, help="--daemon 처음 확인 간격(초)")
+    parser.add_argument("--poll-min", type=float, default=POLL_MIN, help="--daemon 가장 짧은 확인 간격(초)")
+    parser.add_argument("--poll-max", type=float, default=POLL_MAX, help="--daemon 가장 긴 확인 간격(초)")
+    args = parser.parse_args()
+
+    if args.daemon:
+        if not args.seen_db:
+            raise SystemExit("--daemon 에는 --seen-db 가 필요합니다.")
+        run_daemon(args)
+        return
+
+    crawler = KbsHeadlines(rss_mode=args.rss_mode)
     try:
-        headlines = crawler.fetch(limit=30)
+        headlines = crawler.fetch(limit=args.limit)
     except Exception as e:
         if DEBUG: print("[DEBUG] 전체 fetch 예외:", e, file=sys.stderr)
         headlines = []
 
+    # 본 헤드라인 색인에 기록 (처음 본 시각은 처음 기록될 때만 정해짐)
+    seen = []
+    if args.seen_db:
+        index = SeenIndex(args.seen_db, args.retention_days)
+        seen = index.mark(headlines)
+        pruned = index.prune()
+        if DEBUG: print(f"[DEBUG] 색인 {len(index)}개, 새것 {sum(s.new for s in seen)}개, 지움 {pruned}개")
+        index.close()
+    elif args.since_last_run:
+        raise SystemExit("--since-last-run 에는 --seen-db 가 필요합니다.")
+
+    if args.since_last_run:
+        print_new(seen, args.json)
+        return
+
     print("=== KBS 헤드라인 ===")
     if headlines:
         for i, t in enumerate(headlines, 1):
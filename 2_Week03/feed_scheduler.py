@@ -0,0 +1,87 @@
+"""
+feed_scheduler.py
+- 피드마다 따로 "다음에 언제 확인할지"를 정하는 스케줄러 (crawling_KBS.py --daemon 에서 사용)
+    * 새 글이 없으면 간격을 늘림 (backoff 배, max_interval 까지)
+    * 새 글이 몰려오면(burst 개 이상) 간격을 확 줄이고, 조금 오면 조금 줄임 (min_interval 까지)
+    * 실패하면 간격을 backoff 배씩 늘림 (사이트가 아플 때 계속 두드리지 않게, max_interval 까지)
+    * 간격에 ±jitter 만큼 무작위를 섞어서 여러 피드가 같은 순간에 몰리지 않게 함
+    * 첫 확인은 기준만 잡음 (처음엔 전부 '새 글'처럼 보이므로 간격을 바꾸지 않음)
+"""
+
+from __future__ import annotations
+import heapq
+import random
+import time
+from typing import Iterable, List, Optional
+
+
+class FeedState:
+    __slots__ = ("url", "interval", "due", "last_titles", "polls", "errors", "changes")
+
+    def __init__(self, url: str, interval: float, due: float):
+        self.url = url
+        self.interval = interval    # 지금 확인 간격(초)
+        self.due = due              # 다음에 확인할 시각 (time.monotonic)
+        self.last_titles = set()    # 지난번에 본 제목들 (새 글 개수를 세려고)
+        self.polls = 0
+        self.errors = 0             # 연속 실패 횟수
+        self.changes = 0            # 지금까지 본 새 글 수
+
+    def __lt__(self, other: "FeedState") -> bool:
+        return self.due < other.due
+
+
+class FeedScheduler:
+    def __init__(self, urls: Iterable[str], start_interval: float = 60.0, min_interval: float = 30.0,
+                 max_interval: float = 900.0, backoff: float = 1.5, burst: int = 3, jitter: float = 0.1):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.burst = burst
+        self.jitter = jitter
+        now = time.monotonic()
+        self.feeds = [FeedState(url, start_interval, now) for url in urls]
+        self.heap = list(self.feeds)    # 확인할 시각 순서 (확인 중인 피드는 빠져 있음)
+        heapq.heapify(self.heap)
+
+    def pop_due(self, now: Optional[float] = None) -> List[FeedState]:
+        """확인할 때가 된 피드들 (done() 으로 돌려놓을 때까지 다시 나오지 않음)"""
+        now = time.monotonic() if now is None else now
+        due = []
+        while self.heap and self.heap[0].due <= now:
+            due.append(heapq.heappop(self.heap))
+        return due
+
+    def sleep_time(self, now: Optional[float] = None) -> Optional[float]:
+        """다음 피드까지 남은 초 (확인할 피드가 모두 확인 중이면 None)"""
+        if not self.heap:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.heap[0].due - now)
+
+    def done(self, feed: FeedState, titles: Optional[List[str]], now: Optional[float] = None) -> int:
+        """확인 결과로 간격을 조절하고 다시 줄 세움 (titles=None 이면 실패) → 이 피드의 새 글 수"""
+        now = time.monotonic() if now is None else now
+        fresh = 0
+        if titles is None:
+            feed.errors += 1
+            feed.interval = min(self.max_interval, feed.interval * self.backoff)  # 실패할 때마다 backoff 배씩
+        else:
+            current = set(titles)
+            fresh = len(current - feed.last_titles)
+            if feed.polls > 0:  # 첫 확인은 기준만 잡음
+                if fresh >= self.burst:
+                    feed.interval /= 2
+                elif fresh:
+                    feed.interval *= 0.8
+                else:
+                    feed.interval *= self.backoff
+                feed.interval = min(self.max_interval, max(self.min_interval, feed.interval))
+                feed.changes += fresh
+            feed.last_titles = current
+            feed.errors = 0
+            feed.polls += 1
+        spread = feed.interval * self.jitter
+        feed.due = now + feed.interval + random.uniform(-spread, spread)
+        heapq.heappush(self.heap, feed)
+        return fresh
@@ -0,0 +1,303 @@
+"""
+http_cache.py
+- 크롤러용 디스크 캐시 (실행할 때마다 같은 피드/페이지를 처음부터 받지 않도록)
+    * 본문 + ETag / Last-Modified 를 저장해 두고, 다음 요청에 If-None-Match / If-Modified-Since 를 붙임
+      → 서버가 304(안 바뀜)로 답하면 저장해 둔 본문을 그대로 씀
+    * 본문은 내용 해시(sha256) 이름의 파일로 저장 (같은 내용은 한 번만)
+    * 파싱 결과도 (내용 해시, 파서 이름) 으로 저장 → 안 바뀐 피드는 다시 파싱하지 않음
+    * 본문을 끝까지 받지 않은 응답(필요한 만큼만 읽고 끊은 피드)은 본문 없이 검증 헤더만 저장하고,
+      파싱 결과는 (URL + 검증 헤더) 해시로 저장 → 304 를 받으면 본문 없이 파싱 결과를 바로 씀
+    * 본문은 조각(chunk)으로 받아 바로 임시 파일에 쓰면서 해시를 계산 → 큰 피드도 메모리에 다 올리지 않음
+    * 전체 크기 / 개수 제한을 넘으면 가장 오래 안 쓴 것부터 지움 (LRU)
+    * 같은 URL 의 내용이 바뀌면 예전 본문 파일과 그 파싱 결과는 바로 지움 (다른 URL 이 같이 쓰지 않으면)
+- 목록(메타데이터)은 SQLite 한 파일, 본문은 bodies/ 폴더
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    encoding      TEXT,
+    content_type  TEXT,
+    body_hash     TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    used_at       REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parsed (
+    body_hash TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    value     TEXT NOT NULL,
+    used_at   REAL NOT NULL,
+    PRIMARY KEY (body_hash, key)
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses(used_at);
+CREATE INDEX IF NOT EXISTS parsed_used ON parsed(used_at);
+"""
+
+
+VALIDATOR_PREFIX = "v:"  # 본문 없이 저장한 응답의 body_hash 앞에 붙임
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def validator_hash(url: str, etag: Optional[str], last_modified: Optional[str]) -> str:
+    # 본문이 없을 때 대신 쓰는 키: 같은 URL 이 같은 검증 헤더를 주면 같은 내용이라고 봄
+    raw = f"{url}\n{etag or ''}\n{last_modified or ''}".encode("utf-8")
+    return VALIDATOR_PREFIX + hashlib.sha256(raw).hexdigest()
+
+
+class CachedEntry:
+    __slots__ = ("url", "etag", "last_modified", "encoding", "content_type", "body_hash")
+
+    def __init__(self, url, etag, last_modified, encoding, content_type, body_hash):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.encoding = encoding
+        self.content_type = content_type
+        self.body_hash = body_hash
+
+    @property
+    def has_body(self) -> bool:
+        return not self.body_hash.startswith(VALIDATOR_PREFIX)
+
+    def validators(self) -> Dict[str, str]:
+        """다음 요청에 붙일 조건부 헤더"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DiskCache:
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024,
+                 max_entries: int = 2000, max_parsed: int = 5000):
+        self.path = path
+        self.max_bytes = max_bytes          # 저장한 본문 크기 합계 제한
+        self.max_entries = max_entries      # 저장한 URL 수 제한
+        self.max_parsed = max_parsed        # 저장한 파싱 결과 수 제한
+        self.bodies = os.path.join(path, "bodies")
+        os.makedirs(self.bodies, exist_ok=True)
+        self._sweep_tmp()
+        # RSS 후보를 여러 스레드가 동시에 받으므로 연결 1개를 잠금장치와 같이 씀
+        self.db = sqlite3.connect(os.path.join(path, "index.sqlite3"), check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.hits = 0           # 304 로 저장한 본문을 다시 쓴 횟수
+        self.parse_hits = 0     # 파싱을 건너뛴 횟수
+
+    # ---------- 응답 ----------
+    def lookup(self, url: str) -> Optional[CachedEntry]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT url, etag, last_modified, encoding, content_type, body_hash "
+                "FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        entry = CachedEntry(*row)
+        if entry.has_body and not os.path.exists(self._body_path(entry.body_hash)):
+            return None
+        return entry
+
+    def touch(self, entry: CachedEntry) -> None:
+        """304 를 받아 이 응답을 다시 썼음 (LRU 순서를 앞으로)"""
+        with self.lock:
+            self.db.execute("UPDATE responses SET used_at = ? WHERE url = ?", (time.time(), entry.url))
+            self.db.commit()
+        self.hits += 1
+
+    def body(self, entry: CachedEntry) -> Optional[bytes]:
+        """저장한 본문 (304 를 받았을 때). 쓴 시각도 새로 기록"""
+        try:
+            with open(self._body_path(entry.body_hash), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.touch(entry)
+        return data
+
+    def body_chunks(self, entry: CachedEntry, size: int = 16384) -> Iterator[bytes]:
+        """저장한 본문을 조각으로 (304 를 받았을 때, 메모리에 다 올리지 않고)"""
+        with open(self._body_path(entry.body_hash), "rb") as f:
+            while True:
+                chunk = f.read(size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def store(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str],
+              encoding: Optional[str], content_type: Optional[str]) -> str:
+        """200 응답 저장 (검증할 헤더가 없으면 다음에 304 를 받을 수 없으니 저장하지 않음) → 내용 해시"""
+        digest = content_hash(body)
+        if not etag and not last_modified:
+            return digest
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)  # 쓰다가 멈춰도 반쯤 쓴 본문 파일이 남지 않게
+        self._remember(url, etag, last_modified, encoding, content_type, digest, len(body))
+        return digest
+
+    def writer(self, url: str, etag: Optional[str], last_modified: Optional[str],
+               encoding: Optional[str], content_type: Optional[str]) -> "BodyWriter":
+        """본문을 조각으로 받으면서 저장 (끝까지 받으면 commit, 중간에 끊으면 abort)"""
+        return BodyWriter(self, url, etag, last_modified, encoding, content_type)
+
+    def _remember(self, url, etag, last_modified, encoding, content_type, digest, size) -> None:
+        with self.lock:
+            old = self.db.execute("SELECT body_hash FROM responses WHERE url = ?", (url,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, encoding, content_type, digest, size, time.time()))
+            # 이 URL 의 내용이 바뀌었으면 예전 본문은 (다른 URL 이 안 쓰면) 지움 — 안 지우면 파일이 계속 쌓임
+            if old is not None and old[0] != digest:
+                self._drop_if_unused(old[0])
+            self.db.commit()
+            self._evict()
+
+    # ---------- 파싱 결과 ----------
+    def parsed(self, body_hash: str, key: str, parse: Callable[[], Any]) -> Any:
+        """(내용 해시, key) 로 저장한 파싱 결과. 없으면 parse() 를 불러 저장 (JSON 으로 바꿀 수 있는 값만)"""
+        value = self.find_parsed(body_hash, key)
+        if value is None:
+            value = self.save_parsed(body_hash, key, parse())
+        return value
+
+    def find_parsed(self, body_hash: str, key: str) -> Any:
+        """저장한 파싱 결과 (없으면 None)"""
+        with self.lock:
+            row = self.db.execute("SELECT value FROM parsed WHERE body_hash = ? AND key = ?",
+                                  (body_hash, key)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE parsed SET used_at = ? WHERE body_hash = ? AND key = ?",
+                            (time.time(), body_hash, key))
+            self.db.commit()
+        self.parse_hits += 1
+        return json.loads(row[0])
+
+    def save_parsed(self, body_hash: str, key: str, value: Any) -> Any:
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO parsed VALUES (?, ?, ?, ?)",
+                            (body_hash, key, json.dumps(value, ensure_ascii=False), time.time()))
+            self.db.commit()
+            self._evict_parsed()
+        return value
+
+    def save_partial(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                     encoding: Optional[str], content_type: Optional[str]) -> str:
+        """본문을 끝까지 받지 않은 응답: 검증 헤더만 저장 → 파싱 결과를 저장할 키"""
+        if not etag and not last_modified:
+            return ""
+        digest = validator_hash(url, etag, last_modified)
+        self._remember(url, etag, last_modified, encoding, content_type, digest, 0)
+        return digest
+
+    # ---------- 정리 (LRU) ----------
+    def _evict(self) -> None:
+        count, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        for url, digest, size in self.db.execute(
+                "SELECT url, body_hash, size FROM responses ORDER BY used_at").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            count, total = count - 1, total - size
+            self._drop_if_unused(digest)
+        self.db.commit()
+
+    def _drop_if_unused(self, digest: str) -> None:
+        # 다른 URL 이 같은 본문을 쓰고 있지 않으면 파일과 그 파싱 결과도 지움 (잠금장치 안에서 부름)
+        if self.db.execute("SELECT 1 FROM responses WHERE body_hash = ? LIMIT 1", (digest,)).fetchone() is not None:
+            return
+        self.db.execute("DELETE FROM parsed WHERE body_hash = ?", (digest,))
+        if digest.startswith(VALIDATOR_PREFIX):
+            return  # 본문 파일이 없는 응답
+        try:
+            os.remove(self._body_path(digest))
+        except OSError:
+            pass
+
+    def _sweep_tmp(self, older_than: float = 3600.0) -> None:
+        # 받다가 프로그램이 죽어서 남은 임시 파일(incoming.*.tmp 등) 정리
+        # (같은 캐시를 쓰는 다른 프로그램이 지금 쓰는 중일 수 있어서 오래된 것만)
+        cutoff = time.time() - older_than
+        for name in os.listdir(self.bodies):
+            if not name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.bodies, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _evict_parsed(self) -> None:
+        over = self.db.execute("SELECT COUNT(*) FROM parsed").fetchone()[0] - self.max_parsed
+        if over > 0:
+            self.db.execute("DELETE FROM parsed WHERE rowid IN "
+                            "(SELECT rowid FROM parsed ORDER BY used_at LIMIT ?)", (over,))
+            self.db.commit()
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.bodies, digest)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            count, total = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            parsed = self.db.execute("SELECT COUNT(*) FROM parsed").fetchone()[0]
+        return {"entries": count, "bytes": total, "parsed": parsed,
+                "hits_304": self.hits, "parse_hits": self.parse_hits}
+
+
+class BodyWriter:
+    """본문 조각을 임시 파일에 쓰면서 해시를 계산 (메모리에는 조각 1개만)"""
+
+    def __init__(self, cache: DiskCache, url, etag, last_modified, encoding, content_type):
+        self.cache = cache
+        self.meta = (url, etag, last_modified, encoding, content_type)
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.tmp = os.path.join(cache.bodies, f"incoming.{threading.get_ident()}.{time.monotonic_ns()}.tmp")
+        self.file = open(self.tmp, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> str:
+        """끝까지 받았음 → 내용 해시 (검증 헤더가 없으면 파일은 버리고 해시만)"""
+        self.file.close()
+        digest = self.hasher.hexdigest()
+        url, etag, last_modified, encoding, content_type = self.meta
+        if not etag and not last_modified:
+            os.remove(self.tmp)
+            return digest
+        os.replace(self.tmp, self.cache._body_path(digest))
+        self.cache._remember(url, etag, last_modified, encoding, content_type, digest, self.size)
+        return digest
+
+    def abort(self) -> None:
+        self.file.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
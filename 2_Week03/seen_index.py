@@ -0,0 +1,75 @@
+"""
+seen_index.py
+- 이미 본 헤드라인을 기억하는 색인 (SQLite 한 파일)
+    * 키는 제목을 정리(공백 정리 + 대소문자 무시)한 뒤 만든 16바이트 해시
+      → 긴 제목 대신 짧은 키로 찾아서, 수백만 개가 쌓여도 기본 키 색인 한 번으로 찾음
+    * 처음 본 시각(first_seen)과 마지막으로 본 시각(last_seen)을 저장
+    * retention 일 동안 다시 안 보인 제목은 prune() 으로 지움
+"""
+
+from __future__ import annotations
+import hashlib
+import re
+import sqlite3
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    key        BLOB PRIMARY KEY,
+    title      TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen  REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seen_last ON seen(last_seen);
+"""
+
+
+class Seen(NamedTuple):
+    title: str
+    first_seen: float   # 처음 본 시각 (time.time())
+    new: bool           # 이번 실행에서 처음 본 것인지
+
+
+def title_key(title: str) -> bytes:
+    normalized = re.sub(r"\s+", " ", title).strip().casefold()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class SeenIndex:
+    def __init__(self, path: str, retention_days: float = 30.0):
+        self.path = path
+        self.retention_days = retention_days  # 0 이면 지우지 않음
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")  # 다른 프로그램이 읽는 중에도 쓸 수 있게
+        self.db.executescript(SCHEMA)
+
+    def mark(self, titles: Iterable[str], now: Optional[float] = None) -> List[Seen]:
+        """제목들을 '봤음'으로 기록 → 순서 그대로 (제목, 처음 본 시각, 새것인지)"""
+        now = time.time() if now is None else now
+        out: List[Seen] = []
+        with self.db:  # 한 번의 트랜잭션으로 (제목마다 디스크에 쓰지 않게)
+            for title in titles:
+                key = title_key(title)
+                cur = self.db.execute("INSERT OR IGNORE INTO seen VALUES (?, ?, ?, ?)", (key, title, now, now))
+                if cur.rowcount == 1:
+                    out.append(Seen(title, now, True))
+                    continue
+                self.db.execute("UPDATE seen SET last_seen = ? WHERE key = ?", (now, key))
+                first = self.db.execute("SELECT first_seen FROM seen WHERE key = ?", (key,)).fetchone()[0]
+                out.append(Seen(title, first, False))
+        return out
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """retention 일 동안 안 보인 제목을 지움 → 지운 개수"""
+        if not self.retention_days:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.retention_days * 86400
+        with self.db:
+            return self.db.execute("DELETE FROM seen WHERE last_seen < ?", (cutoff,)).rowcount
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
@@ -0,0 +1,64 @@
+"""
+test_feed_scheduler.py
+- FeedScheduler 시험 (시각을 직접 넘겨서 기다리지 않음, jitter=0 으로 간격을 정확히 봄)
+
+예)
+    python -m pytest -q test_feed_scheduler.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from feed_scheduler import FeedScheduler  # noqa: E402
+
+URL = "https://example.com/rss.xml"
+
+
+class FeedSchedulerTest(unittest.TestCase):
+    def make(self, **kwargs):
+        options = dict(start_interval=60, min_interval=30, max_interval=900, backoff=1.5, burst=3, jitter=0.0)
+        options.update(kwargs)
+        scheduler = FeedScheduler([URL], **options)
+        return scheduler, scheduler.pop_due()[0]
+
+    def test_failures_back_off_by_a_constant_factor(self):
+        scheduler, feed = self.make()
+        intervals = []
+        for _ in range(5):
+            scheduler.done(feed, None, now=0.0)
+            scheduler.pop_due(now=feed.due)
+            intervals.append(feed.interval)
+        self.assertEqual(intervals, [90.0, 135.0, 202.5, 303.75, 455.625])
+        self.assertEqual(feed.errors, 5)
+
+    def test_failures_stop_at_max_interval(self):
+        scheduler, feed = self.make(max_interval=200)
+        for _ in range(10):
+            scheduler.done(feed, None, now=0.0)
+            scheduler.pop_due(now=feed.due)
+        self.assertEqual(feed.interval, 200)
+
+    def test_success_resets_the_error_count(self):
+        scheduler, feed = self.make()
+        scheduler.done(feed, None, now=0.0)
+        scheduler.pop_due(now=feed.due)
+        scheduler.done(feed, ["a headline"], now=0.0)
+        self.assertEqual(feed.errors, 0)
+        self.assertEqual(feed.interval, 90.0)  # 첫 성공은 기준만 잡음 (간격은 그대로)
+
+    def test_bursts_shorten_and_quiet_polls_lengthen(self):
+        scheduler, feed = self.make()
+        scheduler.done(feed, ["t0"], now=0.0)
+        scheduler.pop_due(now=feed.due)
+        self.assertEqual(scheduler.done(feed, ["t0", "t1", "t2", "t3"], now=0.0), 3)
+        self.assertEqual(feed.interval, 30.0)  # 60 / 2 (min_interval 30)
+        scheduler.pop_due(now=feed.due)
+        scheduler.done(feed, ["t0", "t1", "t2", "t3"], now=0.0)
+        self.assertEqual(feed.interval, 45.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+test_http_cache.py
+- DiskCache 시험 (임시 폴더에 캐시를 만들어서 씀, 인터넷 필요 없음)
+    * 같은 URL 의 내용이 바뀌면 예전 본문 파일과 파싱 결과가 지워지는지
+    * 다른 URL 이 같은 본문을 쓰면 지우지 않는지
+    * 남아 있던 임시 파일을 캐시를 열 때 치우는지
+
+예)
+    python -m pytest -q test_http_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache import DiskCache  # noqa: E402
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(self.tmp.name, max_bytes=10_000, max_entries=5)
+
+    def tearDown(self):
+        self.cache.db.close()
+        self.tmp.cleanup()
+
+    def body_files(self):
+        return sorted(os.listdir(self.cache.bodies))
+
+    def test_repeated_stores_to_one_url_keep_one_body(self):
+        url = "https://example.com/rss.xml"
+        for n in range(50):
+            body = f"<rss>version {n}</rss>".encode() * 20
+            digest = self.cache.store(url, body, f'"v{n}"', None, "utf-8", "application/rss+xml")
+            self.cache.save_parsed(digest, "rss:30", [f"title {n}"])
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["parsed"], 1)  # 예전 본문의 파싱 결과도 지워짐
+        self.assertEqual(self.body_files(), [digest])
+        self.assertEqual(os.path.getsize(os.path.join(self.cache.bodies, digest)), stats["bytes"])
+
+    def test_streamed_bodies_replace_the_old_file(self):
+        url = "https://example.com/feed.xml"
+        for n in range(10):
+            writer = self.cache.writer(url, f'"e{n}"', None, "utf-8", None)
+            writer.write(f"<rss>{n}</rss>".encode())
+            digest = writer.commit()
+        self.assertEqual(self.body_files(), [digest])
+
+    def test_shared_body_is_kept_while_another_url_uses_it(self):
+        body = b"<rss>same</rss>"
+        shared = self.cache.store("https://a.example/rss", body, '"1"', None, "utf-8", None)
+        self.cache.store("https://b.example/rss", body, '"1"', None, "utf-8", None)
+        self.cache.store("https://a.example/rss", b"<rss>changed</rss>", '"2"', None, "utf-8", None)
+
+        self.assertIn(shared, self.body_files())
+        self.assertEqual(self.cache.body(self.cache.lookup("https://b.example/rss")), body)
+
+    def test_partial_entry_replaces_the_old_body(self):
+        url = "https://example.com/big.xml"
+        self.cache.store(url, b"<rss>full</rss>", '"1"', None, "utf-8", None)
+        key = self.cache.save_partial(url, '"2"', None, "utf-8", None)
+        self.cache.save_parsed(key, "rss:5", ["a title"])
+
+        self.assertEqual(self.body_files(), [])
+        self.assertFalse(self.cache.lookup(url).has_body)
+        self.assertEqual(self.cache.find_parsed(key, "rss:5"), ["a title"])
+
+    def test_stale_temp_files_are_swept_on_open(self):
+        old = os.path.join(self.cache.bodies, "incoming.1.2.tmp")
+        fresh = os.path.join(self.cache.bodies, "incoming.3.4.tmp")
+        for path in (old, fresh):
+            with open(path, "wb") as f:
+                f.write(b"half")
+        past = time.time() - 2 * 3600
+        os.utime(old, (past, past))
+
+        self.cache.db.close()
+        self.cache = DiskCache(self.tmp.name)
+        self.assertEqual(self.body_files(), ["incoming.3.4.tmp"])  # 지금 쓰는 중일 수 있는 새 파일은 남김
+
+
+if __name__ == "__main__":
+    unittest.main()